@@ -1,17 +1,38 @@
+import argparse
+import logging
 import os
 import sys
-import traceback
 
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(project_root, "src"))
 
+from src import startup  # starts the time-to-menu clock before the heavier imports
+from src.game_log import setup_logging, shutdown_logging
 from src.main import main
 
-try:
-    main()
-except Exception as e:
-    print(f"Error in run.py: {e}")
-    error_log_path = os.path.join(project_root, "error_log.txt")
-    with open(error_log_path, "a") as f:
-        f.write(f"Error: {e}\n{traceback.format_exc()}\n")
-    raise
\ No newline at end of file
+log = logging.getLogger("src.run")
+
+# Guarded so the spawned pipeline processes can re-import this module safely
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AR Spectral Showdown")
+    parser.add_argument("--pipeline", choices=["inprocess", "multiprocess"], default="inprocess",
+                        help="run camera capture and hand inference in separate processes")
+    parser.add_argument("--record", action="store_true",
+                        help="record each game to recordings/ for `python -m src.session_recorder`")
+    parser.add_argument("--trace-latency", action="store_true",
+                        help="log per-stage capture-to-present latency after each game")
+    parser.add_argument("--verbose", action="store_true", help="also log per-frame detail (debug level)")
+    args = parser.parse_args()
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        main(pipeline=args.pipeline, record=args.record, trace_latency=args.trace_latency)
+    except Exception as e:
+        log.exception("Error in run.py: %s", e)
+        raise
+    finally:
+        # Face and avatar writes still queued on quit are finished before exit; only if a write was ever queued
+        image_writer = sys.modules.get("src.image_writer")
+        if image_writer is not None:
+            image_writer.shutdown_image_writer()
+        shutdown_logging()
\ No newline at end of file
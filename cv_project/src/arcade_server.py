@@ -0,0 +1,324 @@
+"""Serve several game stations from one host process with a shared inference pool.
+
+Each station has its own frame source, GameLogic and off-screen UI surface.
+Hand inference for every station runs on one process pool sized to the CPU
+count. Stations are served round-robin with at most one frame in flight each,
+so a busy station cannot starve the others. Frames waiting at dispatch time
+are batched into a single pool task.
+
+Capacity test with replayed video standing in for the station cameras:
+
+    python -m src.arcade_server --source recordings/station.mp4 --stations 6 --seconds 60
+    python -m src.arcade_server --source 0 --stations 1 --show
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+import pygame
+
+from src.game_logic import GameLogic
+from src.hand_tracking import GestureSmoother, classify_landmarks, landmarks_to_array
+
+log = logging.getLogger(__name__)
+
+STATION_SIZE = (400, 300)
+
+_worker_hands = None
+
+
+def _init_worker():
+    global _worker_hands
+    import mediapipe as mp
+    # Frames from different stations are interleaved, so every frame is treated as a still image
+    _worker_hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.4)
+
+
+def _infer_batch(batch):
+    """Run hand inference on [(station_id, seq, rgb_frame), ...] inside a pool worker."""
+    results = []
+    for station_id, seq, rgb_frame in batch:
+        output = _worker_hands.process(rgb_frame)
+        landmarks = landmarks_to_array(output.multi_hand_landmarks) if output.multi_hand_landmarks else None
+        results.append((station_id, seq, landmarks))
+    return results
+
+
+class VideoFrameSource:
+    """Camera index or video file; files loop so a short recording can stand in for a live camera."""
+
+    def __init__(self, source, resolution=(320, 240)):
+        self.source = int(source) if str(source).isdigit() else source
+        self.resolution = resolution
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open frame source {source}")
+        self.is_file = not isinstance(self.source, int)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.is_file:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if (frame.shape[1], frame.shape[0]) != self.resolution:
+            frame = cv2.resize(frame, self.resolution)
+        # Unmirrored, like HandTracking: classify_landmarks' thumb test expects camera orientation
+        return frame
+
+    def release(self):
+        self.cap.release()
+
+
+class InferenceScheduler:
+    """Fair, batched dispatch of station frames to a shared process pool."""
+
+    def __init__(self, workers=None, batch_size=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.pool = multiprocessing.get_context("spawn").Pool(self.workers, initializer=_init_worker)
+        self.pending = {}  # station_id -> (seq, rgb_frame); newer frames replace older ones
+        self.order = deque()  # round-robin order of stations
+        self.busy = set()  # stations with a frame in flight
+        self.tasks_in_flight = 0
+        self._lock = threading.Lock()  # busy and tasks_in_flight are also updated on the pool's result thread
+        self.results = queue.Queue()
+        self.frames_dispatched = 0
+        self.frames_dropped = 0
+
+    def submit(self, station_id, seq, rgb_frame):
+        if station_id not in self.order:
+            self.order.append(station_id)
+        if station_id in self.pending:
+            self.frames_dropped += 1
+        self.pending[station_id] = (seq, rgb_frame)
+
+    def dispatch(self):
+        while True:
+            batch = []
+            with self._lock:
+                if self.tasks_in_flight >= self.workers:
+                    return
+                for _ in range(len(self.order)):
+                    station_id = self.order[0]
+                    self.order.rotate(-1)
+                    if station_id in self.pending and station_id not in self.busy:
+                        seq, rgb_frame = self.pending.pop(station_id)
+                        batch.append((station_id, seq, rgb_frame))
+                        self.busy.add(station_id)
+                        if len(batch) >= self.batch_size:
+                            break
+                if not batch:
+                    return
+                self.tasks_in_flight += 1
+            self.frames_dispatched += len(batch)
+            self.pool.apply_async(_infer_batch, (batch,), callback=self._on_done, error_callback=self._on_error(batch))
+
+    def _on_done(self, results):
+        for result in results:
+            self.results.put(result)
+        self._finish([r[0] for r in results])
+
+    def _on_error(self, batch):
+        def callback(error):
+            log.error("❌ Inference batch failed: %s", error)
+            self._finish([station_id for station_id, _, _ in batch])
+        return callback
+
+    def _finish(self, station_ids):
+        # Runs on the pool's result thread
+        with self._lock:
+            self.busy.difference_update(station_ids)
+            self.tasks_in_flight -= 1
+
+    def drain(self):
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class StationSession:
+    """One station: frame source, game state and an off-screen surface to render into."""
+
+    def __init__(self, station_id, source, mode="normal", round_seconds=3.0):
+        self.station_id = station_id
+        self.source = source
+        self.mode = mode
+        self.round_seconds = round_seconds
+        self.game_logic = GameLogic(clock=lambda: int(time.monotonic() * 1000))
+        self.game_logic.initialize_game(mode)
+        self.smoother = GestureSmoother()
+        self.surface = pygame.Surface(STATION_SIZE)
+        self.font = pygame.font.Font(None, 28)
+        self.frame = None
+        self.seq = 0
+        self.sent_at = {}
+        self.round_start = time.monotonic()
+        self.last_outcome = ""
+        self.hand_seen = False
+        self.frames_captured = 0
+        self.results_received = 0
+        self.latencies = deque(maxlen=500)
+
+    def capture(self):
+        frame = self.source.read()
+        if frame is None:
+            return None
+        self.frame = frame
+        self.seq += 1
+        self.frames_captured += 1
+        self.sent_at[self.seq] = time.perf_counter()
+        if len(self.sent_at) > 64:
+            self.sent_at.pop(next(iter(self.sent_at)))
+        return self.seq, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def on_result(self, seq, landmarks):
+        sent = self.sent_at.pop(seq, None)
+        if sent is not None:
+            self.latencies.append(time.perf_counter() - sent)
+        self.results_received += 1
+        self.hand_seen = landmarks is not None
+        if landmarks is not None:
+            gestures, confidences = classify_landmarks(landmarks[:1])
+            self.smoother.update(gestures[0], confidences[0])
+
+    def tick(self):
+        if time.monotonic() - self.round_start >= self.round_seconds:
+            gesture = self.smoother.gesture
+            ai_move = self.game_logic.get_ai_move(gesture, self.mode)
+            self.last_outcome = f"{gesture} vs {ai_move}: {self.game_logic.evaluate_round(gesture, ai_move)}"
+            self.game_logic.update_scores(self.game_logic.last_outcome, gesture, [], [])
+            self.round_start = time.monotonic()
+            scores = self.game_logic.get_scores()
+            if scores[0] >= 5 or scores[1] >= 5:
+                self.game_logic.initialize_game(self.mode)
+
+    def render(self):
+        self.surface.fill((20, 20, 60))
+        if self.frame is not None:
+            # Mirrored for display only
+            rgb = cv2.cvtColor(cv2.flip(cv2.resize(self.frame, (240, 180)), 1), cv2.COLOR_BGR2RGB)
+            self.surface.blit(pygame.surfarray.make_surface(rgb.swapaxes(0, 1)), (80, 60))
+        scores = self.game_logic.get_scores()
+        lines = [
+            (f"Station {self.station_id}  You {scores[0]} - {scores[1]} AI", (255, 215, 0), 10),
+            (f"Gesture: {self.smoother.gesture}{'' if self.hand_seen else ' (no hand)'}", (0, 255, 0), 250),
+            (self.last_outcome, (255, 255, 255), 275),
+        ]
+        for text, color, y in lines:
+            self.surface.blit(self.font.render(text, True, color), (10, y))
+
+    def stats(self, elapsed):
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "station": self.station_id,
+            "capture_fps": self.frames_captured / elapsed,
+            "inference_fps": self.results_received / elapsed,
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p95_ms": float(np.percentile(latencies, 95)),
+        }
+
+
+class ArcadeServer:
+    def __init__(self, sources, workers=None, batch_size=4, mode="normal", target_fps=30):
+        self.sessions = [StationSession(i, source, mode) for i, source in enumerate(sources)]
+        self.scheduler = InferenceScheduler(workers, batch_size)
+        self.target_fps = target_fps
+
+    def run(self, seconds=None, screen=None):
+        clock = pygame.time.Clock()
+        start = time.perf_counter()
+        try:
+            while seconds is None or time.perf_counter() - start < seconds:
+                if screen is not None and any(e.type == pygame.QUIT for e in pygame.event.get()):
+                    break
+                for session in self.sessions:
+                    captured = session.capture()
+                    if captured is not None:
+                        self.scheduler.submit(session.station_id, *captured)
+                self.scheduler.dispatch()
+                for station_id, seq, landmarks in self.scheduler.drain():
+                    self.sessions[station_id].on_result(seq, landmarks)
+                for session in self.sessions:
+                    session.tick()
+                    session.render()
+                if screen is not None:
+                    self._present(screen)
+                clock.tick(self.target_fps)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.scheduler.close()
+            for session in self.sessions:
+                session.source.release()
+        return self.report(elapsed)
+
+    def _present(self, screen):
+        columns = max(1, screen.get_width() // STATION_SIZE[0])
+        for i, session in enumerate(self.sessions):
+            screen.blit(session.surface, ((i % columns) * STATION_SIZE[0], (i // columns) * STATION_SIZE[1]))
+        pygame.display.flip()
+
+    def report(self, elapsed):
+        lines = [f"{'station':>8}{'capture fps':>13}{'infer fps':>11}{'p50 ms':>9}{'p95 ms':>9}"]
+        total = 0
+        for session in self.sessions:
+            s = session.stats(elapsed)
+            total += session.results_received
+            lines.append(f"{s['station']:>8}{s['capture_fps']:>13.1f}{s['inference_fps']:>11.1f}"
+                         f"{s['latency_p50_ms']:>9.1f}{s['latency_p95_ms']:>9.1f}")
+        lines.append(f"{len(self.sessions)} stations, {self.scheduler.workers} workers: "
+                     f"{total / elapsed:.1f} inferences/s total, {self.scheduler.frames_dropped} stale frames skipped")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run N game stations against one shared inference pool.")
+    parser.add_argument("--source", action="append", required=True,
+                        help="camera index or video file; repeat to give stations different sources")
+    parser.add_argument("--stations", type=int, default=None, help="number of stations (sources are reused round-robin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--mode", default="normal")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=None, help="stop after this long and print the capacity report")
+    parser.add_argument("--show", action="store_true", help="tile the station surfaces in a window")
+    args = parser.parse_args()
+
+    from src.game_log import setup_logging, shutdown_logging
+
+    setup_logging(logging.INFO)
+    if not args.show:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    stations = args.stations or len(args.source)
+    sources = [VideoFrameSource(args.source[i % len(args.source)]) for i in range(stations)]
+    screen = None
+    if args.show:
+        columns = min(stations, 3)
+        rows = (stations + columns - 1) // columns
+        screen = pygame.display.set_mode((columns * STATION_SIZE[0], rows * STATION_SIZE[1]))
+        pygame.display.set_caption("AR Spectral Showdown - Arcade Server")
+    server = ArcadeServer(sources, args.workers, args.batch_size, args.mode, args.fps)
+    try:
+        print(server.run(args.seconds, screen))
+    finally:
+        pygame.quit()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
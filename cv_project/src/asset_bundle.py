@@ -0,0 +1,208 @@
+"""Packs the UI's sprites and sounds into one memory-mappable file.
+
+Build (or rebuild after changing any asset) from the project root:
+
+    python -m src.asset_bundle
+
+Sprites are stored in the display's native pixel layout and sounds as PCM in
+the mixer's format, so loading is a single mmap plus zero-copy surfaces that
+blit without conversion, instead of PNG/WAV decoding. Build on the machine
+that runs the game: on a display with another pixel layout the sprites still
+load, but the UI has to convert them. The bundle is ignored when any source
+file's size or mtime no longer matches, when its header checksum or length is
+wrong, or (for sounds) when the mixer was initialised with a different format.
+The content hash identifies the build; it is not re-checked at startup, which
+would read every page of the file.
+"""
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+ASSET_ROOT = "assets"
+BUNDLE_PATH = os.path.join(ASSET_ROOT, "assets.bundle")
+MAGIC = b"CVAB"
+FORMAT_VERSION = 2
+ALIGNMENT = 16
+HEADER = struct.Struct("<III")  # format version, manifest length, manifest CRC-32
+FROMBUFFER_FORMATS = ("BGRA", "ARGB", "RGBA")
+
+# Sprite -> whether it has per-pixel alpha
+SPRITES = {
+    "sprites/button.png": True,
+    "sprites/background.png": False,
+    "emojis/rock.png": True,
+    "emojis/paper.png": True,
+    "emojis/scissors.png": True,
+}
+SOUNDS = ["sounds/click.wav", "sounds/laugh.wav", "sounds/cheer.wav"]
+MUSIC = ["sounds/music.mp3", "sounds/gameplay_music.mp3"]
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def pixel_format(surface):
+    """Bit depth and channel masks of a surface."""
+    return [surface.get_bitsize(), *surface.get_masks()]
+
+
+def display_pixel_format():
+    """pixel_format of convert_alpha() surfaces on the current display (requires a display mode)."""
+    return pixel_format(pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha())
+
+
+def _native_buffer_format():
+    """The frombuffer layout matching the display's alpha format, or RGBA if none does."""
+    native = display_pixel_format()
+    for buffer_format in FROMBUFFER_FORMATS:
+        if pixel_format(pygame.image.frombuffer(bytes(4), (1, 1), buffer_format)) == native:
+            return buffer_format
+    return "RGBA"
+
+
+def build_bundle(root=ASSET_ROOT, bundle_path=BUNDLE_PATH):
+    """Decode every asset once and write the bundle atomically; returns the content hash."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    buffer_format = _native_buffer_format()
+    entries, sources, blobs = {}, {}, []
+    offset = 0
+
+    def add(name, data, **meta):
+        nonlocal offset
+        padding = -offset % ALIGNMENT
+        blobs.append(b"\0" * padding + data)
+        offset += padding
+        entries[name] = dict(meta, offset=offset, length=len(data))
+        offset += len(data)
+
+    for name, alpha in SPRITES.items():
+        path = os.path.join(root, name)
+        surface = pygame.image.load(path).convert_alpha()
+        add(name, pygame.image.tobytes(surface, buffer_format), kind="image",
+            size=list(surface.get_size()), format=buffer_format, opaque=not alpha)
+        sources[name] = _source_stamp(path)
+    for name in SOUNDS:
+        path = os.path.join(root, name)
+        add(name, pygame.mixer.Sound(path).get_raw(), kind="sound")
+        sources[name] = _source_stamp(path)
+    for name in MUSIC:
+        path = os.path.join(root, name)
+        with open(path, "rb") as f:
+            add(name, f.read(), kind="blob")
+        sources[name] = _source_stamp(path)
+
+    data = b"".join(blobs)
+    manifest = {
+        "content_hash": hashlib.sha256(data).hexdigest(),
+        "data_length": len(data),
+        "mixer": list(pygame.mixer.get_init()),
+        "sources": sources,
+        "entries": entries,
+    }
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    header = MAGIC + HEADER.pack(FORMAT_VERSION, len(manifest_bytes), zlib.crc32(manifest_bytes)) + manifest_bytes
+    header += b"\0" * (-len(header) % ALIGNMENT)
+
+    temp_path = f"{bundle_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, bundle_path)
+    print(f"✅ Asset bundle written: {bundle_path} ({len(entries)} assets, {manifest['content_hash'][:12]})")
+    return manifest["content_hash"]
+
+
+class AssetBundle:
+    """Read-only, memory-mapped view of a bundle built by build_bundle."""
+
+    def __init__(self, bundle_path, root, mapping, manifest, data_start):
+        self.bundle_path = bundle_path
+        self.root = root
+        self.content_hash = manifest["content_hash"]
+        self._mmap = mapping
+        self._view = memoryview(mapping)
+        self._entries = manifest["entries"]
+        self._sounds_usable = pygame.mixer.get_init() is not None and list(pygame.mixer.get_init()) == manifest["mixer"]
+        self._data_start = data_start
+
+    @classmethod
+    def open(cls, bundle_path=BUNDLE_PATH, root=ASSET_ROOT):
+        """Map the bundle, or return None if it is missing, corrupt or stale."""
+        try:
+            with open(bundle_path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            if mapping[:4] != MAGIC:
+                raise ValueError("bad magic")
+            version, manifest_length, manifest_crc = HEADER.unpack_from(mapping, len(MAGIC))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"format version {version}")
+            manifest_start = len(MAGIC) + HEADER.size
+            manifest_bytes = mapping[manifest_start:manifest_start + manifest_length]
+            if zlib.crc32(manifest_bytes) != manifest_crc:
+                raise ValueError("manifest checksum mismatch")
+            manifest = json.loads(manifest_bytes)
+            for name, stamp in manifest["sources"].items():
+                if _source_stamp(os.path.join(root, name)) != stamp:
+                    raise ValueError(f"{name} changed since the bundle was built")
+            data_start = manifest_start + manifest_length
+            data_start += -data_start % ALIGNMENT
+            # Catches truncated or padded files without paging in the data
+            if len(mapping) != data_start + manifest["data_length"]:
+                raise ValueError("unexpected file length")
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            log.warning("⚠️ Ignoring asset bundle %s: %s", bundle_path, e)
+            mapping.close()
+            return None
+        return cls(bundle_path, root, mapping, manifest, data_start)
+
+    def _slice(self, name, kind):
+        entry = self._entries.get(name)
+        if entry is None or entry["kind"] != kind:
+            return None, None
+        start = self._data_start + entry["offset"]
+        return self._view[start:start + entry["length"]], entry
+
+    def image(self, name):
+        """Return a Surface that shares memory with the bundle, or None."""
+        view, entry = self._slice(name, "image")
+        if view is None:
+            return None
+        surface = pygame.image.frombuffer(view, tuple(entry["size"]), entry["format"])
+        if entry["opaque"]:
+            surface.set_alpha(None)  # Plain copy blits; the stored alpha is all 255
+        return surface
+
+    def sound(self, name):
+        """Return a Sound built from stored PCM, or None if unavailable for this mixer format."""
+        view, _ = self._slice(name, "sound")
+        if view is None or not self._sounds_usable:
+            return None
+        return pygame.mixer.Sound(buffer=view)
+
+    def stream(self, name):
+        """Return a file-like object for a raw blob (e.g. music for mixer.music.load), or None."""
+        view, _ = self._slice(name, "blob")
+        return io.BytesIO(view) if view is not None else None
+
+
+if __name__ == "__main__":
+    build_bundle()
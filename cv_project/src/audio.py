@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+
+import pygame
+from pygame import mixer
+
+log = logging.getLogger(__name__)
+
+MENU_MUSIC = "sounds/music.mp3"
+GAMEPLAY_MUSIC = "sounds/gameplay_music.mp3"
+COUNTDOWN_TICK = "sounds/countdown_tick.wav"
+CLICK_SOUND = "sounds/click.wav"
+LAUGH_SOUND = "sounds/laugh.wav"
+CHEER_SOUND = "sounds/cheer.wav"
+MUSIC_CHANNELS = 2  # reserved so effects never steal a music channel mid-crossfade
+
+
+class AudioManager:
+    """Decodes every track and effect once and plays music on reserved channels.
+
+    Music tracks are decoded to Sounds up front, so switching between menu and
+    gameplay music is a crossfade between two channels, not an MP3 reload.
+    Missing assets are remembered, so asking for them again costs a dict
+    lookup. All volumes follow `set_volume`.
+    """
+
+    def __init__(self, volume=0.5, bundle=None, root="assets"):
+        self.bundle = bundle
+        self.root = root
+        self.volume = volume
+        self._sounds = {}  # name -> Sound, or None when the asset is missing or undecodable
+        self._lock = threading.Lock()
+        mixer.set_reserved(MUSIC_CHANNELS)
+        self._music_channels = [mixer.Channel(i) for i in range(MUSIC_CHANNELS)]
+        self._active = 0
+        self.current_music = None
+
+    def sound(self, name):
+        """Return the decoded Sound for an asset name, or None if it is unavailable."""
+        try:
+            return self._sounds[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._sounds:
+                self._sounds[name] = self._decode(name)
+            return self._sounds[name]
+
+    def _decode(self, name):
+        sound = self.bundle.sound(name) if self.bundle else None
+        if sound is None:
+            stream = self.bundle.stream(name) if self.bundle else None
+            path = os.path.join(self.root, *name.split("/"))
+            try:
+                sound = mixer.Sound(file=stream) if stream is not None else mixer.Sound(path)
+            except (pygame.error, FileNotFoundError) as e:
+                log.warning("⚠️ Sound %s unavailable, continuing without it: %s", name, e)
+                return None
+        sound.set_volume(self.volume)
+        return sound
+
+    def preload(self, names):
+        for name in names:
+            self.sound(name)
+
+    def play_effect(self, name):
+        sound = self.sound(name)
+        if sound is not None:
+            sound.play()
+
+    def play_music(self, name, fade_ms=800):
+        """Crossfade to a looping track; a no-op if it is already playing."""
+        if name == self.current_music:
+            return
+        track = self.sound(name)
+        outgoing = self._music_channels[self._active]
+        outgoing.fadeout(fade_ms)
+        self.current_music = name
+        if track is None:
+            return
+        self._active = (self._active + 1) % MUSIC_CHANNELS
+        self._music_channels[self._active].play(track, loops=-1, fade_ms=fade_ms)
+
+    def stop_music(self, fade_ms=800):
+        for channel in self._music_channels:
+            channel.fadeout(fade_ms)
+        self.current_music = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+        with self._lock:
+            for sound in self._sounds.values():
+                if sound is not None:
+                    sound.set_volume(volume)
@@ -1,153 +1,148 @@
 import cv2
+import logging
 import os
-import mediapipe as mp
 import numpy as np
+import pygame
 from src.image_processing import ImageProcessing
-import time
+from src.face_catalog import get_face_catalog
+from src.image_writer import get_image_writer
+from src.player_registration import draw_hands
+from src.session import PlayerSession
+
+log = logging.getLogger(__name__)
 
 SAVE_DIR = "assets/images"
 SCARY_DIR = "assets/scary"
-for directory in [SAVE_DIR, SCARY_DIR]:
-    os.makedirs(directory, exist_ok=True)
-
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6, min_tracking_confidence=0.6)
-mp_draw = mp.solutions.drawing_utils
 
-FONT = cv2.FONT_HERSHEY_SIMPLEX
 HOVER_TIME_REQUIRED = 15
 WINDOW_WIDTH, WINDOW_HEIGHT = 800, 600
 MAX_FRAMES = 600
+BUTTON_WIDTH, BUTTON_HEIGHT = 120, 40
+
+def load_models():
+    """Create the image directories; hands come from the shared tracker."""
+    for directory in [SAVE_DIR, SCARY_DIR]:
+        os.makedirs(directory, exist_ok=True)
 
 def load_latest_face_image() -> tuple[np.ndarray, str]:
-    images = [f for f in os.listdir(SAVE_DIR) if f.endswith('.jpg')]
-    if not images:
-        print("❌ No face image found in 'assets/images/'. Run player registration first.")
+    # Captures are written in the background; wait for them rather than sleeping
+    if not get_image_writer().wait_all(timeout=5):
+        log.warning("⚠️ Warning: Pending face image writes did not complete")
+    record = get_face_catalog().latest()
+    if record is None:
+        log.error("❌ No face image found in 'assets/images/'. Run player registration first.")
         return None, "Unknown"
-    
-    images_with_mtime = [(img, os.path.getmtime(os.path.join(SAVE_DIR, img))) for img in images]
-    images_with_mtime.sort(key=lambda x: x[1], reverse=True)
-    latest_image = images_with_mtime[0][0]
-    print(f"✅ Found latest image: {latest_image} (mtime: {images_with_mtime[0][1]})")
-    
-    player_name = latest_image.split("_")[0]
-    print(f"✅ Player name from image: {player_name}")
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        image = cv2.imread(os.path.join(SAVE_DIR, latest_image))
-        if image is not None:
-            return image, player_name
-        print(f"⚠️ Warning: Failed to load image (attempt {attempt + 1}/{max_retries}), retrying...")
-        time.sleep(0.5)
-    
-    print("❌ Failed to load image after retries")
-    return None, player_name
-
-def draw_progress_bar(frame, x, y, width, height, progress):
-    cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 0, 0), -1)
-    fill_width = int(width * min(progress / HOVER_TIME_REQUIRED, 1))
-    cv2.rectangle(frame, (x, y), (x + fill_width, y + height), (0, 255, 0), -1)
-    cv2.putText(frame, f"{progress}/{HOVER_TIME_REQUIRED}", (x + 5, y + 15), FONT, 0.5, (255, 255, 255), 1)
-
-def run_avatar_selection(image_processor: ImageProcessing) -> tuple[str, np.ndarray]:
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("❌ Error: Unable to open camera.")
-        return None, None
 
-    base_image, player_name = load_latest_face_image()
+    latest_image = record.path
+    player_name = record.player
+    log.info("✅ Found latest image: %s for player %s", latest_image, player_name)
+
+    image = cv2.imread(latest_image)
+    if image is None:
+        log.error("❌ Failed to load image")
+    return image, player_name
+
+def _button_rect(i):
+    return pygame.Rect(100 + i * 220 + 50, 150 + 250, BUTTON_WIDTH, BUTTON_HEIGHT)
+
+def build_overlay(ui, images, player_name):
+    """Pre-render the static avatar screen (thumbnails, buttons, labels) once."""
+    overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+    labels = []
+    for i, img in enumerate(images):
+        if img.shape[:2] != (200, 200):
+            img = cv2.resize(img, (200, 200))
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        overlay.blit(pygame.image.frombuffer(rgb, (200, 200), "RGB"), (100 + i * 220, 150))
+        rect = _button_rect(i)
+        pygame.draw.rect(overlay, (0, 255, 0), rect, 2)
+        labels.append(ui.small_font.render(f"Hover {i+1}", True, (0, 0, 0)))
+        overlay.blit(ui.small_font.render(f"Hover {i+1}", True, (255, 255, 255)), (rect.x + 20, rect.y + 10))
+    overlay.blit(ui.font.render(f"Player: {player_name}", True, (255, 255, 255)), (50, 35))
+    return overlay, labels
+
+def draw_progress_bar(screen, ui, rect, progress):
+    pygame.draw.rect(screen, (0, 0, 0), rect)
+    fill = rect.copy()
+    fill.width = int(rect.width * min(progress / HOVER_TIME_REQUIRED, 1))
+    pygame.draw.rect(screen, (0, 255, 0), fill)
+    screen.blit(ui.small_font.render(f"{progress}/{HOVER_TIME_REQUIRED}", True, (255, 255, 255)), (rect.x, rect.y - 22))
+
+def run_avatar_selection(screen, ui, hand_tracking, image_processor: ImageProcessing,
+                         session: PlayerSession = None) -> tuple[str, np.ndarray]:
+    """Let the player pick one of three effect avatars by hovering a finger over its button.
+
+    Runs on the game screen with the shared hand tracker. Without a choice
+    within MAX_FRAMES frames, or on Escape, the first avatar is used. Returns
+    "quit" if the window is closed.
+    """
+    load_models()
+    if session is not None:
+        base_image, player_name = session.face_image, session.player_name
+    else:
+        base_image, player_name = load_latest_face_image()
     if base_image is None:
-        cap.release()
-        cv2.destroyAllWindows()
         return None, None
 
     images = image_processor.generate_spectral_effects(base_image)
-    print("✅ Generated 3 processed images")
+    log.info("✅ Generated 3 processed images")
+    overlay, labels = build_overlay(ui, images, player_name)
     finger_hover_time = [-1] * 3
-    selected_index = -1
     frame_count = 0
 
-    cv2.namedWindow("Avatar Selection", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("Avatar Selection", WINDOW_WIDTH, WINDOW_HEIGHT)
-
-    while selected_index == -1 and frame_count < MAX_FRAMES:
-        ret, frame = cap.read()
-        if not ret:
-            print("❌ Camera Error: Unable to capture frame.")
-            break
-        frame = cv2.flip(frame, 1)
-        frame = cv2.resize(frame, (WINDOW_WIDTH, WINDOW_HEIGHT))
+    def draw(animating):
+        nonlocal frame_count
         frame_count += 1
-
-        for i, img in enumerate(images):
-            img_resized = cv2.resize(img, (200, 200))
-            x_offset = 100 + i * 220
-            y_offset = 150
-            if y_offset + 200 <= frame.shape[0] and x_offset + 200 <= frame.shape[1]:
-                frame[y_offset:y_offset+200, x_offset:x_offset+200] = img_resized
-            
-            button_x_offset = x_offset + 50
-            button_y_offset = y_offset + 250
-            button_width, button_height = 120, 40
-            cv2.rectangle(frame, (button_x_offset, button_y_offset), 
-                         (button_x_offset + button_width, button_y_offset + button_height), 
-                         (0, 255, 0), -1 if finger_hover_time[i] >= 0 else 2)
-            cv2.putText(frame, f"Hover {i+1}", (button_x_offset + 20, button_y_offset + 25), 
-                        FONT, 0.8, (0, 0, 0), 2)
+        landmarks = hand_tracking.track()
+        ui.draw_camera(screen, hand_tracking.get_flipped_frame(), (0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
+        screen.blit(overlay, (0, 0))
+        for i in range(3):
             if finger_hover_time[i] >= 0:
-                draw_progress_bar(frame, button_x_offset, button_y_offset - 20, button_width, 10, finger_hover_time[i])
-
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                index_finger_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                h, w, _ = frame.shape
-                finger_x, finger_y = int(index_finger_tip.x * w), int(index_finger_tip.y * h)
-                cv2.circle(frame, (finger_x, finger_y), 10, (0, 0, 255), -1)
-                print(f"✅ Finger position: ({finger_x}, {finger_y})")
-
-                for i in range(3):
-                    button_x_offset = 100 + i * 220 + 50
-                    button_y_offset = 150 + 250
-                    button_width, button_height = 120, 40
-                    if (button_x_offset <= finger_x <= button_x_offset + button_width and 
-                        button_y_offset <= finger_y <= button_y_offset + button_height):
-                        if finger_hover_time[i] == -1:
-                            finger_hover_time[i] = 0
-                        finger_hover_time[i] += 1
-                        print(f"✅ Hovering over button {i+1}: {finger_hover_time[i]}/{HOVER_TIME_REQUIRED}")
-                        if finger_hover_time[i] >= HOVER_TIME_REQUIRED:
-                            selected_index = i
-                            print(f"✅ Image {i+1} selected!")
-                            break
-                    else:
-                        finger_hover_time[i] = -1
-                if selected_index != -1:
-                    break
-
-        cv2.putText(frame, f"Player: {player_name}", (50, 50), FONT, 1, (255, 255, 255), 2)
-        cv2.imshow("Avatar Selection", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+                rect = _button_rect(i)
+                pygame.draw.rect(screen, (0, 255, 0), rect)
+                screen.blit(labels[i], (rect.x + 20, rect.y + 10))
+                draw_progress_bar(screen, ui, pygame.Rect(rect.x, rect.y - 20, rect.width, 10), finger_hover_time[i])
+
+        fingertip = draw_hands(screen, landmarks)
+        if fingertip is not None:
+            log.debug("✅ Finger position: (%s, %s)", *fingertip)
+            for i in range(3):
+                if _button_rect(i).collidepoint(fingertip):
+                    finger_hover_time[i] = max(finger_hover_time[i], 0) + 1
+                    log.debug("✅ Hovering over button %s: %s/%s", i+1, finger_hover_time[i], HOVER_TIME_REQUIRED)
+                    if finger_hover_time[i] >= HOVER_TIME_REQUIRED:
+                        log.info("✅ Image %s selected!", i+1)
+                        return i
+                else:
+                    finger_hover_time[i] = -1
 
         if frame_count >= MAX_FRAMES:
-            print("⚠️ Timeout reached, using default selection")
-            selected_index = 0
-
-    selected_image = images[selected_index] if selected_index != -1 else images[0]
+            log.warning("⚠️ Timeout reached, using default selection")
+            return 0
+
+    def handle_event(event):
+        if event.type == pygame.QUIT:
+            return "quit"
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            return 0
+
+    selected_index = ui.camera_loop.run(draw, handle_event)
+    if selected_index == "quit":
+        log.warning("⚠️ Avatar selection: Quit event detected")
+        return "quit"
+    selected_image = images[selected_index]
+    if session is not None:
+        session.set_avatar(selected_image, image_processor.last_effect_ids[selected_index])
     img_name = os.path.join(SCARY_DIR, f"{player_name}_scary.jpg")
-    cv2.imwrite(img_name, selected_image)
-    print(f"✅ Scary opponent face saved: {img_name}")
-
-    cap.release()
-    cv2.destroyAllWindows()
-    print(f"Returning player_name: {player_name}, selected_image: {selected_image is not None}")
+    get_image_writer().submit(img_name, selected_image)
+    log.info("✅ Scary opponent face queued for saving: %s", img_name)
+    log.debug("Returning player_name: %s, selected_image: %s", player_name, selected_image is not None)
     return player_name, selected_image
 
 if __name__ == "__main__":
-    image_processor = ImageProcessing()
-    run_avatar_selection(image_processor)
\ No newline at end of file
+    from src.hand_tracking import HandTracking
+    from src.ui import UI
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    run_avatar_selection(screen, UI(), HandTracking(), ImageProcessing())
\ No newline at end of file
@@ -0,0 +1,49 @@
+import pygame
+
+INPUT_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN)
+
+
+class IdleEventLoop:
+    """Event loop for non-gameplay screens that sleeps while nothing changes.
+
+    The screen is redrawn when an event arrives, at `active_fps` while an
+    animation is running (for `animation_timeout` ms after the last input), and
+    at `idle_fps` otherwise. With `idle_fps` 0 the loop blocks on events alone.
+    Camera screens set both rates to the target fps so every frame is drawn.
+    """
+
+    def __init__(self, active_fps=60, idle_fps=0, animation_timeout=5000):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.animation_timeout = animation_timeout
+
+    def run(self, draw, handle_event, animated=True):
+        """Call draw(animating) when needed and handle_event(event) for each event.
+
+        Returns the first non-None value returned by handle_event or draw.
+        """
+        last_input = frame_start = pygame.time.get_ticks()
+        dirty = True
+        while True:
+            animating = animated and pygame.time.get_ticks() - last_input < self.animation_timeout
+            if dirty or animating or self.idle_fps:
+                frame_start = pygame.time.get_ticks()
+                result = draw(animating)
+                pygame.display.flip()
+                if result is not None:
+                    return result
+                dirty = False
+
+            fps = self.active_fps if animating else self.idle_fps
+            # Only wait out what is left of the frame, so slow draws (camera reads) do not halve the rate
+            timeout = 1000 // fps - (pygame.time.get_ticks() - frame_start) if fps else 0
+            event = pygame.event.wait(max(1, timeout)) if fps else pygame.event.wait()
+            for event in [event] + pygame.event.get():
+                if event.type == pygame.NOEVENT:
+                    continue
+                if event.type in INPUT_EVENTS:
+                    last_input = pygame.time.get_ticks()
+                dirty = True
+                result = handle_event(event)
+                if result is not None:
+                    return result
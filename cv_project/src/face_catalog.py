@@ -0,0 +1,138 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+SAVE_DIR = os.path.join("assets", "images")
+
+FaceRecord = namedtuple("FaceRecord", ["player", "timestamp", "path", "width", "height"])
+
+
+class FaceCatalog:
+    """Persistent index of captured face images with retention.
+
+    Every write goes through `add`, which updates the SQLite index and an in-memory
+    map of the newest capture per player, so "latest" lookups never touch the
+    directory. Old captures are evicted per player, by age and by total count.
+    """
+
+    def __init__(self, directory=SAVE_DIR, max_per_player=3, max_entries=1000, max_age_days=30):
+        self.directory = directory
+        self.max_per_player = max_per_player
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "catalog.db"), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS faces (path TEXT PRIMARY KEY, player TEXT NOT NULL, "
+            "timestamp REAL NOT NULL, width INTEGER, height INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_faces_player ON faces (player, timestamp DESC)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_faces_timestamp ON faces (timestamp DESC)")
+        self._latest_by_player = {}
+        self._latest = None
+        if self._conn.execute("SELECT COUNT(*) FROM faces").fetchone()[0] == 0:
+            self.rebuild_from_directory()
+        self._load_latest()
+        self.enforce_retention()
+
+    def _load_latest(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT player, MAX(timestamp), path, width, height FROM faces GROUP BY player"
+            ).fetchall()
+            self._latest_by_player = {row[0]: FaceRecord(*row) for row in rows}
+            self._latest = max(self._latest_by_player.values(), key=lambda r: r.timestamp, default=None)
+
+    def add(self, player_name, path, shape=None, timestamp=None):
+        """Index a newly written capture and apply the per-player retention limit."""
+        height, width = (shape[0], shape[1]) if shape is not None else (None, None)
+        record = FaceRecord(player_name, timestamp or time.time(), path, width, height)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO faces (path, player, timestamp, width, height) VALUES (?, ?, ?, ?, ?)",
+                               (record.path, record.player, record.timestamp, record.width, record.height))
+            # Updated under the lock: adds arrive on the image writer thread while the game reads
+            current = self._latest_by_player.get(player_name)
+            if current is None or record.timestamp >= current.timestamp:
+                self._latest_by_player[player_name] = record
+            if self._latest is None or record.timestamp >= self._latest.timestamp:
+                self._latest = record
+        self._evict("SELECT path FROM faces WHERE player = ? ORDER BY timestamp DESC LIMIT -1 OFFSET ?",
+                    (player_name, self.max_per_player))
+        return record
+
+    def latest(self, player_name=None):
+        """Return the newest FaceRecord overall, or for one player; None if there is none."""
+        with self._lock:
+            record = self._latest if player_name is None else self._latest_by_player.get(player_name)
+        if record is not None and not os.path.exists(record.path):
+            # File removed behind our back: drop it and fall back to the next newest
+            self._delete([record.path], remove_files=False)
+            self._load_latest()
+            return self.latest(player_name)
+        return record
+
+    def players(self):
+        with self._lock:
+            return list(self._latest_by_player)
+
+    def enforce_retention(self):
+        """Evict captures older than max_age_days and beyond max_entries overall."""
+        removed = self._evict("SELECT path FROM faces WHERE timestamp < ?", (time.time() - self.max_age_days * 86400,))
+        removed += self._evict("SELECT path FROM faces ORDER BY timestamp DESC LIMIT -1 OFFSET ?", (self.max_entries,))
+        return removed
+
+    def _evict(self, query, params):
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute(query, params).fetchall()]
+            stale = any(r.path in paths for r in self._latest_by_player.values())
+        if paths:
+            self._delete(paths, remove_files=True)
+            if stale:
+                self._load_latest()
+        return len(paths)
+
+    def _delete(self, paths, remove_files):
+        with self._lock:
+            self._conn.executemany("DELETE FROM faces WHERE path = ?", [(p,) for p in paths])
+        if remove_files:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def rebuild_from_directory(self):
+        """Index existing `<player>_<YYYYmmdd>_<HHMMSS>.jpg` files (one-off directory scan)."""
+        rows = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".jpg"):
+                continue
+            stem = filename[:-4]
+            parts = stem.rsplit("_", 2)
+            player_name = parts[0] if len(parts) == 3 else stem
+            path = os.path.join(self.directory, filename)
+            rows.append((path, player_name, os.path.getmtime(path), None, None))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO faces (path, player, timestamp, width, height) VALUES (?, ?, ?, ?, ?)", rows)
+        if rows:
+            log.info("✅ Indexed %s existing face images in %s", len(rows), self.directory)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_face_catalog(directory=SAVE_DIR):
+    """Return the shared FaceCatalog for a directory."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(directory)
+        if catalog is None:
+            catalog = _catalogs[directory] = FaceCatalog(directory)
+        return catalog
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """Recycles preallocated image buffers keyed by shape and dtype.
+
+    Frame loops acquire their buffers once and pass them to OpenCV as `dst=`
+    outputs, so steady-state gameplay allocates no new image memory.
+    `allocations` only grows when a new shape is requested or every buffer of
+    that shape is already in use.
+    """
+
+    def __init__(self):
+        self._free = {}
+        self._blanks = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+        self.outstanding = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            self.outstanding += 1
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        if buffer is None:
+            return
+        key = (buffer.shape, buffer.dtype.str)
+        with self._lock:
+            self._free.setdefault(key, []).append(buffer)
+            self.outstanding -= 1
+
+    def ensure(self, buffer, shape, dtype=np.uint8):
+        """Return `buffer` if it already has this shape, else swap it for a pooled one that does."""
+        if buffer is not None and buffer.shape == tuple(shape) and buffer.dtype == dtype:
+            return buffer
+        self.release(buffer)
+        return self.acquire(shape, dtype)
+
+    def blank(self, shape, dtype=np.uint8):
+        """Shared read-only black frame, for when there is no camera frame to show."""
+        key = (tuple(shape), np.dtype(dtype).str)
+        frame = self._blanks.get(key)
+        if frame is None:
+            frame = np.zeros(shape, dtype=dtype)
+            frame.flags.writeable = False
+            self._blanks[key] = frame
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+                "outstanding": self.outstanding,
+                "free": sum(len(buffers) for buffers in self._free.values()),
+            }
+
+
+_pool = FramePool()
+
+
+def get_frame_pool():
+    """Process-wide pool shared by the frame loops."""
+    return _pool
@@ -0,0 +1,294 @@
+"""Multi-process vision pipeline over a shared-memory frame ring.
+
+Capture, inference and rendering run in separate processes:
+
+    capture process  --frames-->  SharedFrameRing  --zero-copy view-->  inference process
+                                                                             |
+    render process (the game) <------- compact result messages (queue) -------+
+
+The render process reads the newest frame from the ring for display. It gets
+hand landmarks and detected objects as small messages, so the three stages no
+longer share one GIL. Select it with `python run.py --pipeline multiprocess`.
+`create_hand_tracking` falls back to the in-process HandTracking when the
+helper processes cannot be started.
+"""
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from src.frame_pool import get_frame_pool
+from src.hand_tracking import HandTracking
+from src.motion_gate import MotionGate
+
+log = logging.getLogger(__name__)
+
+HEADER_FIELDS = 1  # latest sequence number, followed by one sequence number per slot
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frames in shared memory with per-slot sequence numbers.
+
+    A slot's sequence number is cleared while it is being written. Readers
+    check it again after using a zero-copy view, to detect a frame that was
+    overwritten underneath them (seqlock style).
+    """
+
+    def __init__(self, shape, slots=4, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = (HEADER_FIELDS + slots) * 8 + slots * 8
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        buf = self._shm.buf
+        self._seqs = np.ndarray((HEADER_FIELDS + slots,), dtype=np.int64, buffer=buf)
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=(HEADER_FIELDS + slots) * 8)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=header_bytes)
+        if self.owner:
+            self._seqs[:] = 0
+
+    @property
+    def latest_seq(self):
+        return int(self._seqs[0])
+
+    def write(self, frame, timestamp):
+        seq = self.latest_seq + 1
+        slot = seq % self.slots
+        self._seqs[HEADER_FIELDS + slot] = 0
+        np.copyto(self._frames[slot], frame)
+        self._timestamps[slot] = timestamp
+        self._seqs[HEADER_FIELDS + slot] = seq
+        self._seqs[0] = seq
+        return seq
+
+    def read_latest(self, after_seq=0):
+        """Return (seq, frame view, capture timestamp) for the newest frame newer than after_seq, or None."""
+        seq = self.latest_seq
+        if seq <= after_seq:
+            return None
+        slot = seq % self.slots
+        return seq, self._frames[slot], float(self._timestamps[slot])
+
+    def is_valid(self, seq):
+        """True if the slot still holds frame `seq` (i.e. a view taken of it was not overwritten)."""
+        return int(self._seqs[HEADER_FIELDS + seq % self.slots]) == seq
+
+    def close(self):
+        # Drop the numpy views before releasing the mapping
+        self._seqs = self._timestamps = self._frames = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def capture_process(ring_name, shape, camera_index, stop_event):
+    ring = SharedFrameRing(shape, name=ring_name)
+    cap = cv2.VideoCapture(camera_index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, shape[1])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, shape[0])
+    buffer = np.empty(shape, dtype=np.uint8)
+    raw = None
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read(raw)
+            if not ret:
+                time.sleep(0.05)
+                continue
+            raw = frame  # reused by the next read once the camera's size is known
+            if frame.shape != buffer.shape:
+                cv2.resize(frame, (shape[1], shape[0]), dst=buffer)
+                frame = buffer
+            ring.write(frame, time.perf_counter())
+    finally:
+        cap.release()
+        ring.close()
+
+
+def inference_process(ring_name, shape, results, commands, stop_event, inference_resolution=None, model_complexity=1,
+                      detection_confidence=0.4, motion_threshold=0.0, motion_max_interval=0.5, detect_objects=False):
+    import mediapipe as mp
+    from src.hand_tracking import landmarks_to_array
+
+    ring = SharedFrameRing(shape, name=ring_name)
+    mp_hands = mp.solutions.hands
+    max_num_hands = 1
+
+    def create_hands():
+        return mp_hands.Hands(max_num_hands=max_num_hands, model_complexity=model_complexity,
+                              min_detection_confidence=detection_confidence, min_tracking_confidence=detection_confidence)
+
+    hands = create_hands()
+    detector = None
+    if detect_objects:
+        from src.object_detection import ObjectDetector
+
+        detector = ObjectDetector()
+    rgb_frame = np.empty(shape, dtype=np.uint8)
+    scaled = None
+    if inference_resolution and tuple(inference_resolution) != (shape[1], shape[0]):
+        scaled = np.empty((inference_resolution[1], inference_resolution[0], 3), dtype=np.uint8)
+    gate = MotionGate(motion_threshold, motion_max_interval) if motion_threshold > 0 else None
+    landmarks = None
+    last_seq = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                command, value = commands.get_nowait()
+                if command == "max_hands" and value != max_num_hands:
+                    hands.close()
+                    max_num_hands = value
+                    hands = create_hands()
+                    landmarks = None
+                    if gate is not None:
+                        gate.reset()
+            except queue.Empty:
+                pass
+            latest = ring.read_latest(last_seq)
+            if latest is None:
+                time.sleep(0.002)
+                continue
+            seq, frame, captured_at = latest
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+            # Opt-in: it delays the hand graph, and only callers that read last_objects need it
+            objects = detector.detect_objects(frame, "coin")[0] if detector else []
+            if not ring.is_valid(seq):
+                continue  # overwritten while we were reading it; take the newer frame instead
+            last_seq = seq
+            # Static frames resend the previous landmarks so the game keeps receiving results. The gate reads
+            # the validated copy: the ring slot may be overwritten again once is_valid has passed
+            if gate is None or gate.should_infer(rgb_frame):
+                if scaled is not None:
+                    cv2.resize(rgb_frame, tuple(inference_resolution), dst=scaled, interpolation=cv2.INTER_AREA)
+                output = hands.process(rgb_frame if scaled is None else scaled)
+                landmarks = landmarks_to_array(output.multi_hand_landmarks) if output.multi_hand_landmarks else None
+            results.put((seq, captured_at, landmarks, objects, time.perf_counter()))
+    finally:
+        hands.close()
+        ring.close()
+
+
+class ProcessHandTracking(HandTracking):
+    """HandTracking facade whose capture and inference run in helper processes."""
+
+    def __init__(self, resolution=(320, 240), camera_index=0, startup_timeout=10.0, inference_resolution=None,
+                 model_complexity=1, detection_confidence=0.4, classifier=None, smoothing_window=10,
+                 motion_threshold=0.0, motion_max_interval=0.5, detect_objects=False):
+        # Gating happens in the inference process, so there is no motion gate here
+        self._init_state(resolution, 1, inference_resolution, model_complexity, detection_confidence, classifier,
+                         smoothing_window)
+        self.last_objects = []
+        self.last_result_seq = 0
+        self._frame_seq = 0
+        self._processes = []
+
+        shape = (resolution[1], resolution[0], 3)
+        self._capture_buffer.fill(0)
+        # Ring frames are copied here first and only swapped in once the copy is known to be untorn
+        self._scratch_buffer = get_frame_pool().acquire(shape)
+        self.ring = SharedFrameRing(shape)
+        ctx = multiprocessing.get_context("spawn")
+        self._stop = ctx.Event()
+        self._results = ctx.Queue(maxsize=8)
+        self._commands = ctx.Queue()
+        try:
+            self._processes = [
+                ctx.Process(target=capture_process, args=(self.ring.name, shape, camera_index, self._stop),
+                            name="capture", daemon=True),
+                ctx.Process(target=inference_process, args=(self.ring.name, shape, self._results, self._commands, self._stop,
+                                  self.inference_resolution, model_complexity, detection_confidence,
+                                  motion_threshold, motion_max_interval, detect_objects),
+                            name="inference", daemon=True),
+            ]
+            for process in self._processes:
+                process.start()
+            deadline = time.monotonic() + startup_timeout
+            while self.ring.latest_seq == 0:
+                if time.monotonic() > deadline or not all(p.is_alive() for p in self._processes):
+                    raise RuntimeError("capture process produced no frames")
+                time.sleep(0.05)
+        except Exception:
+            self.close()
+            raise
+        log.info("✅ Multi-process pipeline started (ring %s)", self.ring.name)
+
+    def capture_frame(self):
+        latest = self.ring.read_latest(self._frame_seq)
+        if latest is not None:
+            seq, frame, captured_at = latest
+            np.copyto(self._scratch_buffer, frame)
+            if self.ring.is_valid(seq):
+                self._capture_buffer, self._scratch_buffer = self._scratch_buffer, self._capture_buffer
+                self._frame_seq = seq
+                self.last_capture_time = captured_at
+            # Otherwise the capture process overwrote the slot mid-copy; keep showing the previous frame
+        self.frame = self._capture_buffer
+        cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+        self.flipped_frame = cv2.flip(self._rgb_buffer, 1, dst=self._flipped_buffer)
+        return True, self.frame
+
+    def _process(self):
+        """Newest frame plus the newest inference result, kept until a newer one arrives."""
+        _, frame = self.capture_frame()
+        while True:
+            try:
+                seq, captured_at, self._last_landmarks, self.last_objects, inferred_at = self._results.get_nowait()
+                self.last_result_seq = seq
+                # Both processes stamp with perf_counter, which is system-wide monotonic on Linux
+                self._result_capture_time, self.last_inference_time = captured_at, inferred_at
+            except queue.Empty:
+                break
+        # Inference is usually slower than the render loop; like the motion gate, reuse the last result meanwhile
+        return frame, self._last_landmarks
+
+    def set_max_hands(self, max_num_hands):
+        if max_num_hands != self.max_num_hands:
+            self._commands.put(("max_hands", max_num_hands))
+            self.max_num_hands = max_num_hands
+        self._reset_players()
+
+    def close(self):
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def __del__(self):
+        if getattr(self, "ring", None) is not None:
+            self.close()
+
+
+def create_hand_tracking(pipeline="inprocess", settings=None):
+    """Build the hand tracker for the selected pipeline, falling back to in-process."""
+    options, motion = {}, {}
+    if settings is not None:
+        from src.gesture_classifier import load_model
+
+        options = dict(resolution=settings.capture_resolution, inference_resolution=settings.inference_resolution,
+                       model_complexity=settings.model_complexity, detection_confidence=settings.detection_confidence(),
+                       classifier=load_model(settings.gesture_model), smoothing_window=settings.smoothing_window)
+        if options["classifier"] is not None:
+            log.info("✅ Using trained gesture classifier %s", settings.gesture_model)
+        motion = dict(motion_threshold=settings.motion_threshold, motion_max_interval=settings.motion_max_interval)
+    if pipeline == "multiprocess":
+        try:
+            return ProcessHandTracking(**options, **motion)
+        except Exception as e:
+            log.warning("⚠️ Multi-process pipeline unavailable (%s), using in-process tracking", e)
+    gate = None
+    if motion.get("motion_threshold", 0) > 0:
+        gate = MotionGate(motion["motion_threshold"], motion["motion_max_interval"])
+    return HandTracking(**options, motion_gate=gate)
@@ -0,0 +1,133 @@
+"""Asynchronous, rate-limited logging for the game.
+
+Modules log through `logging.getLogger(__name__)` as usual. `setup_logging`
+configures the "src" logger with a QueueHandler, so the game loop only pays
+for a queue put. A background QueueListener does the console and file I/O.
+Repeats of the same message are collapsed: the first is logged, and the rest
+are counted and reported once per interval, e.g.
+
+    ⚠️ No hand detected, using last gesture: rock (×240 in last 5s)
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
+ERROR_LOG_PATH = os.path.join(PROJECT_ROOT, "error_log.txt")
+FILE_FORMAT = "%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s"
+
+_listener = None
+_rate_limiter = None
+_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """Passes the first record of each message template per interval and counts the rest.
+
+    Records are keyed by logger, level and the unformatted message, so
+    "Finger position: (%d, %d)" is one message whatever the arguments. When
+    the interval is over, the next occurrence is passed with the suppressed
+    count appended. `flush` emits counts that were never followed by a repeat.
+    """
+
+    def __init__(self, interval=5.0, exempt_level=logging.ERROR):
+        super().__init__()
+        self.interval = interval
+        self.exempt_level = exempt_level
+        self._windows = {}  # key -> [window start, suppressed count, last record]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.exempt_level:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[1] if window else 0
+                self._windows[key] = [now, 0, None]
+                if suppressed:
+                    self._annotate(record, suppressed + 1, now - window[0])
+                return True
+            window[1] += 1
+            window[2] = record
+            return False
+
+    @staticmethod
+    def _annotate(record, count, elapsed):
+        record.msg = f"{record.getMessage()} (×{count} in last {elapsed:.0f}s)"
+        record.args = None
+
+    def flush(self):
+        """Return summary records for messages still being suppressed."""
+        now = time.monotonic()
+        with self._lock:
+            pending = [(w[2], w[1], now - w[0]) for w in self._windows.values() if w[1]]
+            self._windows.clear()
+        for record, count, elapsed in pending:
+            self._annotate(record, count, elapsed)
+        return [record for record, _, _ in pending]
+
+
+def setup_logging(level=logging.INFO, console=True, log_dir=LOG_DIR, rate_limit_interval=5.0,
+                  max_bytes=1_000_000, backup_count=3):
+    """Route the "src" loggers through a background listener; safe to call more than once."""
+    global _listener, _rate_limiter
+    with _lock:
+        if _listener is not None:
+            return logging.getLogger("src")
+        handlers = []
+        if console:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter("%(message)s"))
+            handlers.append(stream)
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            game_file = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, "game.log"), maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            game_file.setFormatter(logging.Formatter(FILE_FORMAT))
+            handlers.append(game_file)
+            # Errors keep going to error_log.txt, where they have always been collected
+            error_file = logging.handlers.RotatingFileHandler(
+                ERROR_LOG_PATH, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            error_file.setLevel(logging.ERROR)
+            error_file.setFormatter(logging.Formatter(FILE_FORMAT))
+            handlers.append(error_file)
+        except OSError as e:
+            print(f"⚠️ File logging unavailable: {e}")
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        _rate_limiter = RateLimitFilter(rate_limit_interval)
+        queue_handler.addFilter(_rate_limiter)
+
+        logger = logging.getLogger("src")
+        logger.handlers[:] = [queue_handler]
+        logger.setLevel(level)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return logger
+
+
+def shutdown_logging():
+    """Report outstanding repeat counts and drain the queue; call before the process exits."""
+    global _listener, _rate_limiter
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        # The queue is drained now, so the summaries come after everything they summarise
+        for record in _rate_limiter.flush():
+            _listener.handle(record)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _rate_limiter = None
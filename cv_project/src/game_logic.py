@@ -1,8 +1,19 @@
+import logging
 import random
+from collections import deque
+
 import pygame
 
+from src.opponent_model import MOVES, COUNTER, create_model, counter_move
+
+log = logging.getLogger(__name__)
+
+MOVE_HISTORY_LIMIT = 50
+
 class GameLogic:
-    def __init__(self):
+    def __init__(self, clock=None):
+        # Millisecond clock; headless callers (e.g. the simulator) can supply their own
+        self.clock = clock or pygame.time.get_ticks
         self.player_score = 0
         self.ai_score = 0
         self.bonus_points = 0
@@ -11,45 +22,61 @@ class GameLogic:
         self.last_gesture = "rock"
         self.last_ai_move = "rock"
         self.last_outcome = "Draw"
-        self.move_history = []
+        self.move_history = deque(maxlen=MOVE_HISTORY_LIMIT)
+        self.rounds_played = 0
+        self.opponent_models = {}
         self.start_time = 0
         self.game_duration = 0
+        self.recorder = None  # optional session_recorder.SessionRecorder
 
     def initialize_game(self, mode):
         self.player_score = 0
         self.ai_score = 0
         self.bonus_points = 0
         self.power_ups = 0
-        self.move_history = []
-        self.start_time = pygame.time.get_ticks()
+        self.move_history.clear()
+        self.rounds_played = 0
+        for model in self.opponent_models.values():
+            model.reset()
+        self.start_time = self.clock()
         self.game_duration = 0
-        print(f"✅ Game initialized in {mode} mode")
+        if self.recorder is not None:
+            self.recorder.record_event("start", mode=mode)
+        log.info("✅ Game initialized in %s mode", mode)
+
+    def get_opponent_model(self, mode):
+        """Return the opponent model for a mode, creating it on first use."""
+        model = self.opponent_models.get(mode)
+        if model is None:
+            model = self.opponent_models[mode] = create_model(mode)
+        return model
 
     def get_ai_move(self, player_gesture, mode):
-        moves = ["rock", "paper", "scissors"]
+        model = self.get_opponent_model(mode)
+        prediction = model.predict()
         self.move_history.append(player_gesture)
+        self.rounds_played += 1
         self.last_gesture = player_gesture
 
-        if mode == "easy":
-            ai_move = random.choice(moves)
+        if mode in ("easy", "random"):
+            ai_move = random.choice(MOVES)
         elif mode == "normal":
-            # 50% random, 50% counter based on history
-            if random.random() < self.mode_difficulty["normal"] and len(self.move_history) >= 2:
-                move_counts = {m: self.move_history.count(m) for m in moves}
-                most_frequent = max(move_counts, key=move_counts.get)
-                ai_move = {"rock": "paper", "paper": "scissors", "scissors": "rock"}[most_frequent]
+            # 50% random, 50% counter the n-gram prediction
+            if random.random() < self.mode_difficulty["normal"]:
+                ai_move = counter_move(prediction)
             else:
-                ai_move = random.choice(moves)
+                ai_move = random.choice(MOVES)
         else:  # impossible mode
-            # 90% chance to counter the most frequent move
-            if random.random() < self.mode_difficulty["impossible"] and len(self.move_history) >= 2:
-                move_counts = {m: self.move_history.count(m) for m in moves}
-                most_frequent = max(move_counts, key=move_counts.get)
-                ai_move = {"rock": "paper", "paper": "scissors", "scissors": "rock"}[player_gesture]
+            # Counter the actual move once warmed up, otherwise the n-gram prediction
+            if random.random() < self.mode_difficulty["impossible"] and self.rounds_played >= 2:
+                ai_move = COUNTER[player_gesture]
             else:
-                ai_move = random.choice(moves)
+                ai_move = counter_move(prediction)
 
+        model.update(player_gesture)
         self.last_ai_move = ai_move
+        if self.recorder is not None:
+            self.recorder.record_event("ai_move", player=player_gesture, mode=mode, ai=ai_move)
         return ai_move
 
     def evaluate_round(self, player_gesture, ai_move):
@@ -63,7 +90,9 @@ class GameLogic:
         else:  # All other cases where AI wins
             outcome = "Lose"
         self.last_outcome = outcome
-        print(f"Evaluating round: Player: {player_gesture}, AI: {ai_move}, Outcome: {outcome}")
+        if self.recorder is not None:
+            self.recorder.record_event("round", player=player_gesture, ai=ai_move, outcome=outcome)
+        log.debug("Evaluating round: Player: %s, AI: %s, Outcome: %s", player_gesture, ai_move, outcome)
         return outcome
 
     def update_scores(self, outcome, gesture, objects, alignments):
@@ -75,9 +104,17 @@ class GameLogic:
         self.power_ups += len(objects)
 
         # Update game duration
-        current_time = pygame.time.get_ticks()
+        current_time = self.clock()
         self.game_duration = (current_time - self.start_time) // 1000
 
+    def update_versus_scores(self, outcome):
+        """Player-vs-player scoring: "Win" is a point for player 1, "Lose" for player 2."""
+        if outcome == "Win":
+            self.player_score += 1
+        elif outcome == "Lose":
+            self.ai_score += 1
+        self.game_duration = (self.clock() - self.start_time) // 1000
+
     def get_scores(self):
         return [self.player_score, self.ai_score]
 
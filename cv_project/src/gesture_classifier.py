@@ -0,0 +1,328 @@
+"""Learned rock/paper/scissors classifier over normalised hand landmarks (NumPy only).
+
+Landmarks are made invariant to position, scale, in-plane rotation and
+handedness before classification, so rotated or mirrored hands no longer
+fool the classifier the way the tip-above-PIP rules do.
+
+Datasets are .npz files with `landmarks` (M, 21, 3 or 4), `labels` (M,) as
+indices into GESTURES and an optional `sequence` (M,) id grouping consecutive
+frames of one take. Run from the project root, for example:
+
+    python -m src.gesture_classifier record --label rock --frames 300 --out data/rock_01.npz
+    python -m src.gesture_classifier train --data data/*.npz --kind softmax
+    python -m src.gesture_classifier evaluate --data data/test_*.npz --windows 1 3 5 10
+    python -m src.gesture_classifier check
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.hand_tracking import GESTURES, GestureSmoother, classify_landmarks
+
+MODEL_PATH = os.path.join("assets", "models", "gesture_classifier.npz")
+WRIST, INDEX_MCP, MIDDLE_MCP, PINKY_MCP = 0, 5, 9, 17
+INVARIANCE_TOLERANCE = 1e-4
+
+
+def normalize_landmarks(landmarks):
+    """(N, 21, >=3) landmarks -> (N, 63) features invariant to position, scale, rotation and handedness."""
+    points = np.asarray(landmarks, dtype=np.float32)[:, :, :3]
+    points = points - points[:, WRIST:WRIST + 1]
+    # Rotate in the image plane so the wrist -> middle knuckle axis points up (-y)
+    axis = points[:, MIDDLE_MCP, :2]
+    scale = np.linalg.norm(axis, axis=1, keepdims=True)
+    scale[scale < 1e-6] = 1.0
+    up = axis / scale
+    # The rotation taking (ux, uy) to (0, -1)
+    cos, sin = -up[:, 1], -up[:, 0]
+    x = points[:, :, 0] * cos[:, None] - points[:, :, 1] * sin[:, None]
+    y = points[:, :, 0] * sin[:, None] + points[:, :, 1] * cos[:, None]
+    # Mirror left hands onto right hands: index knuckle always on the +x side of the pinky knuckle
+    flip = np.where(x[:, INDEX_MCP] < x[:, PINKY_MCP], -1.0, 1.0).astype(np.float32)
+    features = np.stack([x * flip[:, None], y, points[:, :, 2]], axis=2) / scale[:, :, None]
+    return features.reshape(len(features), -1)
+
+
+def invariance_error(landmarks, angles=(30, 45, 90, 180, 270)):
+    """Largest feature difference between hands and their rotated and mirrored copies (0 when invariant)."""
+    points = np.asarray(landmarks, dtype=np.float32)[:, :, :3]
+    reference = normalize_landmarks(points)
+    worst = 0.0
+    for mirror in (1.0, -1.0):
+        for angle in (0,) + tuple(angles):
+            theta = np.radians(angle)
+            x, y = points[:, :, 0] * mirror, points[:, :, 1]
+            moved = points.copy()
+            moved[:, :, 0] = x * np.cos(theta) - y * np.sin(theta)
+            moved[:, :, 1] = x * np.sin(theta) + y * np.cos(theta)
+            worst = max(worst, float(np.abs(normalize_landmarks(moved) - reference).max()))
+    return worst
+
+
+class _Classifier:
+    def predict(self, landmarks):
+        """Same contract as classify_landmarks: (gestures, confidences) for an (N, 21, >=3) batch."""
+        probabilities = self.predict_proba(landmarks)
+        codes = probabilities.argmax(axis=1)
+        return [GESTURES[c] for c in codes], probabilities.max(axis=1).tolist()
+
+    __call__ = predict
+
+
+class KNNClassifier(_Classifier):
+    """k-nearest neighbours in feature space; confidence is the neighbour vote share."""
+
+    kind = "knn"
+
+    def __init__(self, k=5):
+        self.k = k
+        self.features = None
+        self.labels = None
+
+    def fit(self, landmarks, labels):
+        self.features = normalize_landmarks(landmarks)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        return self
+
+    def predict_proba(self, landmarks):
+        features = normalize_landmarks(landmarks)
+        # Squared distances without materialising (N, M, 63)
+        distances = (np.sum(features ** 2, axis=1)[:, None] - 2 * features @ self.features.T
+                     + np.sum(self.features ** 2, axis=1)[None, :])
+        k = min(self.k, len(self.labels))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        votes = np.zeros((len(features), len(GESTURES)), dtype=np.float32)
+        np.add.at(votes, (np.arange(len(features))[:, None], self.labels[nearest]), 1.0)
+        return votes / k
+
+    def state(self):
+        return {"k": np.array(self.k), "features": self.features, "labels": self.labels}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(int(state["k"]))
+        model.features, model.labels = state["features"], state["labels"]
+        return model
+
+
+class SoftmaxClassifier(_Classifier):
+    """Multinomial logistic regression trained with full-batch gradient descent."""
+
+    kind = "softmax"
+
+    def __init__(self, learning_rate=0.5, epochs=500, l2=1e-3):
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.l2 = l2
+        self.weights = None
+        self.bias = None
+        self.mean = None
+        self.std = None
+
+    def fit(self, landmarks, labels):
+        features = normalize_landmarks(landmarks)
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0) + 1e-6
+        x = (features - self.mean) / self.std
+        targets = np.eye(len(GESTURES), dtype=np.float32)[np.asarray(labels)]
+        self.weights = np.zeros((x.shape[1], len(GESTURES)), dtype=np.float32)
+        self.bias = np.zeros(len(GESTURES), dtype=np.float32)
+        for _ in range(self.epochs):
+            error = self._softmax(x @ self.weights + self.bias) - targets
+            self.weights -= self.learning_rate * (x.T @ error / len(x) + self.l2 * self.weights)
+            self.bias -= self.learning_rate * error.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, landmarks):
+        x = (normalize_landmarks(landmarks) - self.mean) / self.std
+        return self._softmax(x @ self.weights + self.bias)
+
+    def state(self):
+        return {"weights": self.weights, "bias": self.bias, "mean": self.mean, "std": self.std}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls()
+        model.weights, model.bias, model.mean, model.std = (state[k] for k in ("weights", "bias", "mean", "std"))
+        return model
+
+
+CLASSIFIERS = {cls.kind: cls for cls in (KNNClassifier, SoftmaxClassifier)}
+
+
+def save_model(model, path=MODEL_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, kind=np.array(model.kind), **model.state())
+
+
+def load_model(path=MODEL_PATH):
+    """Load a saved classifier, or return None if there is none at `path`."""
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path) as state:
+        return CLASSIFIERS[str(state["kind"])].from_state(dict(state))
+
+
+def load_dataset(paths):
+    """Concatenate .npz datasets; sequence ids are kept unique across files."""
+    landmarks, labels, sequences = [], [], []
+    next_sequence = 0
+    for path in paths:
+        with np.load(path) as data:
+            points = data["landmarks"].astype(np.float32)
+            if points.shape[2] == 3:
+                # The rule-based classifier reads visibility from the fourth column
+                points = np.concatenate([points, np.ones(points.shape[:2] + (1,), dtype=np.float32)], axis=2)
+            landmarks.append(points)
+            labels.append(data["labels"].astype(np.int64))
+            sequence = data["sequence"] if "sequence" in data else np.zeros(len(data["labels"]), dtype=np.int64)
+        _, sequence = np.unique(sequence, return_inverse=True)
+        sequences.append(sequence + next_sequence)
+        next_sequence += sequence.max() + 1 if len(sequence) else 0
+    return np.concatenate(landmarks), np.concatenate(labels), np.concatenate(sequences)
+
+
+def frames_to_stable(predictions, label, window):
+    """Frames until the smoothed decision settles on `label` for good; None if it never does."""
+    smoother = GestureSmoother(window, initial=None)
+    settled_at = None
+    for i, gesture in enumerate(predictions):
+        if smoother.update(gesture, 1.0) == GESTURES[label]:
+            settled_at = i + 1 if settled_at is None else settled_at
+        else:
+            settled_at = None
+    return settled_at
+
+
+def evaluate(classify, landmarks, labels, sequences, windows=(1, 3, 5, 10), latency_samples=200):
+    """Accuracy, confusion matrix, latency and per-window frames-to-stable for one classifier."""
+    gestures, _ = classify(landmarks)
+    codes = np.array([GESTURES.index(g) for g in gestures])
+    confusion = np.zeros((len(GESTURES), len(GESTURES)), dtype=np.int64)
+    np.add.at(confusion, (labels, codes), 1)
+
+    sample = landmarks[:latency_samples]
+    start = time.perf_counter()
+    for i in range(len(sample)):
+        classify(sample[i:i + 1])
+    per_sample_ms = (time.perf_counter() - start) * 1000 / max(1, len(sample))
+    start = time.perf_counter()
+    classify(landmarks)
+    batch_us = (time.perf_counter() - start) * 1e6 / max(1, len(landmarks))
+
+    stability = {}
+    for window in windows:
+        settle, unstable = [], 0
+        for sequence in np.unique(sequences):
+            index = np.flatnonzero(sequences == sequence)
+            frames = frames_to_stable([gestures[i] for i in index], labels[index[0]], window)
+            if frames is None:
+                unstable += 1
+            else:
+                settle.append(frames)
+        stability[window] = {
+            "mean_frames": float(np.mean(settle)) if settle else float("nan"),
+            "p95_frames": float(np.percentile(settle, 95)) if settle else float("nan"),
+            "unstable_sequences": unstable,
+        }
+    return {
+        "accuracy": float((codes == labels).mean()),
+        "confusion": confusion,
+        "per_sample_ms": per_sample_ms,
+        "batch_us": batch_us,
+        "stability": stability,
+    }
+
+
+def format_report(name, result):
+    lines = [f"{name}: accuracy {result['accuracy']:.1%}, {result['per_sample_ms']:.3f} ms/sample, "
+             f"{result['batch_us']:.1f} us/sample batched",
+             "  confusion (rows = truth): " + ", ".join(GESTURES)]
+    lines += [f"    {GESTURES[i]:>9} {row.tolist()}" for i, row in enumerate(result["confusion"])]
+    for window, s in result["stability"].items():
+        lines.append(f"  window {window:>2}: stable after {s['mean_frames']:.1f} frames (p95 {s['p95_frames']:.0f}), "
+                     f"{s['unstable_sequences']} sequences never settled")
+    return "\n".join(lines)
+
+
+def record(label, frames, out):
+    """Record one labelled take of landmarks from the camera."""
+    from src.hand_tracking import HandTracking
+
+    tracker = HandTracking()
+    captured = []
+    while len(captured) < frames:
+        _, landmarks = tracker._process()
+        if landmarks is not None:
+            captured.append(landmarks[0])
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    np.savez_compressed(out, landmarks=np.stack(captured), labels=np.full(frames, GESTURES.index(label)),
+                        sequence=np.zeros(frames, dtype=np.int64))
+    print(f"✅ Recorded {frames} {label} frames to {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the landmark gesture classifier.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="capture a labelled take from the camera")
+    record_parser.add_argument("--label", choices=GESTURES, required=True)
+    record_parser.add_argument("--frames", type=int, default=300)
+    record_parser.add_argument("--out", required=True)
+    train_parser = commands.add_parser("train", help="fit a classifier and save it")
+    train_parser.add_argument("--data", nargs="+", required=True)
+    train_parser.add_argument("--kind", choices=list(CLASSIFIERS), default="softmax")
+    train_parser.add_argument("--k", type=int, default=5, help="neighbours for --kind knn")
+    train_parser.add_argument("--model", default=MODEL_PATH)
+    check_parser = commands.add_parser("check", help="verify the features ignore hand rotation and handedness")
+    check_parser.add_argument("--data", nargs="+", help="datasets to check (default: random point clouds)")
+    eval_parser = commands.add_parser("evaluate", help="compare a saved classifier with the rule-based one")
+    eval_parser.add_argument("--data", nargs="+", required=True)
+    eval_parser.add_argument("--model", default=MODEL_PATH)
+    eval_parser.add_argument("--windows", type=int, nargs="+", default=[1, 3, 5, 10])
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.label, args.frames, args.out)
+    elif args.command == "check":
+        if args.data:
+            landmarks = load_dataset(args.data)[0]
+        else:
+            # Any point cloud must normalise the same way whatever its angle and handedness
+            landmarks = np.random.default_rng(0).uniform(0.2, 0.8, (256, 21, 3)).astype(np.float32)
+        error = invariance_error(landmarks)
+        if error > INVARIANCE_TOLERANCE:
+            print(f"❌ Features change under rotation or mirroring (max difference {error:.2g})")
+            sys.exit(1)
+        print(f"✅ Features are rotation and handedness invariant on {len(landmarks)} hands (max difference {error:.2g})")
+    elif args.command == "train":
+        landmarks, labels, _ = load_dataset(args.data)
+        error = invariance_error(landmarks[:200])
+        if error > INVARIANCE_TOLERANCE:
+            print(f"❌ Refusing to train: features change under rotation or mirroring (max difference {error:.2g})")
+            sys.exit(1)
+        model = KNNClassifier(args.k) if args.kind == "knn" else SoftmaxClassifier()
+        start = time.perf_counter()
+        model.fit(landmarks, labels)
+        save_model(model, args.model)
+        print(f"✅ Trained {args.kind} on {len(labels)} samples in {time.perf_counter() - start:.2f}s -> {args.model}")
+    else:
+        landmarks, labels, sequences = load_dataset(args.data)
+        print(format_report("rules", evaluate(classify_landmarks, landmarks, labels, sequences, args.windows)))
+        model = load_model(args.model)
+        if model is None:
+            print(f"⚠️ No model at {args.model}; train one first")
+        else:
+            print(format_report(model.kind, evaluate(model, landmarks, labels, sequences, args.windows)))
+
+
+if __name__ == "__main__":
+    main()
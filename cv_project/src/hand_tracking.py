@@ -1,21 +1,134 @@
 import cv2
+import logging
 import mediapipe as mp
 import numpy as np
 import time
+from collections import deque
+
+from src.frame_pool import get_frame_pool
+
+log = logging.getLogger(__name__)
+
+GESTURES = ("rock", "paper", "scissors")
+TIP_IDS = [8, 12, 16, 20]  # Index, middle, ring, pinky tips
+PIP_IDS = [6, 10, 14, 18]
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """Stack MediaPipe hand landmarks into an (N, 21, 4) array of x, y, z, visibility."""
+    return np.array([[(lm.x, lm.y, lm.z, lm.visibility) for lm in hand.landmark] for hand in multi_hand_landmarks],
+                    dtype=np.float32).reshape(-1, 21, 4)
+
+
+def classify_landmarks(landmarks):
+    """Classify a batch of hands at once; returns (gestures, confidences)."""
+    fingers = landmarks[:, TIP_IDS, 1] < landmarks[:, PIP_IDS, 1]
+    thumb = landmarks[:, 4, 0] < landmarks[:, 3, 0]
+    total_fingers = fingers.sum(axis=1) + thumb
+    scissors = fingers[:, 0] & fingers[:, 1] & ~fingers[:, 2] & ~fingers[:, 3]
+    codes = np.where(total_fingers == 0, 0, np.where(total_fingers >= 4, 1, np.where(scissors, 2, 0)))
+    # Calculate confidence based on finger positions
+    confidences = landmarks[:, TIP_IDS, 3].max(axis=1)
+    return [GESTURES[c] for c in codes], confidences.tolist()
+
+
+class GestureSmoother:
+    """Majority vote over the last `window` raw gestures of one player."""
+
+    def __init__(self, window=10, initial="rock"):
+        self.buffer = deque(maxlen=window)
+        self.gesture = initial
+        self.confidence = 0
+
+    def update(self, gesture, confidence):
+        self.buffer.append(gesture)
+        self.confidence = confidence
+        self.gesture = max(self.buffer, key=self.buffer.count)
+        return self.gesture
+
 
 class HandTracking:
-    def __init__(self, resolution=(320, 240)):
-        self.resolution = resolution  # Make resolution an instance variable
-        self.cap = None
+    def __init__(self, resolution=(320, 240), max_num_hands=1, inference_resolution=None, model_complexity=1,
+                 detection_confidence=0.4, classifier=None, smoothing_window=10, motion_gate=None):
+        self._init_state(resolution, max_num_hands, inference_resolution, model_complexity, detection_confidence,
+                         classifier, smoothing_window, motion_gate)
         self._initialize_camera()
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.4, min_tracking_confidence=0.4)
+        self.hands = self._create_hands(max_num_hands)
         self.mp_draw = mp.solutions.drawing_utils
+
+    def _init_state(self, resolution, max_num_hands=1, inference_resolution=None, model_complexity=1,
+                    detection_confidence=0.4, classifier=None, smoothing_window=10, motion_gate=None):
+        """Settings, smoothers, timestamps and frame buffers; shared by trackers that bring their own frame source."""
+        self.resolution = resolution  # Make resolution an instance variable
+        self.inference_resolution = inference_resolution or resolution
+        self.model_complexity = model_complexity
+        self.detection_confidence = detection_confidence
+        # Any callable with classify_landmarks' contract, e.g. a trained gesture_classifier model
+        self.classify = classifier or classify_landmarks
+        self.smoothing_window = smoothing_window
+        self.motion_gate = motion_gate
+        self.recorder = None  # optional session_recorder.SessionRecorder
+        self.latency = None  # optional latency.LatencyTracer
+        self._reset_timestamps()
+        self.cap = None
+        self.max_num_hands = max_num_hands
         self.frame = None
         self.flipped_frame = None
-        self.last_gesture = "rock"
-        self.gesture_buffer = []  # Increased buffer size for smoothing
-        self.gesture_confidence = 0  # Track confidence for debugging
+        self._reset_players()
+        self._allocate_buffers((resolution[1], resolution[0], 3))
+
+    def _allocate_buffers(self, shape):
+        """(Re)size the pooled capture, RGB and flipped buffers to the camera's actual frame shape."""
+        pool = get_frame_pool()
+        self._capture_buffer = pool.ensure(getattr(self, "_capture_buffer", None), shape)
+        self._rgb_buffer = pool.ensure(getattr(self, "_rgb_buffer", None), shape)
+        self._flipped_buffer = pool.ensure(getattr(self, "_flipped_buffer", None), shape)
+        inference_shape = (self.inference_resolution[1], self.inference_resolution[0], 3)
+        if inference_shape == tuple(shape):
+            self._inference_buffer = self._rgb_buffer
+        else:
+            # Landmarks are normalised, so inference on a downscaled copy maps straight back onto the frame
+            self._scaled_buffer = pool.ensure(getattr(self, "_scaled_buffer", None), inference_shape)
+            self._inference_buffer = self._scaled_buffer
+
+    def _create_hands(self, max_num_hands):
+        return self.mp_hands.Hands(max_num_hands=max_num_hands, model_complexity=self.model_complexity,
+                                   min_detection_confidence=self.detection_confidence,
+                                   min_tracking_confidence=self.detection_confidence)
+
+    def set_max_hands(self, max_num_hands):
+        """Switch between the single-player and two-player hand graphs."""
+        if max_num_hands != self.max_num_hands:
+            self.hands.close()
+            self.hands = self._create_hands(max_num_hands)
+            self.max_num_hands = max_num_hands
+        self._reset_players()
+
+    def _reset_timestamps(self):
+        # perf_counter seconds; the result times belong to the frame the current landmarks were inferred from
+        self.last_capture_time = self.last_device_time = None
+        self._result_capture_time = self._result_device_time = self.last_inference_time = None
+
+    def _reset_players(self):
+        self._last_hands = self._last_landmarks = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self.smoothers = [GestureSmoother(self.smoothing_window), GestureSmoother(self.smoothing_window)]
+        self.player_x = [0.25, 0.75]  # Tracked horizontal position (display space) of each player's hand
+
+    def _record(self, landmarks):
+        if self.recorder is not None:
+            self.recorder.record_frame(landmarks, [s.gesture for s in self.smoothers],
+                                       [s.confidence for s in self.smoothers])
+
+    @property
+    def last_gesture(self):
+        return self.smoothers[0].gesture
+
+    @property
+    def gesture_confidence(self):
+        return self.smoothers[0].confidence
 
     def _initialize_camera(self):
         """Initialize or reinitialize the camera with retries."""
@@ -27,9 +140,9 @@ class HandTracking:
             if self.cap.isOpened():
                 self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
                 self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
-                print(f"✅ Camera initialized on attempt {attempt + 1}")
+                log.info("✅ Camera initialized on attempt %s", attempt + 1)
                 return
-            print(f"⚠️ Attempt {attempt + 1}/{max_attempts} failed to initialize camera")
+            log.warning("⚠️ Attempt %s/%s failed to initialize camera", attempt + 1, max_attempts)
             time.sleep(1)  # Wait before retry
         raise Exception("Could not initialize any webcam after multiple attempts")
 
@@ -37,17 +150,36 @@ class HandTracking:
         """Capture a frame with multiple retries and reinitialization if needed."""
         max_attempts = 5
         for attempt in range(max_attempts):
-            ret, frame = self.cap.read()
+            ret, frame = self.cap.read(self._capture_buffer)
             if ret:
+                self.last_capture_time = time.perf_counter()
+                if self.latency is not None:
+                    self.last_device_time = self._device_time(self.last_capture_time)
+                if frame is not self._capture_buffer:
+                    # The camera ignored the requested resolution; adopt its size once
+                    self._allocate_buffers(frame.shape)
+                    np.copyto(self._capture_buffer, frame)
+                    frame = self._capture_buffer
                 self.frame = frame
-                self.flipped_frame = cv2.flip(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), 1)
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+                self.flipped_frame = cv2.flip(self._rgb_buffer, 1, dst=self._flipped_buffer)
                 return True, frame
-            print(f"⚠️ Attempt {attempt + 1}/{max_attempts} failed to capture frame")
+            log.warning("⚠️ Attempt %s/%s failed to capture frame", attempt + 1, max_attempts)
             time.sleep(0.2)  # Short delay between retries
-        print("❌ Failed to capture frame after multiple attempts, attempting to reinitialize camera")
+        log.error("❌ Failed to capture frame after multiple attempts, attempting to reinitialize camera")
         self._reinitialize_camera()
         # Return a black frame with the instance resolution
-        return False, np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
+        return False, self._blank_frame()
+
+    def _device_time(self, captured):
+        """The driver's frame timestamp, if the backend reports one on the perf_counter clock.
+
+        V4L2 stamps buffers with CLOCK_MONOTONIC, which is perf_counter's clock
+        on Linux. Other backends report something else (or 0); those are
+        rejected by the plausibility check.
+        """
+        device = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return device if 0 <= captured - device < 1.0 else None
 
     def _reinitialize_camera(self):
         """Reinitialize the camera if it fails."""
@@ -55,74 +187,118 @@ class HandTracking:
             if self.cap:
                 self.cap.release()
             self._initialize_camera()
-            print("✅ Camera reinitialized successfully")
+            log.info("✅ Camera reinitialized successfully")
         except Exception as e:
-            print(f"❌ Failed to reinitialize camera: {e}")
+            log.error("❌ Failed to reinitialize camera: %s", e)
 
-    def detect_gesture(self, mode):
+    def _process(self):
+        """Capture a frame and run one inference pass; returns (frame, landmarks or None)."""
         ret, frame = self.capture_frame()
-        if not ret and frame is None:
-            print("⚠️ Using last gesture due to frame capture failure")
+        if not ret:
+            return frame, None
+        # On a static scene the previous result is reused instead of running the hand graph again
+        if self.motion_gate is None or self.motion_gate.should_infer(frame):
+            if self._inference_buffer is not self._rgb_buffer:
+                cv2.resize(self._rgb_buffer, self.inference_resolution, dst=self._inference_buffer,
+                           interpolation=cv2.INTER_AREA)
+            self._last_hands, self._last_landmarks = self._infer()
+            self._result_capture_time, self._result_device_time = self.last_capture_time, self.last_device_time
+            self.last_inference_time = time.perf_counter()
+        if self._last_landmarks is None:
+            return frame, None
+        for hand_landmarks in self._last_hands:
+            self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+        return frame, self._last_landmarks
+
+    def _infer(self):
+        """Run the hand graph on the inference buffer; returns (MediaPipe hands, (N, 21, 4) landmarks or None)."""
+        # capture_frame already converted this frame to RGB
+        hands = self.hands.process(self._inference_buffer).multi_hand_landmarks
+        return hands, (landmarks_to_array(hands) if hands else None)
+
+    def _trace(self, raw_gesture):
+        if self.latency is not None:
+            self.latency.commit(self._result_capture_time, self._result_device_time, self.last_inference_time,
+                                raw_gesture, self.last_gesture)
+
+    def track(self):
+        """Capture and run inference once; returns the landmarks for screens that only need the pointer."""
+        _, landmarks = self._process()
+        return landmarks
+
+    def detect_gesture(self, mode):
+        frame, landmarks = self._process()
+        if frame is None:
+            log.warning("⚠️ Using last gesture due to frame capture failure")
             return self.last_gesture, []
 
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
         hand_positions = []
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                gesture, confidence = self._classify_gesture(hand_landmarks)
-                self.gesture_confidence = confidence
-                self.gesture_buffer.append(gesture)
-                if len(self.gesture_buffer) > 10:
-                    self.gesture_buffer.pop(0)
-                gesture_counts = {}
-                for g in self.gesture_buffer:
-                    gesture_counts[g] = gesture_counts.get(g, 0) + 1
-                self.last_gesture = max(gesture_counts, key=gesture_counts.get)
-                bbox = self._get_hand_bounding_box(hand_landmarks, frame.shape[1], frame.shape[0])
-                hand_positions.append((bbox[0] + bbox[2] // 2, bbox[1]))
-                print(f"✅ Detected gesture: {self.last_gesture}, Confidence: {self.gesture_confidence:.2f}")
-                return self.last_gesture, hand_positions
-        print(f"⚠️ No hand detected, using last gesture: {self.last_gesture}, Confidence: {self.gesture_confidence:.2f}")
+        if landmarks is not None:
+            gestures, confidences = self.classify(landmarks[:1])
+            self.smoothers[0].update(gestures[0], confidences[0])
+            self._record(landmarks[:1])
+            self._trace(gestures[0])
+            bbox = self._get_hand_bounding_box(landmarks[0], frame.shape[1], frame.shape[0])
+            hand_positions.append((bbox[0] + bbox[2] // 2, bbox[1]))
+            log.debug("✅ Detected gesture: %s, Confidence: %.2f", self.last_gesture, self.gesture_confidence)
+            return self.last_gesture, hand_positions
+        self._record(None)
+        self._trace(None)
+        log.warning("⚠️ No hand detected, using last gesture: %s, Confidence: %.2f", self.last_gesture, self.gesture_confidence)
         return self.last_gesture, hand_positions
 
+    def detect_gestures(self):
+        """Two-player detection: one inference pass, hands assigned to left/right players.
+
+        Returns the smoothed gesture of each player and which players were seen this frame.
+        """
+        frame, landmarks = self._process()
+        seen = [False, False]
+        raw_gesture = None
+        if landmarks is not None:
+            gestures, confidences = self.classify(landmarks)
+            # Frames are mirrored on screen, so display x is 1 - camera x
+            centers = (1.0 - landmarks[:, :, 0].mean(axis=1)).tolist()
+            for hand_index, player in self._assign_players(centers):
+                self.smoothers[player].update(gestures[hand_index], confidences[hand_index])
+                self.player_x[player] += 0.5 * (centers[hand_index] - self.player_x[player])
+                seen[player] = True
+                if player == 0:
+                    raw_gesture = gestures[hand_index]
+        self._record(landmarks)
+        self._trace(raw_gesture)  # gesture changes are traced for the left player
+        return [smoother.gesture for smoother in self.smoothers], seen
+
+    def _assign_players(self, centers):
+        """Match hands to players by distance to each player's last known position."""
+        if len(centers) == 1:
+            distances = [abs(centers[0] - x) for x in self.player_x]
+            return [(0, distances.index(min(distances)))]
+        a, b = centers[0], centers[1]
+        straight = abs(a - self.player_x[0]) + abs(b - self.player_x[1])
+        swapped = abs(a - self.player_x[1]) + abs(b - self.player_x[0])
+        return [(0, 0), (1, 1)] if straight <= swapped else [(0, 1), (1, 0)]
+
     def _classify_gesture(self, hand_landmarks):
-        landmarks = hand_landmarks.landmark
-        finger_status = [
-            1 if landmarks[8].y < landmarks[6].y else 0,  # Index
-            1 if landmarks[12].y < landmarks[10].y else 0,  # Middle
-            1 if landmarks[16].y < landmarks[14].y else 0,  # Ring
-            1 if landmarks[20].y < landmarks[18].y else 0  # Pinky
-        ]
-        thumb_status = 1 if landmarks[4].x < landmarks[3].x else 0  # Thumb
-        total_fingers = sum(finger_status) + thumb_status
-
-        # Calculate confidence based on finger positions
-        confidence = max(landmarks[8].visibility, landmarks[12].visibility, landmarks[16].visibility, landmarks[20].visibility)
-
-        if total_fingers == 0:
-            return "rock", confidence
-        elif total_fingers >= 4:
-            return "paper", confidence
-        elif finger_status[0] == 1 and finger_status[1] == 1 and sum(finger_status[2:]) == 0:
-            return "scissors", confidence
-        return "rock", confidence  # Fallback
+        gestures, confidences = self.classify(landmarks_to_array([hand_landmarks]))
+        return gestures[0], confidences[0]
 
     def _get_hand_bounding_box(self, hand_landmarks, frame_width, frame_height):
-        xs = [int(lm.x * frame_width) for lm in hand_landmarks.landmark]
-        ys = [int(lm.y * frame_height) for lm in hand_landmarks.landmark]
-        x_min, y_min, x_max, y_max = min(xs), min(ys), max(xs), max(ys)
+        """Bounding box of one hand's (21, >=2) landmark array in pixels."""
+        xs = (hand_landmarks[:, 0] * frame_width).astype(int)
+        ys = (hand_landmarks[:, 1] * frame_height).astype(int)
+        x_min, y_min, x_max, y_max = xs.min(), ys.min(), xs.max(), ys.max()
         return (x_min, y_min, x_max - x_min, y_max - y_min)
 
+    def _blank_frame(self):
+        return get_frame_pool().blank((self.resolution[1], self.resolution[0], 3))
+
     def get_frame(self):
-        return self.frame if self.frame is not None else np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
+        return self.frame if self.frame is not None else self._blank_frame()
 
     def get_flipped_frame(self):
-        return self.flipped_frame if self.flipped_frame is not None else np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
+        return self.flipped_frame if self.flipped_frame is not None else self._blank_frame()
 
     def __del__(self):
         if self.cap:
-            self.cap.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+            self.cap.release()
\ No newline at end of file
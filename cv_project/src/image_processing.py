@@ -1,36 +1,87 @@
 import cv2
 import numpy as np
 import os
-import datetime
+import hashlib
 import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.face_catalog import get_face_catalog
+from src.image_writer import get_image_writer
+
+EFFECT_IDS = ["blur", "brightness", "edges", "grayscale", "black_and_white", "red_filter", "invert", "noise"]
+
 
 class ImageProcessing:
     """Handles image transformations and alignment for spectral effects and avatars."""
 
-    def __init__(self):
+    def __init__(self, max_workers=4, cache_size=64, effect_size=200):
         self.target_position = (400, 300)
+        self.effect_size = effect_size
+        self.effects = {
+            "blur": lambda x: cv2.GaussianBlur(x, (15, 15), 0),  # 2D Convolution: Blur
+            "brightness": lambda x: cv2.convertScaleAbs(x, alpha=1.2, beta=50),  # Brightness/Contrast
+            "edges": lambda x: cv2.Canny(cv2.cvtColor(x, cv2.COLOR_BGR2GRAY), 100, 200),  # Edge Detection (converted to 3 channels)
+            "grayscale": lambda x: cv2.cvtColor(cv2.cvtColor(x, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR),  # Grayscale
+            "black_and_white": self._to_black_and_white,  # Black and White
+            "red_filter": self._apply_red_filter,  # Red Filter
+            "invert": cv2.bitwise_not,  # Invert Colors
+            "noise": self._add_noise  # Add Noise
+        }
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._executor = None
+        self._cache = OrderedDict()  # (face hash, effect id) -> Future of the processed image
+        self._cache_lock = threading.Lock()
+        self.last_effect_ids = []
 
-    def generate_spectral_effects(self, face_image):
+    def generate_spectral_effects(self, face_image, count=3):
         """Generate multiple spectral effects on the face image for avatar selection."""
+        face_image, face_hash = self._prepare_face(face_image)
+        self.last_effect_ids = random.sample(EFFECT_IDS, count)
+        futures = [self._submit_effect(face_image, face_hash, effect_id) for effect_id in self.last_effect_ids]
+        return [future.result() for future in futures]
+
+    def prefetch_spectral_effects(self, face_image):
+        """Start computing every effect in the background so avatar selection opens instantly."""
+        face_image, face_hash = self._prepare_face(face_image)
+        for effect_id in EFFECT_IDS:
+            self._submit_effect(face_image, face_hash, effect_id)
+
+    def _prepare_face(self, face_image):
         if face_image is None or face_image.size == 0:
-            face_image = np.zeros((200, 200, 3), dtype=np.uint8)
-        
+            face_image = np.zeros((self.effect_size, self.effect_size, 3), dtype=np.uint8)
         # Resize the input image to a consistent size
-        face_image = cv2.resize(face_image, (200, 200))
-        
-        effects = [
-            lambda x: cv2.GaussianBlur(x, (15, 15), 0),  # 2D Convolution: Blur
-            lambda x: cv2.convertScaleAbs(x, alpha=1.2, beta=50),  # Brightness/Contrast
-            lambda x: cv2.Canny(cv2.cvtColor(x, cv2.COLOR_BGR2GRAY), 100, 200),  # Edge Detection (converted to 3 channels)
-            lambda x: cv2.cvtColor(cv2.cvtColor(x, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR),  # Grayscale
-            lambda x: self._to_black_and_white(x),  # Black and White
-            lambda x: self._apply_red_filter(x),  # Red Filter
-            lambda x: cv2.bitwise_not(x),  # Invert Colors
-            lambda x: self._add_noise(x)  # Add Noise
-        ]
-        processed_images = [effect(face_image.copy()) for effect in random.sample(effects, 3)]
+        face_image = cv2.resize(face_image, (self.effect_size, self.effect_size))
+        return face_image, hashlib.blake2b(face_image.tobytes(), digest_size=16).hexdigest()
+
+    def _submit_effect(self, face_image, face_hash, effect_id):
+        """Return a cached Future for (face, effect), scheduling the work on a miss."""
+        key = (face_hash, effect_id)
+        with self._cache_lock:
+            future = self._cache.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._cache.move_to_end(key)
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="spectral")
+            future = self._executor.submit(self._run_effect, effect_id, face_image)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return future
+
+    def _run_effect(self, effect_id, face_image):
+        img = self.effects[effect_id](face_image.copy())
         # Ensure all images have 3 channels and correct shape
-        return [cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if len(img.shape) == 2 else img for img in processed_images]
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if len(img.shape) == 2 else img
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def _to_black_and_white(self, image):
         """Convert image to black and white using thresholding."""
@@ -68,18 +119,25 @@ class ImageProcessing:
         x, y, w, h = bbox
         return x + w // 2, y + h // 2
 
-    def save_face(self, face_image, player_name):
-        """Save the captured face image with a timestamp."""
+    def save_face(self, face_image, player_name, prefetch=True):
+        """Queue the captured face for saving, optionally prefetching its effects once written."""
         save_dir = os.path.join("assets", "images")
-        os.makedirs(save_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         img_name = os.path.join(save_dir, f"{player_name}_{timestamp}.jpg")
-        cv2.imwrite(img_name, face_image)
+        shape = face_image.shape
+
+        def on_saved(handle):
+            get_face_catalog().add(player_name, handle.path, shape)
+            if not prefetch:
+                return
+            # Prefetch from the decoded JPEG so the cache key matches what the avatar screen reads back
+            self.prefetch_spectral_effects(cv2.imdecode(handle.encoded, cv2.IMREAD_COLOR))
+
+        return get_image_writer().submit(img_name, face_image, on_complete=on_saved)
 
     def save_avatar(self, avatar_image):
-        """Save the selected avatar image with a timestamp."""
+        """Queue the selected avatar image for saving with a timestamp."""
         save_dir = os.path.join("assets", "scary")
-        os.makedirs(save_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         img_name = os.path.join(save_dir, f"avatar_{timestamp}.jpg")
-        cv2.imwrite(img_name, avatar_image)
\ No newline at end of file
+        return get_image_writer().submit(img_name, avatar_image)
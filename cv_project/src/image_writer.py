@@ -0,0 +1,143 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+log = logging.getLogger(__name__)
+
+
+class WriteHandle:
+    """Completion handle for a queued image write."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ok = False
+        self.error = None
+        self.encoded = None  # encoded bytes, available to on_complete callbacks
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the file is on disk (or the write failed); returns True on success."""
+        self._done.wait(timeout)
+        return self.ok
+
+    def _resolve(self, error=None):
+        self.ok = error is None
+        self.error = error
+
+
+class ImageWriter:
+    """Encodes and writes images on a background thread.
+
+    The backlog is bounded: `submit` blocks once `max_pending` writes are queued.
+    Each file is written to a temporary name, fsynced and renamed into place, so
+    readers never see a partially written JPEG. Call `close` on exit to drain
+    the queue; the thread is a daemon only so a stuck disk cannot hang exit.
+    """
+
+    def __init__(self, max_pending=8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, image, on_complete=None):
+        """Queue `image` to be written to `path`; returns a WriteHandle."""
+        handle = WriteHandle(path)
+        with self._pending_lock:
+            self._pending.add(handle)
+        # Copy so the caller can keep reusing its frame buffer
+        self._queue.put((handle, image.copy(), on_complete))
+        return handle
+
+    def wait_all(self, timeout=None):
+        """Wait for every write submitted so far; returns True if they all succeeded."""
+        with self._pending_lock:
+            handles = list(self._pending)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = [handle.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+                   for handle in handles]
+        return all(results)
+
+    def close(self, timeout=10.0):
+        """Finish every queued write, then stop the thread; returns False if it did not stop in time."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.warning("⚠️ Image writer still busy after %ss, %s writes may be lost", timeout, self._queue.qsize())
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            handle, image, on_complete = item
+            try:
+                handle.encoded = self._write(handle.path, image)
+                handle._resolve()
+            except Exception as e:
+                log.error("❌ Failed to write %s: %s", handle.path, e)
+                handle._resolve(e)
+            # The outcome is settled before the callback runs, so a failing callback cannot turn a
+            # written file into a failed write; waiters are released after it so they see its effects
+            if on_complete is not None and handle.ok:
+                try:
+                    on_complete(handle)
+                except Exception as e:
+                    log.error("❌ Write callback for %s failed: %s", handle.path, e)
+            handle._done.set()
+            with self._pending_lock:
+                self._pending.discard(handle)
+            self._queue.task_done()
+
+    def _write(self, path, image):
+        ok, encoded = cv2.imencode(os.path.splitext(path)[1] or ".jpg", image)
+        if not ok:
+            raise ValueError("image encoding failed")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(encoded.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return encoded
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_image_writer():
+    """Return the process-wide ImageWriter, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ImageWriter()
+        return _writer
+
+
+def shutdown_image_writer(timeout=10.0):
+    """Drain and stop the process-wide writer, if one was started."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
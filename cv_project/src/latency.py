@@ -0,0 +1,296 @@
+"""End-to-end latency tracing, from the camera to the gesture on screen.
+
+Every hand-tracking result carries the perf_counter time its frame was
+captured (plus the driver's own timestamp where the backend reports one on
+the same clock) and the time inference finished. The tracker hands these to
+a LatencyTracer when the result is committed to the gesture smoother, and the
+game loop closes them when the next display flip presents it. Stages:
+
+    device→capture      driver timestamp to the frame reaching Python
+    capture→inference   waiting for and running the hand graph
+    inference→commit    classification, smoothing and the game loop's frame skip
+    commit→present      rendering until the next flip
+    capture→present     the whole path for one frame
+    switch→commit       first frame showing a new gesture to the smoother agreeing
+    switch→present      ... and that gesture reaching the screen
+
+A result is counted once; frames where the motion gate reused an earlier
+result add nothing. The calibrate command replaces the camera with a
+synthetic scene whose gesture changes at known instants, then measures
+glass-to-gesture latency (change instant to present) through the real
+smoother, frame skip and UI. Compare pipeline settings with it, e.g.:
+
+    python -m src.latency calibrate --windows 1 5 10 --frame-skip 1 2
+    python -m src.latency calibrate --inference-ms 30 --readout-ms 15 --gate
+"""
+import argparse
+import bisect
+import collections
+import itertools
+import os
+import time
+
+import cv2
+import numpy as np
+
+from src.hand_tracking import GESTURES, HandTracking
+from src.motion_gate import MotionGate
+from src.session_recorder import synthetic_hand
+
+STAGES = ("device→capture", "capture→inference", "inference→commit", "commit→present", "capture→present")
+CHANGE_STAGES = ("switch→commit", "switch→present")
+GLASS_STAGES = ("change→commit", "change→present")
+# Flat BGR scenes, different enough for the motion gate to notice every change
+SCENE_COLOURS = {"rock": (40, 60, 160), "paper": (200, 190, 170), "scissors": (60, 170, 60)}
+
+
+def percentiles(samples):
+    """Summary of a sequence of seconds in milliseconds: count, p50, p90, p99 and max."""
+    values = np.fromiter(samples, dtype=np.float64) * 1000
+    if not values.size:
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(values, (50, 90, 99))
+    return {"count": int(values.size), "p50": p50, "p90": p90, "p99": p99, "max": values.max()}
+
+
+def format_row(name, stats):
+    if not stats["count"]:
+        return f"{name:<18} no samples"
+    return (f"{name:<18} p50 {stats['p50']:7.1f}  p90 {stats['p90']:7.1f}  p99 {stats['p99']:7.1f}  "
+            f"max {stats['max']:7.1f} ms  (n={stats['count']})")
+
+
+class LatencyTracer:
+    """Collects per-stage latency samples for results committed by a hand tracker.
+
+    `commit` is called by the tracker once per detection, `present` by the
+    game loop right after each display flip. Samples are kept in bounded
+    deques, so a tracer can stay attached for a whole session.
+    """
+
+    def __init__(self, maxlen=10_000, clock=time.perf_counter):
+        self.clock = clock
+        self.maxlen = maxlen
+        self.reset()
+
+    def reset(self):
+        self.samples = {stage: collections.deque(maxlen=self.maxlen) for stage in STAGES + CHANGE_STAGES}
+        self._pending = []  # (device, captured, inferred, committed) awaiting the next present
+        self._last_captured = None
+        self._raw = self._switch = None  # newest raw gesture and the capture time it first appeared
+        self._change = None  # (switch, committed) of a gesture change awaiting the next present
+        self.gesture = None
+        self.last_change = None  # (gesture, commit time) of the newest smoothed gesture change
+        self.frames = self.changes = 0
+
+    def commit(self, captured, device, inferred, raw_gesture, gesture):
+        """Record the result a detection just committed; `gesture` is the smoothed one."""
+        now = self.clock()
+        if raw_gesture is not None and raw_gesture != self._raw:
+            self._raw, self._switch = raw_gesture, captured
+        if gesture != self.gesture:
+            if self.gesture is not None and gesture == self._raw and self._switch is not None:
+                self._change = (self._switch, now)
+            self.gesture = gesture
+            self.last_change = (gesture, now)
+        if captured is None or captured == self._last_captured:
+            return  # no fresh result, the previous one was reused
+        self._last_captured = captured
+        self._pending.append((device, captured, inferred, now))
+
+    def present(self):
+        """Close the trace of everything committed since the last present; call right after the flip."""
+        now = self.clock()
+        samples = self.samples
+        for device, captured, inferred, committed in self._pending:
+            if device is not None:
+                samples["device→capture"].append(captured - device)
+            if inferred is not None:
+                samples["capture→inference"].append(inferred - captured)
+                samples["inference→commit"].append(committed - inferred)
+            samples["commit→present"].append(now - committed)
+            samples["capture→present"].append(now - captured)
+        self.frames += len(self._pending)
+        self._pending.clear()
+        if self._change is not None:
+            switch, committed = self._change
+            samples["switch→commit"].append(committed - switch)
+            samples["switch→present"].append(now - switch)
+            self.changes += 1
+            self._change = None
+        return now
+
+    def report(self):
+        return {stage: percentiles(values) for stage, values in self.samples.items()}
+
+    def format_report(self):
+        """One line per stage that has samples."""
+        return [format_row(stage, stats) for stage, stats in self.report().items() if stats["count"]]
+
+
+class CalibrationHandTracking(HandTracking):
+    """A HandTracking whose camera is a synthetic scene with known gesture change instants.
+
+    Frames are exposed every 1/fps seconds and can be read `readout_ms` later,
+    like a sensor readout plus transfer. Reads return the newest readable
+    frame, or wait for the next one. Each frame's device timestamp is its
+    exposure instant. Inference sleeps `inference_ms` and returns landmarks
+    that classify as the scene's gesture. Smoothing, the motion gate and
+    classification are the real ones.
+    """
+
+    def __init__(self, schedule, fps=30, readout_ms=0.0, inference_ms=10.0, resolution=(320, 240),
+                 smoothing_window=10, motion_gate=None, seed=0):
+        self._init_state(resolution, smoothing_window=smoothing_window, motion_gate=motion_gate)
+        shape = (resolution[1], resolution[0], 3)
+        self._scenes = {gesture: np.full(shape, colour, dtype=np.uint8) for gesture, colour in SCENE_COLOURS.items()}
+        self._rng = np.random.default_rng(seed)
+        self.schedule = schedule  # [(perf_counter instant, gesture)], sorted; the first entry is the initial scene
+        self._instants = [t for t, _ in schedule]
+        self.period = 1.0 / fps
+        self.readout = readout_ms / 1000
+        self.inference_s = inference_ms / 1000
+        self.start = schedule[0][0]
+        self.scene = schedule[0][1]
+        self._next = 0
+
+    def gesture_at(self, instant):
+        return self.schedule[max(0, bisect.bisect_right(self._instants, instant) - 1)][1]
+
+    def capture_frame(self):
+        now = time.perf_counter()
+        index = max(self._next, int((now - self.readout - self.start) / self.period))
+        exposure = self.start + index * self.period
+        if exposure + self.readout > now:
+            time.sleep(exposure + self.readout - now)
+        self._next = index + 1
+        self.scene = self.gesture_at(exposure)
+        np.copyto(self._capture_buffer, self._scenes[self.scene])
+        self.last_capture_time = time.perf_counter()
+        self.last_device_time = exposure
+        self.frame = self._capture_buffer
+        cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+        self.flipped_frame = cv2.flip(self._rgb_buffer, 1, dst=self._flipped_buffer)
+        return True, self.frame
+
+    def _infer(self):
+        time.sleep(self.inference_s)
+        return [], synthetic_hand(self.scene, self._rng)
+
+    def set_max_hands(self, max_num_hands):
+        self.max_num_hands = max_num_hands
+        self._reset_players()
+
+
+def make_schedule(start, changes, hold, rng, lead_in=0.5):
+    """The initial scene plus `changes` changes to a different gesture, each held hold * U(0.75, 1.25) seconds."""
+    schedule, instant, gesture = [(start, "rock")], start + lead_in, "rock"
+    for _ in range(changes):
+        gesture = str(rng.choice([g for g in GESTURES if g != gesture]))
+        schedule.append((instant, gesture))
+        instant += hold * rng.uniform(0.75, 1.25)
+    return schedule, instant
+
+
+def calibrate(window=10, frame_skip=1, fps=30, changes=12, hold=1.0, inference_ms=10.0, readout_ms=0.0,
+              gate=False, seed=0, screen=None, ui=None):
+    """Play a synthetic change schedule through the detection loop; returns (glass, tracer, missed).
+
+    `glass` maps "change→commit" and "change→present" to percentile stats
+    measured from each true change instant. A change the smoother never
+    committed before the next one arrived counts as missed. The loop is
+    play_game's: render the status screen, flip, tick, then detect every
+    `frame_skip` frames.
+    """
+    import pygame
+    from src.settings import get_settings
+
+    rng = np.random.default_rng(seed)
+    settings = get_settings()
+    motion_gate = MotionGate(settings.motion_threshold or 4.0, settings.motion_max_interval) if gate else None
+    schedule, end = make_schedule(time.perf_counter() + 0.2, changes, hold, rng)
+    tracker = CalibrationHandTracking(schedule, fps, readout_ms, inference_ms, smoothing_window=window,
+                                      motion_gate=motion_gate, seed=seed)
+    tracer = tracker.latency = LatencyTracer()
+    glass = {stage: [] for stage in GLASS_STAGES}
+    clock = pygame.time.Clock()
+    upcoming = collections.deque(schedule[1:])
+    missed = 0
+    gesture = None
+    for frame_counter in itertools.count(1):
+        if time.perf_counter() > end:
+            break
+        pygame.event.pump()
+        if ui is not None:
+            ui.render_status(screen, "Calibrating...", tracker, gesture)
+        pygame.display.flip()
+        presented = tracer.present()
+        while upcoming and upcoming[0][0] <= presented:
+            instant, target = upcoming[0]
+            shown, committed = tracer.last_change or (None, 0.0)
+            if shown == target and committed >= instant:
+                glass["change→commit"].append(committed - instant)
+                glass["change→present"].append(presented - instant)
+            elif len(upcoming) > 1 and upcoming[1][0] <= presented:
+                missed += 1  # superseded before the smoother agreed
+            else:
+                break
+            upcoming.popleft()
+        clock.tick(fps)
+        if frame_counter % frame_skip == 0:
+            gesture, _ = tracker.detect_gesture("normal")
+    missed += len(upcoming)
+    return {stage: percentiles(values) for stage, values in glass.items()}, tracer, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure glass-to-gesture latency.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = commands.add_parser("calibrate", help="drive the detection loop from a synthetic scene")
+    calibrate_parser.add_argument("--windows", type=int, nargs="+", default=[10], help="smoothing windows to compare")
+    calibrate_parser.add_argument("--frame-skip", type=int, nargs="+", default=[1], help="frame skips to compare")
+    calibrate_parser.add_argument("--fps", type=int, default=30, help="camera and game loop rate")
+    calibrate_parser.add_argument("--changes", type=int, default=12, help="gesture changes per run")
+    calibrate_parser.add_argument("--hold", type=float, default=1.0, help="mean seconds each gesture is held")
+    calibrate_parser.add_argument("--inference-ms", type=float, default=10.0, help="simulated hand graph time")
+    calibrate_parser.add_argument("--readout-ms", type=float, default=0.0, help="simulated sensor readout delay")
+    calibrate_parser.add_argument("--gate", action="store_true", help="use the motion gate from the settings")
+    calibrate_parser.add_argument("--no-render", action="store_true", help="flip an empty screen instead of the UI")
+    calibrate_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    from src.settings import get_settings
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    ui = None
+    if not args.no_render:
+        from src.ui import UI
+
+        ui = UI(get_settings())
+    print(f"⏱️ Calibrating: {args.changes} changes every ~{args.hold:g}s at {args.fps} fps, "
+          f"inference {args.inference_ms:g} ms, readout {args.readout_ms:g} ms, gate {'on' if args.gate else 'off'}")
+    results = []
+    for window, frame_skip in itertools.product(args.windows, args.frame_skip):
+        glass, tracer, missed = calibrate(window, frame_skip, args.fps, args.changes, args.hold, args.inference_ms,
+                                          args.readout_ms, args.gate, args.seed, screen, ui)
+        print(f"\nwindow {window}, frame skip {frame_skip}: {missed}/{args.changes} changes missed")
+        for stage, stats in glass.items():
+            print(f"  {format_row(stage, stats)}")
+        for line in tracer.format_report():
+            print(f"  {line}")
+        results.append((window, frame_skip, glass["change→present"], missed))
+    if len(results) > 1:
+        print("\nGlass to gesture (change→present):")
+        for window, frame_skip, stats, missed in results:
+            median = f"{stats['p50']:7.1f} ms p50, {stats['p90']:7.1f} ms p90" if stats["count"] else "no samples"
+            print(f"  window {window:>2}, skip {frame_skip}: {median}, {missed} missed")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
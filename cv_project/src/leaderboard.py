@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join("assets", "leaderboard.db")
+LEGACY_JSON_PATH = os.path.join("assets", "leaderboard.json")
+
+
+class LeaderboardStore:
+    """Transactional leaderboard backed by SQLite with an index on score."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        # WAL keeps readers off the writer and survives power loss mid-commit
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        with self._transaction() as cur:
+            cur.execute("CREATE TABLE IF NOT EXISTS scores (player TEXT PRIMARY KEY, score INTEGER NOT NULL)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_scores_score ON scores (score DESC, player)")
+            cur.execute("CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, mtime REAL NOT NULL)")
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            self.import_json(legacy_json_path)
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def record_score(self, player_name, score):
+        """Keep the best score per player; one atomic upsert per game."""
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT INTO scores (player, score) VALUES (?, ?) "
+                "ON CONFLICT(player) DO UPDATE SET score = MAX(score, excluded.score)",
+                (player_name, int(score)),
+            )
+
+    def top(self, k=5):
+        """Return the top-k (player, score) pairs, walking the score index."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT player, score FROM scores ORDER BY score DESC, player LIMIT ?", (k,)
+            ).fetchall()
+
+    def rank(self, player_name):
+        """Return the 1-based rank of a player, or None if they have no score."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 + (SELECT COUNT(*) FROM scores WHERE score > s.score) FROM scores s WHERE s.player = ?",
+                (player_name,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def score(self, player_name):
+        with self._lock:
+            row = self._conn.execute("SELECT score FROM scores WHERE player = ?", (player_name,)).fetchone()
+        return row[0] if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def import_json(self, json_path):
+        """Merge a legacy {player: score} JSON file once per modification time."""
+        mtime = os.path.getmtime(json_path)
+        key = os.path.abspath(json_path)
+        with self._lock:
+            row = self._conn.execute("SELECT mtime FROM imports WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == mtime:
+            return 0
+        try:
+            with open(json_path, "r") as f:
+                leaderboard = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("⚠️ Could not import %s: %s", json_path, e)
+            return 0
+        if not isinstance(leaderboard, dict):
+            log.warning("⚠️ Could not import %s: expected a {player: score} object", json_path)
+            return 0
+        rows = []
+        for player, score in leaderboard.items():
+            try:
+                value = int(score)
+                if not -2**63 <= value < 2**63:  # SQLite INTEGER range
+                    raise OverflowError(value)
+            except (TypeError, ValueError, OverflowError):
+                log.warning("⚠️ Skipping leaderboard entry %r in %s: invalid score %r", player, json_path, score)
+                continue
+            rows.append((str(player), value))
+        with self._transaction() as cur:
+            cur.executemany(
+                "INSERT INTO scores (player, score) VALUES (?, ?) "
+                "ON CONFLICT(player) DO UPDATE SET score = MAX(score, excluded.score)",
+                rows,
+            )
+            cur.execute("INSERT OR REPLACE INTO imports (path, mtime) VALUES (?, ?)", (key, mtime))
+        log.info("✅ Imported %s leaderboard entries from %s", len(rows), json_path)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """Serialises access to the connection and wraps it in BEGIN IMMEDIATE/COMMIT."""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+        return False
@@ -0,0 +1,178 @@
+"""Spectral effects fast enough to run on the live player face every frame.
+
+Pixel-wise effects (brightness, invert, red filter, black and white) are
+compiled into 256-entry per-channel lookup tables. Consecutive table effects
+in a chain are fused into one table, so a chain costs a single cv2.LUT pass
+over the small face buffer. Grayscale is a cross-channel step between table
+passes. Spatial effects (blur, edges, noise) cost far more, so a chain that
+contains one is refreshed only every `spatial_interval` frames. The last
+output is shown in between. The interval grows with the measured refresh
+cost, which keeps the amortised per-frame cost within the budget.
+
+The tables reproduce ImageProcessing's effects of the same name, so the live
+face matches the avatar the player picked.
+"""
+import collections
+import math
+import time
+
+import cv2
+import numpy as np
+
+FACE_SIZE = (100, 100)
+IDENTITY = np.arange(256, dtype=np.uint8)
+MAX_SPATIAL_INTERVAL = 16
+NOISE_TILES = 8
+
+
+def _channel_lut(b, g, r):
+    """Stack three 256-entry tables (BGR order) into the (256, 1, 3) shape cv2.LUT takes for colour images."""
+    return np.stack([b, g, r], axis=-1).reshape(256, 1, 3).astype(np.uint8)
+
+
+def _uniform_lut(table):
+    return _channel_lut(table, table, table)
+
+
+BRIGHTNESS = _uniform_lut(np.clip(np.arange(256) * 1.2 + 50, 0, 255).round())  # == convertScaleAbs(x, 1.2, 50)
+INVERT = _uniform_lut(255 - IDENTITY)
+RED_FILTER = _channel_lut(np.zeros(256), np.zeros(256), IDENTITY)
+THRESHOLD = _uniform_lut(np.where(IDENTITY > 128, 255, 0))
+
+GRAY = "gray"
+# Pixel-wise effects as a list of steps: a LUT array or GRAY
+PIXEL_EFFECTS = {
+    "brightness": [BRIGHTNESS],
+    "invert": [INVERT],
+    "red_filter": [RED_FILTER],
+    "grayscale": [GRAY],
+    "black_and_white": [GRAY, THRESHOLD],
+}
+
+
+def _blur(src, dst, state):
+    # ImageProcessing blurs its 200 px faces with a 15 px kernel; scale it to the live buffer
+    k = max(3, (15 * src.shape[1] // 200) | 1)
+    cv2.GaussianBlur(src, (k, k), 0, dst=dst)
+
+
+def _edges(src, dst, state):
+    gray = state.setdefault("gray", np.empty(src.shape[:2], dtype=np.uint8))
+    edges = state.setdefault("edges", np.empty_like(gray))
+    cv2.cvtColor(src, state["to_gray"], dst=gray)
+    cv2.Canny(gray, 100, 200, edges=edges)
+    cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=dst)
+
+
+def _noise(src, dst, state):
+    bank = state.get("noise")
+    if bank is None:
+        # Same distribution (and uint8 wrap-around) as ImageProcessing._add_noise, drawn once
+        bank = state["noise"] = np.random.normal(0, 25, (NOISE_TILES,) + src.shape).astype(np.uint8)
+    state["noise_index"] = (state.get("noise_index", -1) + 1) % NOISE_TILES
+    cv2.add(src, bank[state["noise_index"]], dst=dst)
+
+
+SPATIAL_EFFECTS = {"blur": _blur, "edges": _edges, "noise": _noise}
+LIVE_EFFECT_IDS = list(PIXEL_EFFECTS) + list(SPATIAL_EFFECTS)
+
+
+def compile_chain(effect_ids, channel_order="BGR"):
+    """Turn effect ids into steps, fusing neighbouring LUTs: [("lut", table) | ("gray",) | ("spatial", fn)]."""
+    steps = []
+    for effect_id in effect_ids:
+        if effect_id in SPATIAL_EFFECTS:
+            steps.append(("spatial", SPATIAL_EFFECTS[effect_id]))
+            continue
+        if effect_id not in PIXEL_EFFECTS:
+            raise ValueError(f"unknown effect: {effect_id}")
+        for step in PIXEL_EFFECTS[effect_id]:
+            if step is GRAY:
+                steps.append(("gray",))
+                continue
+            table = step if channel_order == "BGR" else step[:, :, ::-1]
+            if steps and steps[-1][0] == "lut":
+                # Applying a then b per channel is one lookup in b[a]
+                previous = steps[-1][1]
+                table = np.take_along_axis(table, previous.astype(np.intp), axis=0)
+                steps[-1] = ("lut", np.ascontiguousarray(table))
+            else:
+                steps.append(("lut", np.ascontiguousarray(table)))
+    return steps
+
+
+class LiveEffect:
+    """Applies a compiled effect chain to a face crop within a per-frame time budget.
+
+    `apply` resizes the crop into a fixed buffer and returns the processed
+    buffer. The buffer is reused, so copy it to keep it. The chain runs in
+    `channel_order` ("RGB" for the mirrored display frames).
+    """
+
+    def __init__(self, effects, size=FACE_SIZE, channel_order="RGB", spatial_interval=3, budget_ms=0.5):
+        self.effect_ids = [effects] if isinstance(effects, str) else list(effects)
+        self.size = size
+        self.steps = compile_chain(self.effect_ids, channel_order)
+        self.spatial = any(step[0] == "spatial" for step in self.steps)
+        self.spatial_interval = self.min_interval = spatial_interval
+        self.budget_ms = budget_ms
+        self._refresh_ms = None  # smoothed cost of one full pass
+        shape = (size[1], size[0], 3)
+        self._input = np.empty(shape, dtype=np.uint8)
+        self._buffers = [np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=np.uint8)]
+        self._gray = np.empty(shape[:2], dtype=np.uint8)
+        self._state = {"to_gray": cv2.COLOR_RGB2GRAY if channel_order == "RGB" else cv2.COLOR_BGR2GRAY}
+        self._output = None
+        self._frame = 0
+        self.timings_ms = collections.deque(maxlen=600)
+        self.refreshes = 0
+
+    def apply(self, image):
+        start = time.perf_counter()
+        self._frame += 1
+        if self._output is not None and self.spatial and self._frame % self.spatial_interval:
+            self.timings_ms.append((time.perf_counter() - start) * 1000)
+            return self._output
+        # Linear is several times cheaper than INTER_AREA at this size and looks the same at 100 px
+        cv2.resize(image, self.size, dst=self._input, interpolation=cv2.INTER_LINEAR)
+        self._output = self._run(self._input)
+        self.refreshes += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        self.timings_ms.append(elapsed)
+        if self.spatial:
+            self._refresh_ms = elapsed if self._refresh_ms is None else 0.8 * self._refresh_ms + 0.2 * elapsed
+            needed = math.ceil(self._refresh_ms / self.budget_ms)
+            self.spatial_interval = min(max(self.min_interval, needed), MAX_SPATIAL_INTERVAL)
+        return self._output
+
+    def _run(self, src):
+        buffers, target = self._buffers, 0
+        for step in self.steps:
+            dst = buffers[target]
+            if step[0] == "lut":
+                cv2.LUT(src, step[1], dst=dst)
+            elif step[0] == "gray":
+                cv2.cvtColor(src, self._state["to_gray"], dst=self._gray)
+                cv2.cvtColor(self._gray, cv2.COLOR_GRAY2BGR, dst=dst)
+            else:
+                step[1](src, dst, self._state)
+            src, target = dst, 1 - target
+        return src
+
+    def summary(self):
+        if not self.timings_ms:
+            return f"{'+'.join(self.effect_ids)}: no frames"
+        timings = np.fromiter(self.timings_ms, dtype=np.float64)
+        rate = f", refreshed every {self.spatial_interval} frames" if self.spatial else ""
+        return (f"{'+'.join(self.effect_ids)}: {timings.mean():.3f} ms mean, "
+                f"{np.percentile(timings, 99):.3f} ms p99 (budget {self.budget_ms} ms){rate}")
+
+
+def create_live_effect(effects, **kwargs):
+    """A LiveEffect for an effect id (or chain), or None if there is nothing live-capable to apply."""
+    if not effects:
+        return None
+    ids = [effects] if isinstance(effects, str) else list(effects)
+    if any(effect_id not in LIVE_EFFECT_IDS for effect_id in ids):
+        return None
+    return LiveEffect(ids, **kwargs)
@@ -1,45 +1,47 @@
+import logging
 import pygame
-import os
-import numpy as np
-import cv2
-import traceback
 import time
-import json
 
-from src.hand_tracking import HandTracking
-from src.image_processing import ImageProcessing
+from src.audio import CHEER_SOUND, CLICK_SOUND, COUNTDOWN_TICK, GAMEPLAY_MUSIC, LAUGH_SOUND, MENU_MUSIC
+from src.game_log import setup_logging
 from src.game_logic import GameLogic
+from src.settings import get_settings
 from src.ui import UI
-from src.object_detection import ObjectDetector
-from src.player_registration import run_player_registration
-from src.avatar_selection import run_avatar_selection
+from src.startup import PROCESS_START, Warmup, log_timing, timed_import
+
+log = logging.getLogger(__name__)
+
+VERSUS_NAMES = ("P1", "P2")
 
 def show_mode_selection(screen, ui):
     """Display mode selection UI with enhanced visuals."""
     modes = ui.get_modes()
     buttons = [(mode, 300, 200 + i * 100) for i, mode in enumerate(modes)]
-    print(f"✅ Displaying mode selection with buttons: {buttons}")
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                print("⚠️ Mode selection: Quit event detected")
-                return "quit"
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for text, x, y in buttons:
-                    button = ui._draw_animated_button(screen, text, x, y)
-                    if button.collidepoint(event.pos):
-                        ui.click_sound.play()
-                        print(f"✅ Mode selected: {text.lower()}")
-                        return text.lower()
-        try:
-            screen.blit(pygame.image.load(os.path.join("assets", "sprites", "background.png")), (0, 0))
-        except pygame.error as e:
-            print(f"❌ Failed to load background.png: {e}")
-            screen.fill((0, 0, 50))
+    log.info("✅ Displaying mode selection with buttons: %s", buttons)
+
+    def draw(animating):
+        screen.blit(ui.background_img, (0, 0))
         for text, x, y in buttons:
-            ui._draw_animated_button(screen, text, x, y, color=(255, 215, 0) if text == "Impossible" else (255, 255, 255))
-        pygame.display.flip()
-        pygame.time.delay(10)
+            ui._draw_animated_button(screen, text, x, y, color=(255, 215, 0) if text == "Impossible" else (255, 255, 255), animate=animating)
+
+    def handle_event(event):
+        if event.type == pygame.QUIT:
+            log.warning("⚠️ Mode selection: Quit event detected")
+            return "quit"
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for text, x, y in buttons:
+                if ui.button_img.get_rect(center=(x, y)).collidepoint(event.pos):
+                    ui.audio.play_effect(CLICK_SOUND)
+                    log.info("✅ Mode selected: %s", text.lower())
+                    return text.lower()
+
+    return ui.menu_loop.run(draw, handle_event)
+
+def _load_module(module_name):
+    """Import a screen module and load its models."""
+    module = timed_import(module_name)
+    module.load_models()
+    return module
 
 def fade_transition(screen, direction="in"):
     """Add a fade-in/fade-out transition."""
@@ -51,115 +53,152 @@ def fade_transition(screen, direction="in"):
         pygame.display.flip()
         pygame.time.delay(20)
 
-def main():
+def _present(hand_tracking):
+    """Flip the display, closing the latency trace of every result committed since the last flip."""
+    pygame.display.flip()
+    if hand_tracking.latency is not None:
+        hand_tracking.latency.present()
+
+def main(pipeline="inprocess", record=False, trace_latency=False):
     pygame.init()
     clock = pygame.time.Clock()
     screen = pygame.display.set_mode((800, 600))
     pygame.display.set_caption("AR Spectral Showdown")
 
-    hand_tracking = HandTracking()
-    image_processing = ImageProcessing()
+    start = time.perf_counter()
+    settings = get_settings()
+    log.info("✅ Performance profile: %s", settings.profile)
     game_logic = GameLogic()
-    ui = UI()
-    object_detector = ObjectDetector()
+    ui = UI(settings)
+    log_timing("menu assets", start)
 
-    leaderboard_path = os.path.join("assets", "leaderboard.json")
-    if not os.path.exists(leaderboard_path):
-        with open(leaderboard_path, "w") as f:
-            json.dump({}, f)
-
-    try:
-        pygame.mixer.music.load(os.path.join("assets", "sounds", "music.mp3"))
-        pygame.mixer.music.play(-1)
-        print("✅ Music loaded and playing")
-    except pygame.error as e:
-        print(f"❌ Failed to load music: {e}")
-        pygame.mixer.music = None
+    # Everything the menu does not need loads in the background, in the order the start sequence needs it
+    warmup = Warmup()
+    # Menu music starts as soon as it is decoded rather than holding up the first menu frame
+    warmup.add("menu_music", lambda: ui.audio.play_music(MENU_MUSIC))
+    warmup.add("registration", lambda: _load_module("src.player_registration"))
+    # Registration and avatar selection already point with the shared tracker, so the camera opens early
+    warmup.add("hand_tracking", lambda: timed_import("src.frame_transport").create_hand_tracking(pipeline, settings))
+    warmup.add("image_processing", lambda: timed_import("src.image_processing").ImageProcessing(
+        max_workers=settings.effect_workers, effect_size=settings.effect_size))
+    warmup.add("avatar_selection", lambda: _load_module("src.avatar_selection"))
+    warmup.add("object_detector", lambda: timed_import("src.object_detection").ObjectDetector())
+    warmup.add("ui_assets", ui.load_deferred_assets)
+    warmup.add("speech", lambda: (timed_import("gtts"), timed_import("playsound")))
+    warmup.start()
 
+    log_timing("time to menu", PROCESS_START)
     while True:
         current_state = ui.show_main_menu(screen)
-        print(f"✅ Menu action: {current_state}")
+        log.info("✅ Menu action: %s", current_state)
         if current_state == "start":
             try:
-                player_name, face_coordinates = run_player_registration()
-                print(f"✅ Player registration: {player_name}, Coordinates: {face_coordinates}")
-                if player_name and face_coordinates:
-                    frame = hand_tracking.get_frame()
-                    if frame is not None:
-                        try:
-                            face_image = frame[face_coordinates[1]:face_coordinates[1]+face_coordinates[3], face_coordinates[0]:face_coordinates[0]+face_coordinates[2]]
-                            image_processing.save_face(face_image, player_name)
-                            print("✅ Face image saved")
-                        except Exception as e:
-                            print(f"⚠️ Warning: Could not extract face image: {e}, proceeding without saving")
-                    else:
-                        print("⚠️ Warning: No frame available for face extraction, proceeding without saving")
-
-                    time.sleep(1)
+                hand_tracking = warmup.get("hand_tracking")
+                if trace_latency and hand_tracking.latency is None:
+                    hand_tracking.latency = timed_import("src.latency").LatencyTracer()
+                session = warmup.get("registration").run_player_registration(screen, ui, hand_tracking)
+                if session == "quit":
+                    current_state = "quit"
+                elif session is not None:
+                    image_processing = warmup.get("image_processing")
+                    log.info("✅ Player registration: %s, Coordinates: %s", session.player_name, session.face_coordinates)
+                    # Effects start from the in-memory crop; saving to disk is a background side effect
+                    image_processing.prefetch_spectral_effects(session.face_image)
+                    session.persist_face(image_processing)
+
                     max_retries = 2
+                    ai_avatar = None
                     for attempt in range(max_retries):
-                        player_name, ai_avatar = run_avatar_selection(image_processor=image_processing)
-                        print(f"✅ Avatar selection: {player_name}, Avatar: {ai_avatar is not None}")
+                        selection = warmup.get("avatar_selection").run_avatar_selection(screen, ui, hand_tracking, image_processing, session)
+                        if selection == "quit":
+                            current_state = "quit"
+                            break
+                        player_name, ai_avatar = selection
+                        log.info("✅ Avatar selection: %s, Avatar: %s", player_name, ai_avatar is not None)
                         if ai_avatar is not None:
                             mode = show_mode_selection(screen, ui)
-                            print(f"✅ Mode selection returned: {mode}")
+                            log.info("✅ Mode selection returned: %s", mode)
                             if mode and mode != "quit":
                                 fade_transition(screen, "out")
-                                play_game(screen, player_name, ai_avatar, mode, hand_tracking, game_logic, ui, object_detector, clock, face_coordinates)
-                                fade_transition(screen, "in")
-                                ui.show_game_over(screen, game_logic.get_scores(), player_name, game_logic.get_game_duration())
-                                ui.update_leaderboard(player_name, game_logic.get_scores())
-                                print("✅ Game over and leaderboard updated")
+                                object_detector = warmup.get("object_detector")
+                                recorder = _start_recording(player_name, mode, hand_tracking, game_logic, settings) if record else None
+                                try:
+                                    if mode == "versus":
+                                        play_versus_game(screen, session, hand_tracking, game_logic, ui, clock)
+                                        fade_transition(screen, "in")
+                                        ui.show_game_over(screen, game_logic.get_scores(), player_name, game_logic.get_game_duration(), labels=VERSUS_NAMES)
+                                        log.info("✅ Versus game over")
+                                    else:
+                                        play_game(screen, session, mode, hand_tracking, game_logic, ui, object_detector, clock)
+                                        if hand_tracking.motion_gate is not None:
+                                            log.info("✅ Motion gate: %s", hand_tracking.motion_gate.summary())
+                                        fade_transition(screen, "in")
+                                        ui.show_game_over(screen, game_logic.get_scores(), player_name, game_logic.get_game_duration())
+                                        ui.update_leaderboard(player_name, game_logic.get_scores())
+                                        log.info("✅ Game over and leaderboard updated")
+                                finally:
+                                    _stop_recording(recorder, hand_tracking, game_logic)
+                                    _report_latency(hand_tracking)
                             break
                         else:
-                            print(f"❌ Avatar selection failed, retrying (attempt {attempt + 1}/{max_retries})...")
-                            time.sleep(1)
-                    if ai_avatar is None:
-                        print("❌ Avatar selection failed after all retries, returning to main menu")
+                            log.error("❌ Avatar selection failed, retrying (attempt %s/%s)...", attempt + 1, max_retries)
+                    if ai_avatar is None and current_state != "quit":
+                        log.error("❌ Avatar selection failed after all retries, returning to main menu")
                 else:
-                    print("❌ Player registration or face detection failed")
+                    log.error("❌ Player registration or face detection failed")
             except Exception as e:
-                print(f"❌ Error in start sequence: {e}")
-                project_root = os.path.dirname(os.path.abspath(__file__))
-                error_log_path = os.path.join(project_root, "error_log.txt")
-                with open(error_log_path, "a") as f:
-                    f.write(f"Error in start sequence: {e}\n{traceback.format_exc()}\n")
+                log.exception("❌ Error in start sequence: %s", e)
         elif current_state == "leaderboard":
             ui.show_leaderboard(screen)
-            print("✅ Leaderboard displayed")
-        elif current_state == "quit":
-            print("✅ Quitting application")
+            log.info("✅ Leaderboard displayed")
+        if current_state == "quit":
+            log.info("✅ Quitting application")
             break
-        clock.tick(60)
+        clock.tick(settings.target_fps)
 
     pygame.quit()
 
-def play_game(screen, player_name, ai_avatar, mode, hand_tracking, game_logic, ui, object_detector, clock, face_coordinates):
+def _start_recording(player_name, mode, hand_tracking, game_logic, settings):
+    """Attach a SessionRecorder to the tracker and game logic for one game."""
+    from src.session_recorder import SessionRecorder, new_recording_path
+
+    metadata = {"player": player_name, "mode": mode, "resolution": list(hand_tracking.resolution),
+                "profile": settings.profile}
+    recorder = SessionRecorder(new_recording_path(player_name), metadata)
+    hand_tracking.recorder = game_logic.recorder = recorder
+    return recorder
+
+def _stop_recording(recorder, hand_tracking, game_logic):
+    if recorder is None:
+        return
+    hand_tracking.recorder = game_logic.recorder = None
+    recorder.close()
+
+def _report_latency(hand_tracking):
+    """Log one game's latency distributions and start the next game from a clean trace."""
+    if hand_tracking.latency is None:
+        return
+    for line in hand_tracking.latency.format_report():
+        log.info("⏱️ Latency %s", line)
+    hand_tracking.latency.reset()
+
+def play_game(screen, session, mode, hand_tracking, game_logic, ui, object_detector, clock):
+    from src.live_effects import create_live_effect  # vision modules load after the menu is up
+
+    ai_avatar = session.avatar
+    face_effect = create_live_effect(session.avatar_effect)
     game_logic.initialize_game(mode)
     particles = []
-    print(f"✅ Starting game with mode: {mode}")
-    frame_skip = 3 if mode == "easy" or mode == "impossible" else 5  # Increase frame_skip for Normal mode
+    log.info("✅ Starting game with mode: %s", mode)
+    frame_skip = ui.settings.frame_skip_for(mode)
+    fps = ui.settings.target_fps
     frame_counter = 0
     round_active = False
     round_number = 0
 
-    # Load gameplay music with fallback
-    gameplay_music_loaded = False
-    try:
-        pygame.mixer.music.load(os.path.join("assets", "sounds", "gameplay_music.mp3"))
-        pygame.mixer.music.play(-1)
-        gameplay_music_loaded = True
-        print("✅ Gameplay music loaded and playing")
-    except pygame.error as e:
-        print(f"⚠️ Failed to load gameplay_music.mp3: {e}, continuing without music")
-
-    # Load countdown sound with fallback
-    countdown_sound = None
-    try:
-        countdown_sound = pygame.mixer.Sound(os.path.join("assets", "sounds", "countdown_tick.wav"))
-        print("✅ Countdown sound loaded")
-    except pygame.error as e:
-        print(f"⚠️ Failed to load countdown_tick.wav: {e}, continuing without sound")
+    # Tracks were decoded during warm-up, so this is a crossfade rather than a reload
+    ui.audio.play_music(GAMEPLAY_MUSIC)
+    countdown_second = None
 
     while True:
         try:
@@ -178,54 +217,58 @@ def play_game(screen, player_name, ai_avatar, mode, hand_tracking, game_logic, u
 
             if current_state == "detection":
                 ui.render_status(screen, "Detecting Hand...", hand_tracking, None)
-                pygame.display.flip()
-                clock.tick(60)
+                _present(hand_tracking)
+                clock.tick(fps)
                 if frame_counter % frame_skip == 0:
                     gesture, _ = hand_tracking.detect_gesture(mode)
                     if gesture != "rock" and gesture != "unknown":
                         input_start = pygame.time.get_ticks()
                         current_state = "input"
-                        print(f"✅ Hand detected, starting input phase: {gesture}")
+                        log.info("✅ Hand detected, starting input phase: %s", gesture)
                 if pygame.time.get_ticks() - detection_start > 5000:
                     input_start = pygame.time.get_ticks()
                     current_state = "input"
-                    print("⚠️ Detection timeout, proceeding to input phase")
+                    log.warning("⚠️ Detection timeout, proceeding to input phase")
 
             elif current_state == "input":
                 elapsed_time = (pygame.time.get_ticks() - input_start) // 1000
                 remaining_time = max(0, 3 - elapsed_time)
+                if remaining_time != countdown_second:
+                    countdown_second = remaining_time
+                    ui.audio.play_effect(COUNTDOWN_TICK)
                 ui.render_status(screen, f"Choose Move... ({remaining_time}s)", hand_tracking, gesture)
-                pygame.display.flip()
-                clock.tick(60)
+                _present(hand_tracking)
+                clock.tick(fps)
                 if frame_counter % frame_skip == 0:
                     gesture, _ = hand_tracking.detect_gesture(mode)
                 if elapsed_time >= 3:
                     ai_start = pygame.time.get_ticks()
+                    countdown_second = None
                     current_state = "ai_response"
-                    print(f"✅ Input phase ended, gesture: {gesture}")
+                    log.info("✅ Input phase ended, gesture: %s", gesture)
 
             elif current_state == "ai_response":
                 ui.render_status(screen, "AI Thinking...", hand_tracking, gesture)
-                pygame.display.flip()
-                clock.tick(60)
+                _present(hand_tracking)
+                clock.tick(fps)
                 if frame_counter % frame_skip == 0:
                     ai_move = game_logic.get_ai_move(gesture, mode)
-                    print(f"✅ AI Move: {ai_move}")
+                    log.info("✅ AI Move: %s", ai_move)
                     outcome = game_logic.evaluate_round(gesture, ai_move)
                     game_logic.update_scores(outcome, gesture, [], [])
                     outcome_start = pygame.time.get_ticks()
                     current_state = "outcome"
                     particles.extend(ui.create_particles(outcome, screen))
                     if outcome == "Win":
-                        ui.cheer_sound.play()
+                        ui.audio.play_effect(CHEER_SOUND)
                     elif outcome == "Lose":
-                        ui.laugh_sound.play()
+                        ui.audio.play_effect(LAUGH_SOUND)
 
             elif current_state == "outcome":
-                ui.render_game_state(screen, gesture, ai_move, outcome, ai_avatar, hand_tracking, game_logic, particles, mode, [], [], object_detector, face_coordinates)
+                ui.render_game_state(screen, gesture, ai_move, outcome, ai_avatar, hand_tracking, game_logic, particles, mode, [], [], object_detector, session.face_coordinates, player_face=session.face_image, face_effect=face_effect)
                 if pygame.time.get_ticks() - outcome_start < 2000:
-                    pygame.display.flip()
-                    clock.tick(60)
+                    _present(hand_tracking)
+                    clock.tick(fps)
                 else:
                     ui.show_round_result(screen, outcome, game_logic.get_scores())
                     pygame.display.flip()
@@ -241,22 +284,81 @@ def play_game(screen, player_name, ai_avatar, mode, hand_tracking, game_logic, u
             # Check for 5 wins
             scores = game_logic.get_scores()
             if scores[0] >= 5 or scores[1] >= 5:
-                print("✅ Game over after 5 wins reached")
+                log.info("✅ Game over after 5 wins reached")
                 break
         except Exception as e:
-            print(f"❌ Error in game loop: {e}")
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "error_log.txt"), "a") as f:
-                f.write(f"Error in game loop: {e}\n{traceback.format_exc()}\n")
+            log.exception("❌ Error in game loop: %s", e)
             break
 
-    # Stop gameplay music and reload menu music
-    if gameplay_music_loaded:
-        try:
-            pygame.mixer.music.load(os.path.join("assets", "sounds", "music.mp3"))
-            pygame.mixer.music.play(-1)
-            print("✅ Menu music reloaded")
-        except pygame.error as e:
-            print(f"❌ Failed to reload menu music: {e}")
+    if face_effect is not None:
+        log.info("✅ Live face effect: %s", face_effect.summary())
+    ui.audio.play_music(MENU_MUSIC)
+
+def _quit_requested():
+    """Drain pending events so the window stays responsive; True if it was closed."""
+    return any(event.type == pygame.QUIT for event in pygame.event.get())
+
+def play_versus_game(screen, session, hand_tracking, game_logic, ui, clock):
+    """Two players on one camera: left half of the mirrored image is P1, right half P2."""
+    game_logic.initialize_game("versus")
+    fps = min(30, ui.settings.target_fps)
+    hand_tracking.set_max_hands(2)
+    particles = []
+    round_number = 0
+    log.info("✅ Starting versus game")
+    try:
+        while True:
+            round_number += 1
+            ui.start_round(screen, round_number)
+            input_start = pygame.time.get_ticks()
+            gestures, seen = ["rock", "rock"], [False, False]
+            # Both players show their move during a 3 second countdown
+            while pygame.time.get_ticks() - input_start < 3000:
+                if _quit_requested():
+                    return
+                gestures, seen = hand_tracking.detect_gestures()
+                remaining_time = 3 - (pygame.time.get_ticks() - input_start) // 1000
+                ui.render_versus_state(screen, gestures, seen, None, hand_tracking, game_logic, particles, VERSUS_NAMES)
+                countdown = ui.large_font.render(f"{remaining_time}", True, (255, 215, 0))
+                screen.blit(countdown, (400 - countdown.get_width() // 2, 300))
+                _present(hand_tracking)
+                clock.tick(fps)
+
+            outcome = game_logic.evaluate_round(gestures[0], gestures[1])
+            game_logic.update_versus_scores(outcome)
+            if outcome != "Draw":
+                particles.extend(ui.create_particles("Win", screen))
+                ui.audio.play_effect(CHEER_SOUND)
+            outcome_start = pygame.time.get_ticks()
+            while pygame.time.get_ticks() - outcome_start < 2000:
+                if _quit_requested():
+                    return
+                for particle in particles[:]:
+                    particle.update()
+                    if not particle.alive():
+                        particles.remove(particle)
+                ui.render_versus_state(screen, gestures, seen, outcome, hand_tracking, game_logic, particles, VERSUS_NAMES)
+                pygame.display.flip()
+                clock.tick(fps)
+            ui.show_round_result(screen, outcome, game_logic.get_scores(), labels=VERSUS_NAMES)
+            pygame.display.flip()
+            # Hold the result for 2 s like single player, still answering the window manager
+            result_start = pygame.time.get_ticks()
+            while pygame.time.get_ticks() - result_start < 2000:
+                if _quit_requested():
+                    return
+                clock.tick(fps)
+
+            scores = game_logic.get_scores()
+            if scores[0] >= 5 or scores[1] >= 5:
+                log.info("✅ Versus game over after 5 wins reached")
+                break
+    except Exception as e:
+        log.exception("❌ Error in versus game loop: %s", e)
+    finally:
+        hand_tracking.set_max_hands(1)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    setup_logging()
+    main()
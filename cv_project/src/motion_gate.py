@@ -0,0 +1,58 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame changed enough to be worth running hand inference on.
+
+    Each frame is shrunk to a tiny grayscale thumbnail and compared with the
+    thumbnail of the last frame that was inferred. Below `threshold` (mean
+    absolute difference in gray levels) the caller reuses its previous
+    result. Inference is forced at least every `max_interval` seconds so a
+    slow drift is never missed. A threshold of 0 disables gating.
+    """
+
+    def __init__(self, threshold=4.0, max_interval=0.5, size=(32, 24), clock=time.monotonic):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.size = size
+        self.clock = clock
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._reference = np.empty_like(self._gray)
+        self._diff = np.empty_like(self._gray)
+        self._has_reference = False
+        self._last_inference = 0.0
+        self.frames = 0
+        self.inferences = 0
+        self.last_change = 0.0
+
+    def should_infer(self, frame):
+        self.frames += 1
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        now = self.clock()
+        if self._has_reference:
+            cv2.absdiff(self._gray, self._reference, dst=self._diff)
+            self.last_change = float(self._diff.mean())
+            if self.last_change < self.threshold and now - self._last_inference < self.max_interval:
+                return False
+        np.copyto(self._reference, self._gray)
+        self._has_reference = True
+        self._last_inference = now
+        self.inferences += 1
+        return True
+
+    def reset(self):
+        """Force inference on the next frame (e.g. after the caller's cached result became invalid)."""
+        self._has_reference = False
+
+    @property
+    def skipped(self):
+        return self.frames - self.inferences
+
+    def summary(self):
+        ratio = self.skipped / self.frames if self.frames else 0.0
+        return f"skipped {self.skipped} of {self.frames} inferences ({ratio:.0%})"
@@ -0,0 +1,125 @@
+import random
+from collections import deque
+
+import numpy as np
+
+MOVES = ("rock", "paper", "scissors")
+COUNTER = {"rock": "paper", "paper": "scissors", "scissors": "rock"}
+
+
+class RandomModel:
+    """Baseline model that never predicts anything."""
+
+    def update(self, move):
+        pass
+
+    def predict(self):
+        return None
+
+    def reset(self):
+        pass
+
+    def predict_sequence(self, moves):
+        return np.full(len(moves), -1, dtype=np.int8)
+
+
+class NGramModel:
+    """Predicts the next move from decayed n-gram transition counts.
+
+    Keeps one table per context length (orders 0..max_order). Each update touches
+    exactly one row per order and each prediction reads at most one row per order,
+    so the cost per round is constant. The number of rows is bounded by the
+    number of possible contexts (3 + 9 + ... + 3**max_order).
+    """
+
+    def __init__(self, max_order=3, decay=0.9, min_weight=1.0):
+        self.max_order = max_order
+        self.decay = decay
+        self.min_weight = min_weight
+        self.reset()
+
+    def reset(self):
+        self.context = deque(maxlen=self.max_order)
+        self.tables = [{} for _ in range(self.max_order + 1)]
+
+    def update(self, move):
+        history = tuple(self.context)
+        for order in range(min(len(history), self.max_order) + 1):
+            key = history[len(history) - order:]
+            row = self.tables[order].get(key)
+            if row is None:
+                row = self.tables[order][key] = {m: 0.0 for m in MOVES}
+            for m in MOVES:
+                row[m] *= self.decay
+            row[move] += 1.0
+        self.context.append(move)
+
+    def predict(self):
+        """Return the most likely next move from the longest reliable context."""
+        history = tuple(self.context)
+        for order in range(len(history), -1, -1):
+            row = self.tables[order].get(history[len(history) - order:])
+            if row and sum(row.values()) >= self.min_weight:
+                return max(row, key=row.get)
+        return None
+
+    def predict_sequence(self, moves):
+        """What predict() would return before each move of a fresh model fed `moves` (MOVES indices).
+
+        Vectorised replay of predict/update for simulations where the whole
+        sequence is known up front; returns MOVES indices, -1 for None.
+        """
+        moves = np.asarray(moves, dtype=np.int64)
+        n = len(moves)
+        onehot = np.eye(3)[moves]
+        predictions = np.full(n, -1, dtype=np.int8)
+        decided = np.zeros(n, dtype=bool)
+        for order in range(self.max_order, -1, -1):
+            # Base-3 code of the `order` moves before each round; rounds with a shorter history have no row
+            valid = np.arange(n) >= order
+            keys = np.zeros(n, dtype=np.int64)
+            for lag in range(1, order + 1):
+                keys[order:] = keys[order:] * 3 + moves[order - lag:n - lag]
+            rows = np.zeros((n, 3))
+            seen = np.zeros(n, dtype=bool)
+            for key in np.unique(keys[valid]):
+                index = np.flatnonzero(valid & (keys == key))
+                rows[index] = _decayed_prefix(onehot[index], self.decay)
+                seen[index[1:]] = True  # the row exists once its context has been updated
+            # The closed form can land an ulp below a sum that update() reaches exactly
+            usable = seen & ~decided & (rows.sum(axis=1) >= self.min_weight - 1e-9)
+            predictions[usable] = rows[usable].argmax(axis=1)  # first maximum, like max() over MOVES
+            decided |= usable
+        return predictions
+
+
+def _decayed_prefix(values, decay, block=256):
+    """out[k] = sum over j < k of decay ** (k - 1 - j) * values[j]: a row's counts before its k-th update."""
+    out = np.zeros_like(values, dtype=np.float64)
+    carry = np.zeros(values.shape[1])
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        # Scaled per block so decay ** -k stays far from overflow
+        powers = decay ** np.arange(len(chunk) + 1)
+        scaled = np.cumsum(chunk / powers[1:, None], axis=0)
+        out[start:start + len(chunk)] = powers[:-1, None] * carry
+        out[start + 1:start + len(chunk)] += powers[1:-1, None] * scaled[:-1]
+        carry = powers[-1] * carry + powers[len(chunk)] * scaled[-1]
+    return out
+
+
+MODE_MODELS = {
+    "easy": RandomModel,
+    "random": RandomModel,
+    "normal": lambda: NGramModel(max_order=1, decay=0.95),
+    "impossible": lambda: NGramModel(max_order=3, decay=0.9),
+}
+
+
+def create_model(mode):
+    return MODE_MODELS.get(mode, MODE_MODELS["impossible"])()
+
+
+def counter_move(prediction):
+    """Return the move that beats the prediction, or a random move without one."""
+    return COUNTER[prediction] if prediction else random.choice(MOVES)
@@ -1,125 +1,165 @@
 import cv2
+import logging
+import numpy as np
 import os
-import mediapipe as mp
-from datetime import datetime
-import time
+import pygame
+
+from src.frame_pool import get_frame_pool
+from src.motion_gate import MotionGate
+from src.session import PlayerSession
+from src.settings import get_settings
+
+log = logging.getLogger(__name__)
 
 SAVE_DIR = "assets/images"
-os.makedirs(SAVE_DIR, exist_ok=True)
 
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-mp_draw = mp.solutions.drawing_utils
+face_cascade = None
 
-BUTTON_POS = (400, 400, 200, 80)
-FONT = cv2.FONT_HERSHEY_SIMPLEX
+SCREEN_SIZE = (800, 600)
+BUTTON_RECT = pygame.Rect(500, 480, 250, 100)
+NAME_RECT = pygame.Rect(290, 22, 320, 50)
+INDEX_FINGER_TIP = 8
 HOVER_TIME_REQUIRED = 15
-
-def draw_ui(frame, player_name, hover_status=""):
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (30, 10), (610, 80), (50, 50, 50), -1)
-    pt1 = (BUTTON_POS[0], BUTTON_POS[1])
-    pt2 = (BUTTON_POS[0] + BUTTON_POS[2], BUTTON_POS[1] + BUTTON_POS[3])
-    cv2.rectangle(overlay, pt1, pt2, (0, 200, 0), -1 if hover_status else 2)
-    alpha = 0.7 if hover_status else 0.3
-    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
-
-    cv2.putText(frame, "Player Name:", (50, 50), FONT, 1, (255, 255, 255), 2)
-    cv2.rectangle(frame, (250, 20), (500, 60), (255, 255, 255), -1)
-    cv2.putText(frame, player_name, (260, 50), FONT, 1, (0, 0, 0), 2)
-    cv2.putText(frame, "NEXT", (BUTTON_POS[0] + 60, BUTTON_POS[1] + 50), FONT, 1.5, (0, 0, 0), 2)
-    if hover_status:
-        cv2.putText(frame, f"Selecting... {hover_status}/{HOVER_TIME_REQUIRED}", (BUTTON_POS[0], BUTTON_POS[1] - 20), FONT, 0.8, (0, 255, 255), 2)
-
-def is_finger_on_button(finger_x, finger_y):
-    x, y, w, h = BUTTON_POS
-    return x <= finger_x <= x + w and y <= finger_y <= y + h
-
-def capture_face(player_name, frame, face_coordinates):
+MAX_NAME_LENGTH = 15
+
+def load_models():
+    """Load the face cascade on first use (or from the startup warm-up)."""
+    global face_cascade
+    if face_cascade is None:
+        os.makedirs(SAVE_DIR, exist_ok=True)
+        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+def build_overlay(ui):
+    """Pre-render the static parts of the screen: the name bar, the NEXT label and both button fills."""
+    buttons = []
+    for alpha in (80, 180):
+        fill = pygame.Surface(BUTTON_RECT.size, pygame.SRCALPHA)
+        fill.fill((0, 200, 0, alpha))
+        buttons.append(fill)
+    overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
+    pygame.draw.rect(overlay, (50, 50, 50, 180), (30, 10, 740, 75))
+    overlay.blit(ui.font.render("Player Name:", True, (255, 255, 255)), (50, 35))
+    pygame.draw.rect(overlay, (255, 255, 255), NAME_RECT)
+    label = ui.large_font.render("NEXT", True, (0, 0, 0))
+    overlay.blit(label, label.get_rect(center=BUTTON_RECT.center))
+    return overlay, buttons
+
+def draw_button(screen, ui, overlay, buttons, hover_time):
+    """The NEXT button fills in while a finger hovers over it."""
+    screen.blit(buttons[1 if hover_time else 0], BUTTON_RECT.topleft)
+    pygame.draw.rect(screen, (0, 200, 0), BUTTON_RECT, 3)
+    screen.blit(overlay, (0, 0))
+    if hover_time:
+        text = ui.small_font.render(f"Selecting... {hover_time}/{HOVER_TIME_REQUIRED}", True, (255, 255, 0))
+        screen.blit(text, (BUTTON_RECT.x, BUTTON_RECT.y - 30))
+
+def draw_hands(screen, landmarks):
+    """Draw tracked hands in display space and return the index fingertip of the first one."""
+    if landmarks is None:
+        return None
+    width, height = screen.get_size()
+    fingertip = None
+    for hand in landmarks:
+        # Camera landmarks are unmirrored; the display is a mirror
+        points = np.column_stack(((1.0 - hand[:, 0]) * width, hand[:, 1] * height)).astype(int).tolist()
+        for point in points:
+            pygame.draw.circle(screen, (0, 255, 0), point, 3)
+        if fingertip is None:
+            fingertip = tuple(points[INDEX_FINGER_TIP])
+            pygame.draw.circle(screen, (255, 0, 0), fingertip, 10)
+    return fingertip
+
+def capture_face(frame, face_coordinates):
+    """Return an owned BGR copy of the face region of an RGB frame, or None if there is no face."""
     if face_coordinates is not None:
         x, y, w, h = face_coordinates
         face_crop = frame[y:y+h, x:x+w]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        img_name = os.path.join(SAVE_DIR, f"{player_name}_{timestamp}.jpg")
-        cv2.imwrite(img_name, face_crop)
-        with open(img_name, 'a') as f:
-            f.flush()
-        time.sleep(0.5)
-        print(f"✅ Face saved: {img_name}, file exists: {os.path.exists(img_name)}")
-        return True
-    return False
-
-def run_player_registration():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("❌ Error: Could not access camera, trying alternative...")
-        cap = cv2.VideoCapture(1)
-        if not cap.isOpened():
-            print("❌ Error: No webcam available.")
-            return None, None
-
+        if face_crop.size:
+            return cv2.cvtColor(face_crop, cv2.COLOR_RGB2BGR)
+    return None
+
+def run_player_registration(screen, ui, hand_tracking):
+    """Register a player on the game screen; returns a PlayerSession holding the face in memory, or None.
+
+    The camera image, hand landmarks and face crop all come from the shared
+    hand tracker, so no second camera handle or window is opened. Escape
+    cancels (None); closing the window returns "quit".
+    """
+    load_models()
+    overlay, buttons = build_overlay(ui)
+    pool = get_frame_pool()
+    gray = None
+    settings = get_settings()
+    # The player mostly stands still while typing a name, so face detection reuses its last result
+    gate = MotionGate(settings.motion_threshold, settings.motion_max_interval) if settings.motion_threshold > 0 else None
+    faces = ()
     player_name = ""
+    name_surface = None
     finger_hover_time = 0
-    next_selected = False
     face_coordinates = None
-
-    while not next_selected:
-        ret, frame = cap.read()
-        if not ret:
-            print("⚠️ Warning: Could not read frame, retrying...")
-            time.sleep(0.1)
-            continue
-
-        frame = cv2.flip(frame, 1)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-
+    face_image = None
+
+    def draw(animating):
+        nonlocal gray, faces, face_coordinates, face_image, finger_hover_time, name_surface
+        landmarks = hand_tracking.track()
+        frame = hand_tracking.get_flipped_frame()  # mirrored RGB, without landmarks drawn on it
+        if gate is None or gate.should_infer(frame):
+            gray = pool.ensure(gray, frame.shape[:2])
+            cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY, dst=gray)
+            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            if len(faces):
+                face_coordinates = tuple(int(v) for v in faces[-1])
+                face_image = capture_face(frame, face_coordinates)
+
+        ui.draw_camera(screen, frame, (0, 0) + SCREEN_SIZE)
+        scale_x, scale_y = SCREEN_SIZE[0] / frame.shape[1], SCREEN_SIZE[1] / frame.shape[0]
         for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
-            face_coordinates = (x, y, w, h)
-
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        draw_ui(frame, player_name, str(finger_hover_time) if finger_hover_time > 0 else "")
-
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == 8 and player_name:
+            pygame.draw.rect(screen, (255, 255, 0), (x * scale_x, y * scale_y, w * scale_x, h * scale_y), 2)
+        draw_button(screen, ui, overlay, buttons, finger_hover_time)
+        if name_surface is None:
+            name_surface = ui.font.render(player_name, True, (0, 0, 0))
+        screen.blit(name_surface, (NAME_RECT.x + 10, NAME_RECT.y + 12))
+
+        fingertip = draw_hands(screen, landmarks)
+        if fingertip is not None:
+            if BUTTON_RECT.collidepoint(fingertip):
+                finger_hover_time += 1
+                if finger_hover_time >= HOVER_TIME_REQUIRED:
+                    log.info("✅ NEXT button selected via hand hover")
+                    return "next"
+            else:
+                finger_hover_time = 0
+
+    def handle_event(event):
+        nonlocal player_name, name_surface
+        if event.type == pygame.QUIT:
+            return "quit"
+        if event.type != pygame.KEYDOWN:
+            return None
+        if event.key == pygame.K_ESCAPE:
+            return "cancel"
+        if event.key == pygame.K_BACKSPACE:
             player_name = player_name[:-1]
-        elif key == 13 and player_name:
-            next_selected = True
-        elif len(player_name) < 15 and 32 <= key <= 126:
-            player_name += chr(key)
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                index_finger_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                h, w, _ = frame.shape
-                finger_x, finger_y = int(index_finger_tip.x * w), int(index_finger_tip.y * h)
-                cv2.circle(frame, (finger_x, finger_y), 10, (0, 0, 255), -1)
-
-                if is_finger_on_button(finger_x, finger_y):
-                    finger_hover_time += 1
-                    if finger_hover_time >= HOVER_TIME_REQUIRED:
-                        next_selected = True
-                        print("✅ NEXT button selected via hand hover")
-                else:
-                    finger_hover_time = 0
-
-        cv2.imshow("Player Registration", frame)
-
-    if player_name and face_coordinates and capture_face(player_name, frame, face_coordinates):
-        print(f"✅ Player {player_name} registered successfully!")
-    else:
-        print("❌ Registration failed or no face detected.")
-        cap.release()
-        cv2.destroyAllWindows()
-        return None, None
-
-    cap.release()
-    cv2.destroyAllWindows()
-    return player_name, face_coordinates
\ No newline at end of file
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            if player_name:
+                return "next"
+        elif len(player_name) < MAX_NAME_LENGTH and event.unicode.isprintable() and event.unicode:
+            player_name += event.unicode
+        name_surface = None
+
+    result = ui.camera_loop.run(draw, handle_event)
+
+    pool.release(gray)
+    if gate is not None:
+        log.info("✅ Registration motion gate: %s", gate.summary())
+    if result == "quit":
+        log.warning("⚠️ Registration: Quit event detected")
+        return "quit"
+    if result == "cancel":
+        log.info("✅ Registration cancelled")
+        return None
+    if player_name and face_image is not None:
+        log.info("✅ Player %s registered successfully!", player_name)
+        return PlayerSession(player_name, face_image, face_coordinates)
+    log.error("❌ Registration failed or no face detected.")
+    return None
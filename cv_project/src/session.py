@@ -0,0 +1,24 @@
+import time
+
+
+class PlayerSession:
+    """Carries a registered player's face and avatar in memory from registration to play_game."""
+
+    def __init__(self, player_name, face_image, face_coordinates):
+        self.player_name = player_name
+        self.face_image = face_image  # BGR crop taken at registration
+        self.face_coordinates = face_coordinates
+        self.created_at = time.time()
+        self.avatar = None
+        self.avatar_effect = None
+        self.face_write = None
+
+    def persist_face(self, image_processing):
+        """Save the face in the background; the session never waits for it."""
+        if self.face_write is None:
+            self.face_write = image_processing.save_face(self.face_image, self.player_name, prefetch=False)
+        return self.face_write
+
+    def set_avatar(self, avatar, effect_id=None):
+        self.avatar = avatar
+        self.avatar_effect = effect_id
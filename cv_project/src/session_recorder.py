@@ -0,0 +1,484 @@
+"""Compact recordings of game sessions and a replay engine for them.
+
+A recording holds everything the game decided from the camera, without the
+camera. That means per-frame hand landmarks, the smoothed gesture and
+confidence of each player, and the game events (`get_ai_move`,
+`evaluate_round`). Replaying it drives a fresh GameLogic, and optionally the
+UI, at any speed. Use it to debug a reported round or to run analytics over
+many sessions.
+
+File layout, all little-endian:
+
+    header   "CVRC", u16 version, u16 reserved, u32 metadata length, metadata JSON
+    chunk    "CHNK", u32 frames, u32 hands, u32 event bytes, then the columns:
+             t float64[frames], hands uint8[frames], gestures int8[frames, 2],
+             confidences float16[frames, 2], landmarks float16[hands, 21, 3],
+             events as JSON lines
+    footer   zlib(JSON index of chunk offsets and time spans), u64 offset, u32 length, "CVRI"
+
+The footer is optional: a recording cut short by a crash has none, and the
+reader then scans the chunks from the front.
+
+    python -m src.session_recorder info recordings/*.cvrc
+    python -m src.session_recorder replay recordings/alice_20240101_120000.cvrc --speed 4 --show
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"CVRC"
+CHUNK_MAGIC = b"CHNK"
+INDEX_MAGIC = b"CVRI"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+CHUNK_HEADER = struct.Struct("<4sIII")
+TRAILER = struct.Struct("<QI4s")
+GESTURE_CODES = ("rock", "paper", "scissors", "unknown")
+PLAYERS = 2
+RECORDINGS_DIR = "recordings"
+
+
+def _gesture_code(gesture):
+    if gesture is None:
+        return -1
+    try:
+        return GESTURE_CODES.index(gesture)
+    except ValueError:
+        return GESTURE_CODES.index("unknown")
+
+
+class SessionRecorder:
+    """Buffers frames and events in memory and appends them to the file one chunk at a time.
+
+    Timestamps are seconds since the recorder was created. Landmarks are
+    stored as float16 x, y, z. That is enough precision for normalised
+    coordinates, at a quarter of the size of the float32 x, y, z, visibility
+    arrays the tracker produces.
+    """
+
+    def __init__(self, path, metadata=None, chunk_frames=256, index=True, clock=time.perf_counter):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.index = index
+        self.clock = clock
+        self._start = clock()
+        self._chunks = []
+        self.frames = 0
+        self.events = 0
+        self._reset_chunk()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        meta = dict(metadata or {}, created=time.time(), gestures=GESTURE_CODES)
+        payload = json.dumps(meta).encode("utf-8")
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, len(payload)))
+        self._file.write(payload)
+
+    def _reset_chunk(self):
+        self._t = []
+        self._hands = []
+        self._gestures = []
+        self._confidences = []
+        self._landmarks = []
+        self._events = []
+
+    def now(self):
+        return self.clock() - self._start
+
+    def record_frame(self, landmarks, gestures, confidences):
+        """Record one tracked frame: (N, 21, >=3) landmarks or None, plus each player's gesture and confidence."""
+        if self._file is None:
+            return
+        self._t.append(self.now())
+        if landmarks is None:
+            self._hands.append(0)
+        else:
+            self._hands.append(len(landmarks))
+            self._landmarks.append(np.asarray(landmarks)[:, :, :3])
+        codes = [_gesture_code(g) for g in gestures[:PLAYERS]]
+        self._gestures.append(codes + [-1] * (PLAYERS - len(codes)))
+        values = [float(c) for c in confidences[:PLAYERS]]
+        self._confidences.append(values + [0.0] * (PLAYERS - len(values)))
+        self.frames += 1
+        if len(self._t) >= self.chunk_frames:
+            self.flush()
+
+    def record_event(self, kind, **data):
+        """Record a game event, e.g. record_event("round", player="rock", ai="paper", outcome="Lose")."""
+        if self._file is None:
+            return
+        self._events.append(dict(data, t=self.now(), kind=kind))
+        self.events += 1
+
+    def flush(self):
+        """Write the buffered frames and events as one chunk."""
+        if self._file is None or not (self._t or self._events):
+            return
+        n = len(self._t)
+        landmarks = (np.concatenate(self._landmarks) if self._landmarks
+                     else np.empty((0, 21, 3))).astype(np.float16)
+        events = "".join(json.dumps(e) + "\n" for e in self._events).encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, n, len(landmarks), len(events)))
+        self._file.write(np.asarray(self._t, dtype="<f8").tobytes())
+        self._file.write(np.asarray(self._hands, dtype=np.uint8).tobytes())
+        self._file.write(np.asarray(self._gestures, dtype=np.int8).reshape(n, PLAYERS).tobytes())
+        self._file.write(np.asarray(self._confidences, dtype="<f2").reshape(n, PLAYERS).tobytes())
+        self._file.write(landmarks.astype("<f2").tobytes())
+        self._file.write(events)
+        times = self._t + [e["t"] for e in self._events]
+        self._chunks.append({"offset": offset, "frames": n, "hands": len(landmarks),
+                             "events": len(self._events), "t0": min(times), "t1": max(times)})
+        self._reset_chunk()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        if self.index:
+            footer = zlib.compress(json.dumps({"chunks": self._chunks, "frames": self.frames,
+                                               "events": self.events}).encode("utf-8"))
+            offset = self._file.tell()
+            self._file.write(footer)
+            self._file.write(TRAILER.pack(offset, len(footer), INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+        log.info("✅ Recorded %s frames and %s events to %s", self.frames, self.events, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def new_recording_path(player_name, directory=RECORDINGS_DIR):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in player_name) or "player"
+    return os.path.join(directory, f"{safe}_{time.strftime('%Y%m%d_%H%M%S')}.cvrc")
+
+
+class SessionRecording:
+    """Reads a recording chunk by chunk; use `columns` to load every stream as one array each."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a session recording")
+            if version > VERSION:
+                raise ValueError(f"{path} uses recording version {version}, newer than {VERSION}")
+            self.metadata = json.loads(f.read(length))
+            self._data_start = f.tell()
+            self.chunks = self._read_index(f)
+            self.indexed = self.chunks is not None
+            if self.chunks is None:
+                self.chunks = self._scan(f)
+        self.gestures = tuple(self.metadata.get("gestures", GESTURE_CODES))
+
+    def _read_index(self, f):
+        end = f.seek(0, os.SEEK_END)
+        if end - self._data_start < TRAILER.size:
+            return None
+        f.seek(end - TRAILER.size)
+        offset, length, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != INDEX_MAGIC:
+            return None
+        f.seek(offset)
+        return json.loads(zlib.decompress(f.read(length)))["chunks"]
+
+    def _scan(self, f):
+        """Rebuild the chunk list of an unindexed recording, stopping at a truncated chunk."""
+        chunks = []
+        f.seek(self._data_start)
+        while True:
+            offset = f.tell()
+            head = f.read(CHUNK_HEADER.size)
+            if len(head) < CHUNK_HEADER.size:
+                break
+            magic, frames, hands, event_bytes = CHUNK_HEADER.unpack(head)
+            size = self._chunk_size(frames, hands, event_bytes)
+            if magic != CHUNK_MAGIC or len(f.read(size)) < size:
+                break
+            chunks.append({"offset": offset, "frames": frames, "hands": hands})
+        return chunks
+
+    @staticmethod
+    def _chunk_size(frames, hands, event_bytes):
+        return frames * (8 + 1 + PLAYERS + 2 * PLAYERS) + hands * 21 * 3 * 2 + event_bytes
+
+    def iter_chunks(self):
+        """Yield each chunk as a dict of column arrays plus its list of events."""
+        with open(self.path, "rb") as f:
+            for entry in self.chunks:
+                f.seek(entry["offset"])
+                _, n, hands, event_bytes = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+                data = f.read(self._chunk_size(n, hands, event_bytes))
+                columns, pos = {}, 0
+                for name, dtype, shape in (("t", "<f8", (n,)), ("hands", np.uint8, (n,)),
+                                           ("gestures", np.int8, (n, PLAYERS)),
+                                           ("confidences", "<f2", (n, PLAYERS)),
+                                           ("landmarks", "<f2", (hands, 21, 3))):
+                    count = int(np.prod(shape))
+                    columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=pos).reshape(shape)
+                    pos += columns[name].nbytes
+                columns["events"] = [json.loads(line) for line in data[pos:].decode("utf-8").splitlines()]
+                yield columns
+
+    def columns(self):
+        """Every stream concatenated: t, hands, gestures, confidences, landmarks, hand_offsets, events."""
+        parts = list(self.iter_chunks())
+        out = {}
+        for name, empty in (("t", (0,)), ("hands", (0,)), ("gestures", (0, PLAYERS)),
+                            ("confidences", (0, PLAYERS)), ("landmarks", (0, 21, 3))):
+            arrays = [p[name] for p in parts]
+            out[name] = np.concatenate(arrays) if arrays else np.empty(empty)
+        out["hand_offsets"] = np.concatenate(([0], np.cumsum(out["hands"], dtype=np.int64)))
+        out["events"] = sorted((e for p in parts for e in p["events"]), key=lambda e: e["t"])
+        return out
+
+    def timeline(self):
+        """Frames and events merged in time order, as ("frame", t, landmarks, gestures, confidences) or ("event", t, event)."""
+        for chunk in self.iter_chunks():
+            offsets = np.concatenate(([0], np.cumsum(chunk["hands"], dtype=np.int64)))
+            events = chunk["events"]
+            e = 0
+            for i, t in enumerate(chunk["t"].tolist()):
+                while e < len(events) and events[e]["t"] <= t:
+                    yield ("event", events[e]["t"], events[e])
+                    e += 1
+                landmarks = chunk["landmarks"][offsets[i]:offsets[i + 1]] if chunk["hands"][i] else None
+                gestures = [self.gestures[c] if c >= 0 else None for c in chunk["gestures"][i].tolist()]
+                yield ("frame", t, landmarks, gestures, chunk["confidences"][i].tolist())
+            for event in events[e:]:
+                yield ("event", event["t"], event)
+
+
+def synthetic_hand(gesture, rng):
+    """A (1, 21, 4) landmark array that classify_landmarks reads as `gesture`, for headless runs."""
+    hand = np.full((21, 4), 0.6, dtype=np.float32)
+    hand[:, 0] = 0.5
+    hand[:, 3] = 0.9
+    extended = {"rock": (), "paper": (8, 12, 16, 20), "scissors": (8, 12)}[gesture]
+    for tip in (8, 12, 16, 20):
+        hand[tip - 2, 1] = 0.5  # PIP joint
+        hand[tip, 1] = 0.3 if tip in extended else 0.65
+    hand[3, 0] = 0.45
+    hand[4, 0] = 0.4 if gesture == "paper" else 0.5
+    hand[:, :2] += rng.uniform(-0.1, 0.1, size=2).astype(np.float32)
+    hand[:, :3] += rng.normal(0, 0.002, size=(21, 3)).astype(np.float32)
+    return hand[None]
+
+
+class ReplayHandTracking:
+    """Stands in for HandTracking during a replay: serves recorded results instead of camera frames.
+
+    The "camera" image is a blank frame with the recorded landmarks drawn on
+    it, so the UI's webcam panel still shows where the hands were.
+    """
+
+    def __init__(self, resolution=(320, 240)):
+        self.resolution = tuple(resolution)
+        self.motion_gate = None
+        self.recorder = None
+        self.latency = None
+        self.max_num_hands = 1
+        self.player_x = [0.25, 0.75]
+        self.landmarks = None
+        self.gestures = ["rock", "rock"]
+        self.confidences = [0.0, 0.0]
+        self._frame = np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
+        self._dirty = True
+
+    def feed(self, landmarks, gestures, confidences):
+        self.landmarks = landmarks
+        self.gestures = [g or previous for g, previous in zip(gestures, self.gestures)]
+        self.confidences = confidences
+        self._dirty = True
+
+    @property
+    def last_gesture(self):
+        return self.gestures[0]
+
+    @property
+    def gesture_confidence(self):
+        return self.confidences[0]
+
+    def track(self):
+        return self.landmarks
+
+    def detect_gesture(self, mode):
+        return self.last_gesture, []
+
+    def detect_gestures(self):
+        seen = [False, False]
+        if self.landmarks is not None:
+            seen[:len(self.landmarks)] = [True] * min(len(self.landmarks), PLAYERS)
+        return list(self.gestures), seen
+
+    def set_max_hands(self, max_num_hands):
+        self.max_num_hands = max_num_hands
+
+    def get_frame(self):
+        if self._dirty:
+            import cv2
+
+            self._frame[:] = 0
+            if self.landmarks is not None:
+                size = np.array(self.resolution, dtype=np.float32)
+                for hand in self.landmarks:
+                    for x, y in (hand[:, :2].astype(np.float32) * size).astype(int).tolist():
+                        cv2.circle(self._frame, (x, y), 3, (0, 255, 0), -1)
+            self._dirty = False
+        return self._frame
+
+    def get_flipped_frame(self):
+        return self.get_frame()[:, ::-1]
+
+
+class SessionReplay:
+    """Plays a recording back through a fresh GameLogic (and optionally the UI).
+
+    `speed` scales the recorded time: 1 is real time, 4 is four times
+    faster, and 0 runs as fast as possible, which is what bulk analytics
+    want. AI moves are asked of GameLogic again, so its opponent model sees
+    the same history. Rounds are still scored with the recorded AI move, so
+    the scores match the original session. Every disagreement is counted.
+    """
+
+    def __init__(self, recording, speed=0.0, ui=None, screen=None):
+        from src.game_logic import GameLogic
+
+        self.recording = recording if isinstance(recording, SessionRecording) else SessionRecording(recording)
+        self.speed = speed
+        self.ui = ui
+        self.screen = screen
+        self.now = 0.0
+        self.game_logic = GameLogic(clock=lambda: int(self.now * 1000))
+        self.hand_tracking = ReplayHandTracking(self.recording.metadata.get("resolution", (320, 240)))
+        self.mode = self.recording.metadata.get("mode", "normal")
+        self.stats = {"frames": 0, "frames_with_hands": 0, "rounds": 0, "outcome_mismatches": 0,
+                      "ai_move_agreement": 0, "ai_moves": 0, "outcomes": {}}
+
+    def _wait_until(self, t, wall_start):
+        if self.speed > 0:
+            delay = wall_start + t / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def run(self):
+        wall_start = time.perf_counter()
+        status = "Replaying..."
+        for item in self.recording.timeline():
+            self.now = item[1]
+            self._wait_until(self.now, wall_start)
+            if item[0] == "frame":
+                _, _, landmarks, gestures, confidences = item
+                self.hand_tracking.feed(landmarks, gestures, confidences)
+                self.stats["frames"] += 1
+                self.stats["frames_with_hands"] += landmarks is not None
+                if self.ui is not None:
+                    self._pump_events()
+                    self.ui.render_status(self.screen, status, self.hand_tracking, self.hand_tracking.last_gesture)
+            else:
+                status = self._apply_event(item[2]) or status
+        return self.stats
+
+    def _pump_events(self):
+        import pygame
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise KeyboardInterrupt
+
+    def _apply_event(self, event):
+        kind = event["kind"]
+        if kind == "start":
+            self.mode = event["mode"]
+            self.game_logic.initialize_game(self.mode)
+            return f"Mode: {self.mode}"
+        if kind == "ai_move":
+            replayed = self.game_logic.get_ai_move(event["player"], event["mode"])
+            self.stats["ai_moves"] += 1
+            self.stats["ai_move_agreement"] += replayed == event["ai"]
+            return "AI Thinking..."
+        if kind == "round":
+            outcome = self.game_logic.evaluate_round(event["player"], event["ai"])
+            if outcome != event["outcome"]:
+                self.stats["outcome_mismatches"] += 1
+            if self.mode == "versus":
+                self.game_logic.update_versus_scores(outcome)
+            else:
+                self.game_logic.update_scores(outcome, event["player"], [], [])
+            self.stats["rounds"] += 1
+            self.stats["outcomes"][outcome] = self.stats["outcomes"].get(outcome, 0) + 1
+            if self.ui is not None:
+                self.ui.show_round_result(self.screen, outcome, self.game_logic.get_scores())
+            return f"{event['player']} vs {event['ai']}: {outcome}"
+        return None
+
+
+def format_info(recording):
+    data = recording.columns()
+    frames = len(data["t"])
+    duration = float(data["t"][-1] - data["t"][0]) if frames > 1 else 0.0
+    with_hands = int((data["hands"] > 0).sum())
+    codes = data["gestures"][:, 0]
+    counts = {recording.gestures[c]: int((codes == c).sum()) for c in range(len(recording.gestures))}
+    rounds = [e for e in data["events"] if e["kind"] == "round"]
+    lines = [f"{recording.path}: {os.path.getsize(recording.path):,} bytes, "
+             f"{len(recording.chunks)} chunks{'' if recording.indexed else ' (no index, scanned)'}",
+             f"  player {recording.metadata.get('player', '?')}, mode {recording.metadata.get('mode', '?')}",
+             f"  {frames} frames over {duration:.1f}s ({frames / duration if duration else 0:.1f} fps), "
+             f"hands in {with_hands / frames if frames else 0:.0%}",
+             "  gestures: " + ", ".join(f"{g} {n}" for g, n in counts.items() if n),
+             f"  {len(rounds)} rounds: " + ", ".join(f"{e['player']}/{e['ai']} {e['outcome']}" for e in rounds)]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay recorded game sessions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="summarise recordings")
+    info_parser.add_argument("paths", nargs="+")
+    replay_parser = commands.add_parser("replay", help="run a recording back through GameLogic")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="0 replays as fast as possible")
+    replay_parser.add_argument("--show", action="store_true", help="render the replay with the game UI")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        for path in args.paths:
+            print(format_info(SessionRecording(path)))
+        return
+
+    ui = screen = None
+    if args.show:
+        import pygame
+        from src.ui import UI
+
+        pygame.init()
+        screen = pygame.display.set_mode((800, 600))
+        pygame.display.set_caption("AR Spectral Showdown - replay")
+        ui = UI()
+    start = time.perf_counter()
+    try:
+        stats = SessionReplay(args.path, args.speed, ui, screen).run()
+    except KeyboardInterrupt:
+        print("⚠️ Replay interrupted")
+        return
+    agreement = stats["ai_move_agreement"] / stats["ai_moves"] if stats["ai_moves"] else 1.0
+    print(f"✅ Replayed {stats['frames']} frames and {stats['rounds']} rounds in {time.perf_counter() - start:.2f}s")
+    print(f"  outcomes {stats['outcomes']}, {stats['outcome_mismatches']} outcome mismatches, "
+          f"AI move agreement {agreement:.0%} (random modes never agree fully)")
+
+
+if __name__ == "__main__":
+    main()
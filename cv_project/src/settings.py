@@ -1,13 +1,164 @@
+import json
+import logging
+import os
+import time
+
 import pygame
 
+log = logging.getLogger(__name__)
+
+SETTINGS_PATH = "assets/settings.json"
+GESTURE_MODEL_PATH = "assets/models/gesture_classifier.npz"
+DEFAULT_PROFILE = "balanced"
+
+# Every tunable that trades image quality or responsiveness for CPU time
+PROFILES = {
+    "low-power kiosk": {
+        "capture_resolution": (320, 240),
+        "inference_resolution": (256, 192),
+        "model_complexity": 0,
+        "target_fps": 30,
+        "frame_skip": 5,
+        "effect_size": 128,
+        "effect_workers": 1,
+        "background_particles": 6,
+        "burst_particles": 8,
+        "idle_fps": 0,
+        "motion_threshold": 6.0,
+        "motion_max_interval": 1.0,
+    },
+    "balanced": {
+        "capture_resolution": (320, 240),
+        "inference_resolution": (320, 240),
+        "model_complexity": 1,
+        "target_fps": 60,
+        "frame_skip": 3,
+        "effect_size": 200,
+        "effect_workers": 4,
+        "background_particles": 20,
+        "burst_particles": 20,
+        "idle_fps": 0,
+        "motion_threshold": 4.0,
+        "motion_max_interval": 0.5,
+    },
+    "quality": {
+        "capture_resolution": (640, 480),
+        "inference_resolution": (640, 480),
+        "model_complexity": 1,
+        "target_fps": 60,
+        "frame_skip": 1,
+        "effect_size": 256,
+        "effect_workers": 4,
+        "background_particles": 40,
+        "burst_particles": 40,
+        "idle_fps": 0,
+        "motion_threshold": 2.0,
+        "motion_max_interval": 0.25,
+    },
+}
+PROFILE_NAMES = list(PROFILES)
+
+# Milliseconds per benchmark frame below which each profile is chosen, best first
+CALIBRATION_THRESHOLDS = [("quality", 4.0), ("balanced", 12.0)]
+
+
+def benchmark_frame_ms(iterations=30):
+    """Time one synthetic frame of the per-frame image work at 640x480; returns ms per frame."""
+    import cv2
+    import numpy as np
+
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    rgb = np.empty_like(frame)
+    small = np.empty((240, 320, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        cv2.flip(rgb, 1, dst=rgb)
+        cv2.resize(rgb, (320, 240), dst=small)
+        cv2.GaussianBlur(small, (15, 15), 0)
+        cv2.Canny(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY), 100, 200)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
 class Settings:
-    """Manages game settings including volume and sensitivity."""
-    def __init__(self):
+    """Manages game settings: volume, sensitivity and the active performance profile.
+
+    Settings are persisted to SETTINGS_PATH. When no file exists yet, the
+    machine is benchmarked once and a profile is picked automatically.
+    """
+
+    def __init__(self, path=SETTINGS_PATH):
+        self.path = path
         self.volume = 0.5
         self.sensitivity = 20
+        # Used when the file exists (see `python -m src.gesture_classifier train`); the rules are the fallback
+        self.gesture_model = GESTURE_MODEL_PATH
+        self.smoothing_window = 10
+        self.profile = DEFAULT_PROFILE
+        self.apply_profile(DEFAULT_PROFILE)
+        if not self.load():
+            self.calibrate()
+            self.save()
 
-    def adjust_settings(self, screen):
+    def apply_profile(self, name):
+        if name not in PROFILES:
+            log.warning("⚠️ Unknown performance profile %s, using %s", name, DEFAULT_PROFILE)
+            name = DEFAULT_PROFILE
+        self.profile = name
+        for key, value in PROFILES[name].items():
+            setattr(self, key, value)
+
+    def calibrate(self):
+        """Benchmark the machine and switch to the best profile it can sustain."""
+        frame_ms = benchmark_frame_ms()
+        name = next((profile for profile, limit in CALIBRATION_THRESHOLDS if frame_ms < limit), "low-power kiosk")
+        self.apply_profile(name)
+        log.info("✅ Calibrated performance profile: %s (%.1f ms/frame)", name, frame_ms)
+        return name
+
+    def detection_confidence(self, bias=0.0):
+        """Map sensitivity (10-50) to a MediaPipe detection threshold; higher sensitivity accepts weaker detections."""
+        return max(0.1, min(0.9, 0.8 - self.sensitivity / 50 + bias))
+
+    def frame_skip_for(self, mode):
+        # Easy and Impossible sample the hand more often than the other modes
+        return self.frame_skip if mode in ("easy", "impossible") else self.frame_skip + 2
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("profile") == "auto":
+            self.calibrate()
+        else:
+            self.apply_profile(data.get("profile", DEFAULT_PROFILE))
+        self.volume = float(data.get("volume", self.volume))
+        self.sensitivity = int(data.get("sensitivity", self.sensitivity))
+        self.gesture_model = data.get("gesture_model", self.gesture_model)
+        self.smoothing_window = max(1, int(data.get("smoothing_window", self.smoothing_window)))
+        # Individual values may be overridden on top of the profile
+        for key, value in data.get("overrides", {}).items():
+            if key in PROFILES[DEFAULT_PROFILE]:
+                setattr(self, key, tuple(value) if isinstance(value, list) else value)
+        return True
+
+    def save(self):
+        overrides = {key: getattr(self, key) for key, value in PROFILES[self.profile].items() if getattr(self, key) != value}
+        data = {"profile": self.profile, "volume": self.volume, "sensitivity": self.sensitivity,
+                "gesture_model": self.gesture_model, "smoothing_window": self.smoothing_window, "overrides": overrides}
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.error("❌ Failed to save settings: %s", e)
+
+    def adjust_settings(self, screen, audio=None):
         font = pygame.font.Font(None, 36)
+        small_font = pygame.font.Font(None, 28)
         while True:
             screen.fill((0, 0, 0))
             text = font.render("Settings", True, (255, 255, 255))
@@ -16,13 +167,32 @@ class Settings:
             pygame.draw.rect(screen, (0, 255, 0), (300, 150, 40, 20), 2)
             pygame.draw.rect(screen, (255, 0, 0), (300, 250, int(self.volume * 200), 20))
             pygame.draw.rect(screen, (0, 255, 0), (300 + int(self.volume * 200) - 5, 250, 10, 20), 2)
+            for i, name in enumerate(PROFILE_NAMES):
+                color = (255, 215, 0) if name == self.profile else (150, 150, 150)
+                screen.blit(small_font.render(name, True, color), (300, 330 + i * 40))
             for event in pygame.event.get():
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if 300 <= event.pos[0] <= 500 and 150 <= event.pos[1] <= 170:
                         self.sensitivity = max(10, min(50, (event.pos[0] - 300) // 2))
                     if 300 <= event.pos[0] <= 500 and 250 <= event.pos[1] <= 270:
                         self.volume = max(0, min(1, (event.pos[0] - 300) / 200))
-                    pygame.mixer.music.set_volume(self.volume)
+                    for i, name in enumerate(PROFILE_NAMES):
+                        if 300 <= event.pos[0] <= 500 and 330 + i * 40 <= event.pos[1] <= 360 + i * 40:
+                            self.apply_profile(name)
+                    if audio is not None:
+                        audio.set_volume(self.volume)
                 if event.type == pygame.MOUSEBUTTONUP:
+                    self.save()
                     return
-            pygame.display.flip()
\ No newline at end of file
+            pygame.display.flip()
+
+
+_settings = None
+
+
+def get_settings():
+    """Settings shared by every module; loaded (and calibrated on first run) on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
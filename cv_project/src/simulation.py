@@ -0,0 +1,254 @@
+"""Headless tournament simulator for the GameLogic AI strategies.
+
+Run from the project root, for example:
+
+    python -m src.simulation --rounds 1000000 --workers 4
+    python -m src.simulation --modes normal --players sticky beat_last --rounds 200000
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from src.game_logic import GameLogic
+from src.opponent_model import MOVES
+
+MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+
+
+class UniformPlayer:
+    """Plays uniformly at random."""
+    reactive = False
+
+    def batch(self, n, rng):
+        return rng.integers(0, 3, n, dtype=np.int8)
+
+
+class BiasedPlayer:
+    """Favours moves with fixed probabilities (rock, paper, scissors)."""
+    reactive = False
+
+    def __init__(self, weights=(0.5, 0.3, 0.2)):
+        self.weights = np.asarray(weights, dtype=float) / np.sum(weights)
+
+    def batch(self, n, rng):
+        return rng.choice(3, n, p=self.weights).astype(np.int8)
+
+
+class CyclePlayer:
+    """Cycles rock -> paper -> scissors."""
+    reactive = False
+
+    def batch(self, n, rng):
+        return ((rng.integers(0, 3) + np.arange(n)) % 3).astype(np.int8)
+
+
+class StickyPlayer:
+    """Repeats the previous move with probability `stay`, otherwise switches."""
+    reactive = False
+
+    def __init__(self, stay=0.7):
+        self.stay = stay
+
+    def batch(self, n, rng):
+        switches = rng.random(n) >= self.stay
+        steps = rng.integers(1, 3, n) * switches
+        return ((rng.integers(0, 3) + np.cumsum(steps)) % 3).astype(np.int8)
+
+
+class BeatLastPlayer:
+    """Plays whatever beats the AI's previous move with probability `p`."""
+    reactive = True
+
+    def __init__(self, p=0.8):
+        self.p = p
+
+    def next_move(self, last_ai_move, rng):
+        if last_ai_move >= 0 and rng.random() < self.p:
+            return (last_ai_move + 1) % 3
+        return int(rng.integers(0, 3))
+
+
+PLAYER_MODELS = {
+    "uniform": UniformPlayer,
+    "biased": BiasedPlayer,
+    "cycle": CyclePlayer,
+    "sticky": StickyPlayer,
+    "beat_last": BeatLastPlayer,
+}
+
+
+def evaluate_batch(player_moves, ai_moves):
+    """Vectorised GameLogic.evaluate_round: 0 = Draw, 1 = Win, 2 = Lose (player's view)."""
+    return (player_moves.astype(np.int8) - ai_moves.astype(np.int8)) % 3
+
+
+def ai_moves_batch(game_logic, mode, player_moves, rng):
+    """Vectorised GameLogic.get_ai_move over a whole, known sequence of player moves.
+
+    Same decisions as calling get_ai_move once per round on a fresh game:
+    the opponent model's predictions are replayed with predict_sequence, and
+    the random draws come from `rng` instead of the random module.
+    """
+    n = len(player_moves)
+    random_moves = rng.integers(0, 3, n, dtype=np.int8)
+    if mode in ("easy", "random"):
+        return random_moves
+    predictions = game_logic.get_opponent_model(mode).predict_sequence(player_moves)
+    countered = np.where(predictions >= 0, (predictions + 1) % 3, random_moves).astype(np.int8)  # counter_move
+    if mode == "normal":
+        return np.where(rng.random(n) < game_logic.mode_difficulty["normal"], countered, random_moves)
+    # Impossible: counter the actual move from the second round on (rounds_played >= 2)
+    actual = (rng.random(n) < game_logic.mode_difficulty["impossible"]) & (np.arange(n) >= 1)
+    return np.where(actual, (player_moves + 1) % 3, countered).astype(np.int8)
+
+
+def streak_runs(outcomes, value):
+    """Run lengths of `value` in order, and whether the first and last run touch the chunk edges."""
+    hits = np.concatenate(([0], (outcomes == value).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(hits))
+    lengths = edges[1::2] - edges[::2]
+    return {"lengths": lengths, "head": bool(len(outcomes)) and outcomes[0] == value,
+            "tail": bool(len(outcomes)) and outcomes[-1] == value}
+
+
+class StreakCounter:
+    """Histogram of streak lengths over consecutive chunks, joining runs that cross a chunk boundary."""
+
+    def __init__(self):
+        self.histogram = Counter()
+        self._open = 0  # length of the run still going at the end of the last chunk
+
+    def add(self, runs):
+        lengths = [int(length) for length in runs["lengths"]]
+        if self._open:
+            if runs["head"]:
+                lengths[0] += self._open
+            else:
+                self.histogram[self._open] += 1
+            self._open = 0
+        if runs["tail"]:
+            self._open = lengths.pop()
+        self.histogram.update(lengths)
+
+    def close(self):
+        if self._open:
+            self.histogram[self._open] += 1
+            self._open = 0
+        return self.histogram
+
+
+def simulate_chunk(mode, player_name, rounds, seed):
+    """Play `rounds` rounds of one mode against one player model in this process."""
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    player = PLAYER_MODELS[player_name]()
+    game_logic = GameLogic(clock=lambda: 0)
+    game_logic.initialize_game(mode)
+    get_ai_move = game_logic.get_ai_move
+
+    start = time.perf_counter()
+    if player.reactive:
+        # The player reacts to the AI's last move, so the rounds have to be played one by one
+        ai_moves = np.empty(rounds, dtype=np.int8)
+        player_moves = np.empty(rounds, dtype=np.int8)
+        last_ai = -1
+        for i in range(rounds):
+            move = player.next_move(last_ai, rng)
+            player_moves[i] = move
+            last_ai = ai_moves[i] = MOVE_INDEX[get_ai_move(MOVES[move], mode)]
+    else:
+        player_moves = player.batch(rounds, rng)
+        ai_moves = ai_moves_batch(game_logic, mode, player_moves, rng)
+    elapsed = time.perf_counter() - start
+
+    outcomes = evaluate_batch(player_moves, ai_moves)
+    return {
+        "rounds": rounds,
+        "seconds": elapsed,
+        "outcomes": np.bincount(outcomes, minlength=3),
+        "win_streaks": streak_runs(outcomes, 1),
+        "loss_streaks": streak_runs(outcomes, 2),
+    }
+
+
+def run_tournament(modes, players, rounds, workers=None, chunk_size=100_000, seed=0):
+    """Split every (mode, player) matchup into chunks and run them on a process pool."""
+    jobs = []
+    for mode in modes:
+        for player_name in players:
+            for offset in range(0, rounds, chunk_size):
+                jobs.append((mode, player_name, min(chunk_size, rounds - offset), seed + len(jobs)))
+
+    results = {}
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(job[:2], pool.submit(simulate_chunk, *job)) for job in jobs]
+        # Chunks of a matchup are merged in order, so a streak running across a boundary is counted once
+        for key, future in futures:
+            chunk = future.result()
+            total = results.get(key)
+            if total is None:
+                total = results[key] = {"rounds": 0, "seconds": 0.0, "outcomes": 0,
+                                        "win_streaks": StreakCounter(), "loss_streaks": StreakCounter()}
+            for field in ("rounds", "seconds", "outcomes"):
+                total[field] = total[field] + chunk[field]
+            total["win_streaks"].add(chunk["win_streaks"])
+            total["loss_streaks"].add(chunk["loss_streaks"])
+    for total in results.values():
+        total["win_streaks"] = total["win_streaks"].close()
+        total["loss_streaks"] = total["loss_streaks"].close()
+    wall = time.perf_counter() - wall_start
+    return results, wall
+
+
+def _median_streak(histogram):
+    if not histogram:
+        return 0
+    lengths = sorted(histogram)
+    cumulative = np.cumsum([histogram[length] for length in lengths])
+    return lengths[int(np.searchsorted(cumulative, cumulative[-1] / 2))]
+
+
+def format_report(results, wall):
+    lines = [f"{'mode':<11}{'player':<11}{'win%':>7}{'draw%':>7}{'lose%':>7}"
+             f"{'max W':>7}{'med W':>7}{'max L':>7}{'med L':>7}{'rounds/s':>12}"]
+    total_rounds = 0
+    for (mode, player_name), r in sorted(results.items()):
+        draws, wins, losses = r["outcomes"] / r["rounds"] * 100
+        lines.append(
+            f"{mode:<11}{player_name:<11}{wins:>7.1f}{draws:>7.1f}{losses:>7.1f}"
+            f"{max(r['win_streaks'], default=0):>7}"
+            f"{_median_streak(r['win_streaks']):>7}"
+            f"{max(r['loss_streaks'], default=0):>7}"
+            f"{_median_streak(r['loss_streaks']):>7}"
+            f"{r['rounds'] / r['seconds']:>12,.0f}"
+        )
+        total_rounds += r["rounds"]
+    lines.append(f"Total: {total_rounds:,} rounds in {wall:.2f}s ({total_rounds / wall:,.0f} rounds/s overall)")
+    lines.append("Win/lose percentages and streaks are from the player's side; streaks are counted "
+                 "end to end across a matchup's chunks, uncapped.")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate GameLogic AI strategies against synthetic players.")
+    parser.add_argument("--modes", nargs="+", default=["easy", "normal", "impossible"])
+    parser.add_argument("--players", nargs="+", default=list(PLAYER_MODELS), choices=list(PLAYER_MODELS))
+    parser.add_argument("--rounds", type=int, default=1_000_000, help="rounds per mode/player matchup")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results, wall = run_tournament(args.modes, args.players, args.rounds, args.workers, args.chunk_size, args.seed)
+    print(format_report(results, wall))
+
+
+if __name__ == "__main__":
+    main()
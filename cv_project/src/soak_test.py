@@ -0,0 +1,410 @@
+"""Headless soak test for the game loop.
+
+Plays game after game through the real UI, GameLogic, ImageProcessing and
+leaderboard code with SDL's dummy video and audio drivers. Scripted gestures
+(or a recorded session, see session_recorder) stand in for the camera and
+the player. While it runs, a sampler thread records RSS, the Python heap
+(tracemalloc), open file descriptors, threads, FPS, frame work time and
+round duration. At the end the first and last quarter of the run (after
+warm-up) are compared, and the exit status is 1 if any metric drifted past
+its threshold or the game logged an error.
+
+Run from the project root, for example:
+
+    python -m src.soak_test --hours 8
+    python -m src.soak_test --minutes 30 --time-scale 10 --csv soak.csv
+    python -m src.soak_test --minutes 30 --replay recordings/alice_20240101_120000.cvrc
+"""
+import argparse
+import collections
+import contextlib
+import csv
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from src.session_recorder import ReplayHandTracking, SessionRecording, synthetic_hand
+
+log = logging.getLogger(__name__)
+
+THRESHOLDS = {
+    # metric: (kind, limit); "abs" compares last - first, "rel" compares (last - first) / first
+    "rss_mb": ("abs", 50.0),
+    "heap_mb": ("abs", 20.0),
+    "fds": ("abs", 5),
+    "threads": ("abs", 2),
+    "fps": ("drop", 0.2),
+    "frame_ms": ("rel", 0.5),
+    "round_s": ("rel", 0.2),
+}
+SAMPLE_FIELDS = ["t", "rss_mb", "heap_mb", "fds", "threads", "fps", "frame_ms", "round_s", "rounds", "games"]
+
+
+def synthetic_source(seed=0, hold_frames=20, dropout=0.1):
+    """Endless (landmarks, gestures, confidences): a random gesture held for a while, with missed frames."""
+    rng = np.random.default_rng(seed)
+    while True:
+        gesture = ("rock", "paper", "scissors")[rng.integers(3)]
+        for _ in range(hold_frames):
+            if rng.random() < dropout:
+                yield None, [None, None], [0.0, 0.0]
+            else:
+                yield synthetic_hand(gesture, rng), [gesture, None], [0.9, 0.0]
+
+
+def replay_source(path):
+    """Endless frames from a recorded session, starting over at the end."""
+    while True:
+        for item in SessionRecording(path).timeline():
+            if item[0] == "frame":
+                yield item[2], item[3], item[4]
+
+
+class ScriptedHandTracking(ReplayHandTracking):
+    """A hand tracker that advances through a scripted source on every detection call."""
+
+    def __init__(self, source, resolution=(320, 240)):
+        super().__init__(resolution)
+        self.source = source
+
+    def _advance(self):
+        self.feed(*next(self.source))
+
+    def track(self):
+        self._advance()
+        return self.landmarks
+
+    def detect_gesture(self, mode):
+        self._advance()
+        return super().detect_gesture(mode)
+
+    def detect_gestures(self):
+        self._advance()
+        return super().detect_gestures()
+
+
+class ScaledClock:
+    """pygame.time.Clock stand-in whose frames are `scale` times shorter; records each frame's work time."""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.work_ms = collections.deque(maxlen=10_000)
+        self._last = time.perf_counter()
+
+    def tick(self, fps=0):
+        now = time.perf_counter()
+        self.work_ms.append((now - self._last) * 1000)
+        if fps:
+            delay = 1.0 / (fps * self.scale) - (now - self._last)
+            if delay > 0:
+                time.sleep(delay)
+        self._last = time.perf_counter()
+        return 0
+
+
+@contextlib.contextmanager
+def scaled_time(scale, frame_counter):
+    """Run pygame's clock `scale` times faster and count display flips; restores pygame on exit."""
+    originals = (pygame.time.get_ticks, pygame.time.delay, pygame.time.wait, pygame.display.flip)
+    start = time.perf_counter()
+    base = pygame.time.get_ticks()
+    flip = pygame.display.flip
+
+    def get_ticks():
+        return base + int((time.perf_counter() - start) * 1000 * scale)
+
+    def delay(ms):
+        time.sleep(ms / 1000 / scale)
+        return ms
+
+    def counted_flip():
+        frame_counter[0] += 1
+        flip()
+
+    pygame.time.get_ticks, pygame.time.delay, pygame.time.wait = get_ticks, delay, delay
+    pygame.display.flip = counted_flip
+    try:
+        yield
+    finally:
+        pygame.time.get_ticks, pygame.time.delay, pygame.time.wait, pygame.display.flip = originals
+
+
+class SoakProbe:
+    """Recorder-compatible hook for GameLogic that times rounds in wall-clock seconds."""
+
+    def __init__(self):
+        self.rounds = 0
+        self.round_s = collections.deque(maxlen=10_000)
+        self._last_round = None
+
+    def record_frame(self, landmarks, gestures, confidences):
+        pass
+
+    def record_event(self, kind, **data):
+        now = time.perf_counter()
+        if kind == "start":
+            self._last_round = now
+        elif kind == "round":
+            if self._last_round is not None:
+                self.round_s.append(now - self._last_round)
+            self._last_round = now
+            self.rounds += 1
+
+
+class ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+        self.first = None
+
+    def emit(self, record):
+        self.count += 1
+        if self.first is None:
+            self.first = record.getMessage()
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak rather than current RSS, but still shows growth
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def open_fds():
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return 0
+
+
+class Sampler(threading.Thread):
+    """Samples process metrics every `interval` seconds on a background thread."""
+
+    def __init__(self, interval, clock, probe, frame_counter, games, trace_heap=True):
+        super().__init__(name="soak-sampler", daemon=True)
+        self.interval = interval
+        self.clock = clock
+        self.probe = probe
+        self.frame_counter = frame_counter
+        self.games = games
+        self.trace_heap = trace_heap
+        self.samples = []
+        self._done = threading.Event()
+        self._start = time.perf_counter()
+
+    def _drain(self, values):
+        drained = []
+        while values:
+            drained.append(values.popleft())
+        return drained
+
+    def run(self):
+        last_t, last_frames = time.perf_counter(), self.frame_counter[0]
+        while not self._done.wait(self.interval):
+            now, frames = time.perf_counter(), self.frame_counter[0]
+            work = self._drain(self.clock.work_ms)
+            rounds = self._drain(self.probe.round_s)
+            sample = {
+                "t": now - self._start,
+                "rss_mb": rss_mb(),
+                "heap_mb": tracemalloc.get_traced_memory()[0] / 2**20 if self.trace_heap else None,
+                "fds": open_fds(),
+                "threads": threading.active_count(),
+                "fps": (frames - last_frames) / (now - last_t),
+                "frame_ms": float(np.percentile(work, 95)) if work else None,
+                "round_s": statistics.median(rounds) if rounds else None,
+                "rounds": self.probe.rounds,
+                "games": self.games[0],
+            }
+            self.samples.append(sample)
+            last_t, last_frames = now, frames
+            log.info("⏱️ %s", format_sample(sample))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def format_sample(s):
+    optional = lambda value, fmt: format(value, fmt) if value is not None else "-"
+    return (f"{time.strftime('%H:%M:%S', time.gmtime(s['t']))} rss {s['rss_mb']:.1f} MB, heap {optional(s['heap_mb'], '.1f')} MB, "
+            f"{s['fds']} fds, {s['threads']} threads, {s['fps']:.1f} fps, "
+            f"frame p95 {optional(s['frame_ms'], '.2f')} ms, round {optional(s['round_s'], '.2f')} s, "
+            f"{s['rounds']} rounds, {s['games']} games")
+
+
+def check_drift(samples, warmup, thresholds=THRESHOLDS):
+    """Compare the medians of the first and last quarter of the post-warm-up samples.
+
+    Returns (metric, first, last, limit, ok) rows; metrics without data are skipped.
+    """
+    steady = [s for s in samples if s["t"] >= warmup]
+    if len(steady) < 4:
+        raise ValueError(f"only {len(steady)} samples after warm-up; run longer or sample more often")
+    quarter = len(steady) // 4
+    rows = []
+    for metric, (kind, limit) in thresholds.items():
+        first = [s[metric] for s in steady[:quarter] if s[metric] is not None]
+        last = [s[metric] for s in steady[-quarter:] if s[metric] is not None]
+        if not first or not last:
+            continue
+        a, b = statistics.median(first), statistics.median(last)
+        if kind == "abs":
+            change = b - a
+        elif kind == "rel":
+            change = (b - a) / a if a else 0.0
+        else:  # drop
+            change = (a - b) / a if a else 0.0
+        rows.append((metric, a, b, limit, change <= limit))
+    return rows
+
+
+def format_drift(rows):
+    lines = [f"{'metric':<10}{'first':>10}{'last':>10}{'limit':>12}  result"]
+    units = {"abs": "+", "rel": "+x", "drop": "-x"}
+    for metric, a, b, limit, ok in rows:
+        kind = units[THRESHOLDS[metric][0]]
+        lines.append(f"{metric:<10}{a:>10.2f}{b:>10.2f}{kind + format(limit, 'g'):>12}  {'ok' if ok else 'DRIFT'}")
+    return "\n".join(lines)
+
+
+def run_soak(duration, source, time_scale=1.0, interval=10.0, warmup=None, modes=("normal", "impossible", "random"),
+             trace_heap=True, speech=False, seed=0):
+    """Play games until `duration` wall-clock seconds have passed; returns (samples, drift rows, error counter)."""
+    from src.game_logic import GameLogic
+    from src.image_processing import ImageProcessing
+    from src.leaderboard import LeaderboardStore
+    from src.main import fade_transition, play_game
+    from src.session import PlayerSession
+    from src.settings import get_settings
+    from src.ui import UI
+
+    warmup = duration * 0.1 if warmup is None else warmup
+    errors = ErrorCounter()
+    logging.getLogger("src").addHandler(errors)
+    if trace_heap:
+        tracemalloc.start()
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    settings = get_settings()
+    ui = UI(settings)
+    ui.load_deferred_assets()
+    scratch = tempfile.TemporaryDirectory(prefix="soak-")
+    ui.leaderboard = LeaderboardStore(os.path.join(scratch.name, "leaderboard.db"), legacy_json_path=None)
+    if not speech:
+        ui._speak = lambda text: None  # gTTS needs the network
+    image_processing = ImageProcessing(max_workers=settings.effect_workers, effect_size=settings.effect_size)
+    hand_tracking = ScriptedHandTracking(source)
+    game_logic = GameLogic(clock=lambda: pygame.time.get_ticks())
+    probe = SoakProbe()
+    game_logic.recorder = probe
+    clock = ScaledClock(time_scale)
+    frame_counter, games = [0], [0]
+    rng = np.random.default_rng(seed)
+    faces = [rng.integers(0, 256, (120, 120, 3), dtype=np.uint8) for _ in range(8)]
+
+    sampler = Sampler(interval, clock, probe, frame_counter, games, trace_heap)
+    baseline = None
+    deadline = time.perf_counter() + duration
+    with scaled_time(time_scale, frame_counter):
+        sampler.start()
+        try:
+            while time.perf_counter() < deadline:
+                if baseline is None and trace_heap and time.perf_counter() - sampler._start >= warmup:
+                    baseline = tracemalloc.take_snapshot()
+                player = f"soak{games[0] % len(faces)}"
+                face = faces[games[0] % len(faces)]
+                session = PlayerSession(player, face, (0, 0, 100, 100))
+                session.set_avatar(image_processing.generate_spectral_effects(face)[0], image_processing.last_effect_ids[0])
+                mode = modes[games[0] % len(modes)]
+                play_game(screen, session, mode, hand_tracking, game_logic, ui, None, clock)
+                fade_transition(screen, "in")
+                ui.show_game_over(screen, game_logic.get_scores(), player, game_logic.get_game_duration())
+                ui.update_leaderboard(player, game_logic.get_scores())
+                pygame.event.clear()
+                games[0] += 1
+        finally:
+            sampler.stop()
+            logging.getLogger("src").removeHandler(errors)
+
+    growth = None
+    if baseline is not None:
+        growth = tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:10]
+    if trace_heap:
+        tracemalloc.stop()
+    image_processing.shutdown()
+    scratch.cleanup()
+    return sampler.samples, check_drift(sampler.samples, warmup), errors, growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game loop headless for hours and check for drift.")
+    parser.add_argument("--hours", type=float, default=0.0)
+    parser.add_argument("--minutes", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="run the game's clock this many times faster than real time")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=None, help="seconds ignored by the drift check (default 10%%)")
+    parser.add_argument("--replay", help="drive the game from a recorded session instead of scripted gestures")
+    parser.add_argument("--modes", nargs="+", default=["normal", "impossible", "random"])
+    parser.add_argument("--csv", help="also write every sample to this CSV file")
+    parser.add_argument("--no-heap", action="store_true", help="skip tracemalloc (it slows the game down)")
+    parser.add_argument("--speech", action="store_true", help="keep the spoken game-over lines (needs network)")
+    parser.add_argument("--seed", type=int, default=0)
+    for metric, (kind, limit) in THRESHOLDS.items():
+        parser.add_argument(f"--max-{metric.replace('_', '-')}", type=float, default=limit, dest=f"max_{metric}",
+                            help=f"allowed {'growth' if kind != 'drop' else 'relative drop'} ({kind}, default {limit})")
+    args = parser.parse_args()
+
+    duration = args.hours * 3600 + args.minutes * 60 or 600
+    for metric, (kind, _) in list(THRESHOLDS.items()):
+        THRESHOLDS[metric] = (kind, getattr(args, f"max_{metric}"))
+    from src.game_log import setup_logging
+
+    setup_logging(logging.INFO, console=False)
+    logging.getLogger(__name__).addHandler(logging.StreamHandler())
+    source = replay_source(args.replay) if args.replay else synthetic_source(args.seed)
+
+    print(f"⏱️ Soak test: {duration / 60:g} min at {args.time_scale:g}x, sampling every {args.interval:g}s")
+    samples, rows, errors, growth = run_soak(duration, source, args.time_scale, args.interval, args.warmup,
+                                             tuple(args.modes), not args.no_heap, args.speech, args.seed)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(samples)
+    print(format_drift(rows))
+    if growth:
+        print("Largest heap growth since warm-up:")
+        for stat in growth:
+            print(f"  {stat}")
+    failed = [row[0] for row in rows if not row[4]]
+    if errors.count:
+        print(f"❌ {errors.count} errors logged, first: {errors.first}")
+    if failed or errors.count:
+        print(f"❌ Soak test failed: {', '.join(failed) or 'errors'}")
+        sys.exit(1)
+    print(f"✅ Soak test passed: {samples[-1]['games']} games, {samples[-1]['rounds']} rounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+PROCESS_START = time.perf_counter()
+
+
+def log_timing(label, start):
+    log.info("⏱️ %s: %.0f ms", label, (time.perf_counter() - start) * 1000)
+
+
+def timed_import(module_name):
+    """Import a module and log how long the first import took."""
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    log_timing(f"import {module_name}", start)
+    return module
+
+
+class _Task:
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.future = Future()
+        self.claim = threading.Lock()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.future.set_result(self.fn())
+        except Exception as e:
+            log.error("❌ Warm-up task %s failed: %s", self.name, e)
+            self.future.set_exception(e)
+        log_timing(f"warm-up {self.name}", start)
+
+
+class Warmup:
+    """Runs startup tasks on a background thread, in the order they were added.
+
+    `get` returns a task's result, running it on the calling thread if the
+    background thread has not reached it yet, so a screen that needs something
+    early never waits behind unrelated work. A task that failed is run again
+    by the next `get`, so a transient failure (say, a busy camera) does not
+    need an app restart.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._thread = None
+
+    def add(self, name, fn):
+        self._tasks[name] = _Task(name, fn)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for task in list(self._tasks.values()):
+            if task.claim.acquire(blocking=False):
+                task.run()
+
+    def get(self, name, timeout=None):
+        task = self._tasks[name]
+        if task.future.done() and task.future.exception() is not None:
+            log.info("✅ Retrying warm-up task %s", name)
+            task = self._tasks[name] = _Task(name, task.fn)
+        if task.claim.acquire(blocking=False):
+            task.run()
+        return task.future.result(timeout)
@@ -1,15 +1,21 @@
+import logging
 import pygame
-import json
 import os
-import cv2
+import threading
 import numpy as np
 from pygame import mixer
-from gtts import gTTS
 from pygame.sprite import Sprite
 from tempfile import NamedTemporaryFile
-import playsound
 import math
 
+from src.asset_bundle import AssetBundle, display_pixel_format, pixel_format
+from src.audio import AudioManager, CHEER_SOUND, CLICK_SOUND, COUNTDOWN_TICK, GAMEPLAY_MUSIC, LAUGH_SOUND
+from src.event_loop import IdleEventLoop
+from src.leaderboard import LeaderboardStore
+from src.settings import get_settings
+
+log = logging.getLogger(__name__)
+
 class Particle(Sprite):
     def __init__(self, x, y, color, screen, particle_type="circle"):
         super().__init__()
@@ -55,27 +61,45 @@ class BackgroundParticle(Sprite):
             self.rect.x = np.random.randint(0, 800)
             self.rect.y = np.random.randint(0, 600)
 
+
+def _display_ready(surface, alpha=True):
+    """True if the surface already blits without conversion (e.g. a bundle sprite built for this display)."""
+    if alpha != bool(surface.get_flags() & pygame.SRCALPHA):
+        return False
+    return pixel_format(surface) == display_pixel_format()
+
+
 class UI:
-    def __init__(self):
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        mixer.init()
+        # Pre-decoded assets; falls back to the loose files if the bundle is missing or stale
+        self.bundle = AssetBundle.open()
+        self.audio = AudioManager(self.settings.volume, self.bundle)
+
         # Load assets with fallbacks
         try:
-            self.button_img = pygame.image.load(os.path.join("assets", "sprites", "button.png")).convert_alpha()
+            self.button_img = self._load_image("sprites/button.png")
         except pygame.error as e:
-            print(f"❌ Failed to load button.png: {e}")
+            log.error("❌ Failed to load button.png: %s", e)
             self.button_img = pygame.Surface((100, 50))
             self.button_img.fill((255, 255, 255))
 
         try:
-            self.background_img = pygame.image.load(os.path.join("assets", "sprites", "background.png")).convert()
+            self.background_img = self._load_image("sprites/background.png", alpha=False)
         except pygame.error as e:
-            print(f"❌ Failed to load background.png: {e}")
+            log.error("❌ Failed to load background.png: %s", e)
             self.background_img = pygame.Surface((800, 600))
             self.background_img.fill((0, 0, 50))
 
-        mixer.init()
-        self.click_sound = mixer.Sound(os.path.join("assets", "sounds", "click.wav"))
-        self.laugh_sound = mixer.Sound(os.path.join("assets", "sounds", "laugh.wav"))
-        self.cheer_sound = mixer.Sound(os.path.join("assets", "sounds", "cheer.wav"))
+        self.audio.preload([CLICK_SOUND])
+
+        self.leaderboard = LeaderboardStore()
+        self.menu_loop = IdleEventLoop(active_fps=self.settings.target_fps, idle_fps=self.settings.idle_fps)
+        # Registration and avatar selection show the camera, so they redraw every frame
+        self.camera_loop = IdleEventLoop(active_fps=self.settings.target_fps, idle_fps=self.settings.target_fps)
+        self._camera_surfaces = {}
+        self._avatar_surface = None  # (avatar array, Surface) for render_game_state
 
         self.achievements = {}
         self.level = 1
@@ -83,53 +107,98 @@ class UI:
         self.font = pygame.font.Font(None, 40)
         self.large_font = pygame.font.Font(None, 60)
         self.small_font = pygame.font.Font(None, 30)
-        self.emojis = {}
-        emoji_files = {"rock": "rock.png", "paper": "paper.png", "scissors": "scissors.png"}
-        for gesture, filename in emoji_files.items():
-            try:
-                self.emojis[gesture] = pygame.image.load(os.path.join("assets", "emojis", filename)).convert_alpha()
-            except pygame.error as e:
-                print(f"❌ Failed to load {filename}: {e}")
-                self.emojis[gesture] = pygame.Surface((50, 50))
-                self.emojis[gesture].fill((255, 0, 0))
+        # Gameplay-only assets are loaded by load_deferred_assets (startup warm-up or first use)
+        self._deferred_lock = threading.Lock()
+        self._deferred_loaded = False
+        self._emojis = {}
+        self._emojis_converted = False
 
         # Background particles for dynamic effect
         self.bg_particles = pygame.sprite.Group()
-        for _ in range(20):
+        for _ in range(self.settings.background_particles):
             self.bg_particles.add(BackgroundParticle(screen=pygame.display.get_surface()))
 
+    def load_deferred_assets(self):
+        """Decode the sounds, music and sprites that the menus do not need."""
+        with self._deferred_lock:
+            if self._deferred_loaded:
+                return
+            self.audio.preload([LAUGH_SOUND, CHEER_SOUND, COUNTDOWN_TICK, GAMEPLAY_MUSIC])
+            emoji_files = {"rock": "rock.png", "paper": "paper.png", "scissors": "scissors.png"}
+            for gesture, filename in emoji_files.items():
+                try:
+                    self._emojis[gesture] = self._load_image(f"emojis/{filename}", convert=False)
+                except pygame.error as e:
+                    log.error("❌ Failed to load %s: %s", filename, e)
+                    self._emojis[gesture] = pygame.Surface((50, 50))
+                    self._emojis[gesture].fill((255, 0, 0))
+            self._deferred_loaded = True
+
+    def _load_image(self, name, alpha=True, convert=True):
+        surface = self.bundle.image(name) if self.bundle else None
+        if surface is None:
+            surface = pygame.image.load(os.path.join("assets", *name.split("/")))
+        if not convert or _display_ready(surface, alpha):
+            return surface
+        return surface.convert_alpha() if alpha else surface.convert()
+
+    @property
+    def emojis(self):
+        self.load_deferred_assets()
+        if not self._emojis_converted:
+            # The warm-up thread only loads; converting touches the display, so it happens here on first use
+            self._emojis = {gesture: image if _display_ready(image) else image.convert_alpha()
+                            for gesture, image in self._emojis.items()}
+            self._emojis_converted = True
+        return self._emojis
+
+    def draw_camera(self, screen, frame, rect):
+        """Blit an RGB camera frame scaled into rect, reusing the scaled surface between frames."""
+        h, w = frame.shape[:2]
+        if frame.flags.c_contiguous:
+            source = pygame.image.frombuffer(frame, (w, h), "RGB")
+        else:
+            source = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+        size = (rect[2], rect[3])
+        key = (size, source.get_bitsize())
+        scaled = self._camera_surfaces.get(key)
+        if scaled is None:
+            scaled = self._camera_surfaces[key] = pygame.Surface(size, 0, source)
+        pygame.transform.scale(source, size, scaled)
+        screen.blit(scaled, (rect[0], rect[1]))
+
     def show_main_menu(self, screen):
         buttons = [("Start", 300, 200), ("Leaderboard", 300, 300), ("Quit", 300, 400)]
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return "quit"
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    for text, x, y in buttons:
-                        button = self._draw_animated_button(screen, text, x, y)
-                        if button.collidepoint(event.pos):
-                            self.click_sound.play()
-                            return text.lower()
+
+        def draw(animating):
             screen.blit(self.background_img, (0, 0))
             for text, x, y in buttons:
-                self._draw_animated_button(screen, text, x, y, color=(255, 255, 0))
-            pygame.display.flip()
-            pygame.time.delay(10)
+                self._draw_animated_button(screen, text, x, y, color=(255, 255, 0), animate=animating)
+
+        def handle_event(event):
+            if event.type == pygame.QUIT:
+                return "quit"
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                for text, x, y in buttons:
+                    if self.button_img.get_rect(center=(x, y)).collidepoint(event.pos):
+                        self.audio.play_effect(CLICK_SOUND)
+                        return text.lower()
+
+        return self.menu_loop.run(draw, handle_event)
 
     def show_leaderboard(self, screen):
-        screen.blit(self.background_img, (0, 0))
-        with open(os.path.join("assets", "leaderboard.json"), "r") as f:
-            leaderboard = json.load(f)
-        y = 100
-        for player, score in sorted(leaderboard.items(), key=lambda x: x[1], reverse=True)[:5]:
-            text = self.font.render(f"{player}: {score}", True, (255, 215, 0))
-            screen.blit(text, (300, y))
-            y += 60
-        pygame.display.flip()
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or event.type == pygame.MOUSEBUTTONDOWN:
-                    return
+        rows = [self.font.render(f"{player}: {score}", True, (255, 215, 0)) for player, score in self.leaderboard.top(5)]
+
+        def draw(animating):
+            screen.blit(self.background_img, (0, 0))
+            for i, text in enumerate(rows):
+                screen.blit(text, (300, 100 + i * 60))
+
+        def handle_event(event):
+            if event.type == pygame.QUIT or event.type == pygame.MOUSEBUTTONDOWN:
+                return True
+
+        self.menu_loop.run(draw, handle_event, animated=False)
 
     def start_round(self, screen, round_number):
         """Display a round start animation."""
@@ -154,8 +223,7 @@ class UI:
 
         # Display webcam feed
         if hand_tracking:
-            frame = pygame.surfarray.make_surface(hand_tracking.get_flipped_frame().swapaxes(0, 1))
-            screen.blit(pygame.transform.scale(frame, (300, 200)), (250, 300))
+            self.draw_camera(screen, hand_tracking.get_flipped_frame(), (250, 300, 300, 200))
 
         # Display detected gesture if available
         if gesture:
@@ -166,12 +234,12 @@ class UI:
         self.bg_particles.draw(screen)
         pygame.display.flip()
 
-    def show_round_result(self, screen, outcome, scores):
+    def show_round_result(self, screen, outcome, scores, labels=("You", "AI")):
         """Display the winner and scores for the round."""
         screen.fill((20, 20, 60))
         result_text = self.large_font.render(f"{outcome}!", True, 
                                             (0, 255, 0) if outcome == "Win" else (255, 0, 0) if outcome == "Lose" else (255, 255, 255))
-        score_text = self.font.render(f"You: {scores[0]} | AI: {scores[1]}", True, (255, 255, 255))
+        score_text = self.font.render(f"{labels[0]}: {scores[0]} | {labels[1]}: {scores[1]}", True, (255, 255, 255))
         screen.blit(result_text, (400 - result_text.get_width() // 2, 250))
         screen.blit(score_text, (400 - score_text.get_width() // 2, 320))
 
@@ -184,7 +252,9 @@ class UI:
             pygame.display.flip()
             pygame.time.delay(20)
 
-    def render_game_state(self, screen, gesture, ai_move, outcome, ai_avatar, hand_tracking, game_logic, particles, mode, objects, alignments, object_detector, face_coordinates):
+    def render_game_state(self, screen, gesture, ai_move, outcome, ai_avatar, hand_tracking, game_logic, particles, mode, objects, alignments, object_detector, face_coordinates, player_face=None, face_effect=None):
+        import cv2  # loaded by the startup warm-up long before the first game
+
         # Dynamic gradient background
         for y in range(600):
             r = 20 + (y / 600) * 30
@@ -201,8 +271,7 @@ class UI:
         pygame.draw.rect(screen, (255, 0, 255), (440, 40, 320, 270), 4, border_radius=15)
 
         # Camera feed
-        frame = pygame.surfarray.make_surface(hand_tracking.get_flipped_frame().swapaxes(0, 1))
-        screen.blit(pygame.transform.scale(frame, (300, 200)), (250, 350))
+        self.draw_camera(screen, hand_tracking.get_flipped_frame(), (250, 350, 300, 200))
 
         # Player Section
         pygame.draw.rect(screen, (30, 30, 80), (50, 50, 300, 250), border_radius=10)
@@ -228,24 +297,33 @@ class UI:
         # Player Avatar (moved to left side, same size as gesture)
         if face_coordinates:
             try:
-                frame_slice = hand_tracking.get_frame()[face_coordinates[1]:face_coordinates[1]+face_coordinates[3], face_coordinates[0]:face_coordinates[0]+face_coordinates[2]]
+                # Registration measures the face on the mirrored RGB frame the player sees
+                frame_slice = hand_tracking.get_flipped_frame()[face_coordinates[1]:face_coordinates[1]+face_coordinates[3], face_coordinates[0]:face_coordinates[0]+face_coordinates[2]]
                 if frame_slice.shape[0] > 0 and frame_slice.shape[1] > 0:
-                    player_face = pygame.surfarray.make_surface(cv2.resize(frame_slice, (100, 100)).swapaxes(0, 1))
-                    screen.blit(player_face, (50, 80))  # Left side
+                    # The live face gets the same effect as the avatar the player picked
+                    face = face_effect.apply(frame_slice) if face_effect else cv2.resize(frame_slice, (100, 100))
+                    screen.blit(pygame.image.frombuffer(face, (100, 100), "RGB"), (50, 80))  # Left side
                 else:
                     raise ValueError("Invalid face coordinates or empty frame slice")
             except Exception as e:
-                print(f"⚠️ Failed to render player face: {e}")
-                # Fallback: render a placeholder
-                placeholder = pygame.Surface((100, 100))
-                placeholder.fill((255, 0, 0))
-                screen.blit(placeholder, (50, 80))
+                log.warning("⚠️ Failed to render player face: %s", e)
+                if player_face is not None:
+                    # Fallback: the face captured at registration
+                    face_rgb = cv2.cvtColor(cv2.resize(player_face, (100, 100)), cv2.COLOR_BGR2RGB)
+                    screen.blit(pygame.surfarray.make_surface(face_rgb.swapaxes(0, 1)), (50, 80))
+                else:
+                    # Fallback: render a placeholder
+                    placeholder = pygame.Surface((100, 100))
+                    placeholder.fill((255, 0, 0))
+                    screen.blit(placeholder, (50, 80))
         else:
-            print("⚠️ face_coordinates not provided, skipping player face render")
+            log.warning("⚠️ face_coordinates not provided, skipping player face render")
 
-        # AI Avatar (moved to right side, same size as gesture)
-        ai_avatar_resized = pygame.surfarray.make_surface(cv2.resize(ai_avatar, (100, 100)).swapaxes(0, 1))
-        screen.blit(ai_avatar_resized, (650, 80))  # Right side
+        # AI Avatar (moved to right side, same size as gesture); it is fixed for the game, so convert it once
+        if self._avatar_surface is None or self._avatar_surface[0] is not ai_avatar:
+            avatar_rgb = cv2.cvtColor(cv2.resize(ai_avatar, (100, 100)), cv2.COLOR_BGR2RGB)
+            self._avatar_surface = (ai_avatar, pygame.image.frombuffer(avatar_rgb, (100, 100), "RGB").convert())
+        screen.blit(self._avatar_surface[1], (650, 80))  # Right side
 
         # Scores with Progress Bars
         scores = game_logic.get_scores()
@@ -270,18 +348,55 @@ class UI:
         for particle in particles:
             screen.blit(particle.image, particle.rect)
 
+    def render_versus_state(self, screen, gestures, seen, outcome, hand_tracking, game_logic, particles, player_names):
+        """Render the player-vs-player view: one panel per player around a shared camera feed."""
+        screen.fill((20, 20, 60))
+        self.bg_particles.update()
+        self.bg_particles.draw(screen)
+
+        self.draw_camera(screen, hand_tracking.get_flipped_frame(), (250, 350, 300, 200))
+        pygame.draw.line(screen, (255, 255, 255), (400, 350), (400, 550), 2)
+
+        scores = game_logic.get_scores()
+        colors = [(0, 255, 255), (255, 0, 255)]
+        for i, x in enumerate((50, 450)):
+            pygame.draw.rect(screen, colors[i], (x - 10, 40, 320, 270), 4, border_radius=15)
+            pygame.draw.rect(screen, (30, 30, 80), (x, 50, 300, 250), border_radius=10)
+            gesture_img = pygame.transform.scale(self.emojis.get(gestures[i], self.emojis["rock"]), (100, 100))
+            if not seen[i]:
+                gesture_img.set_alpha(80)
+            screen.blit(gesture_img, (x + 100, 80))
+            name_text = self.font.render(player_names[i], True, colors[i])
+            screen.blit(name_text, (x + 150 - name_text.get_width() // 2, 200))
+            bar_x = 10 if i == 0 else 590
+            pygame.draw.rect(screen, (50, 50, 50), (bar_x, 10, 200, 20))
+            pygame.draw.rect(screen, colors[i], (bar_x, 10, (min(scores[i], 5) / 5) * 200, 20))
+            score_text = self.small_font.render(f"{player_names[i]}: {scores[i]}", True, colors[i])
+            screen.blit(score_text, (bar_x, 40))
+
+        if outcome:
+            label = {"Win": f"{player_names[0]} wins", "Lose": f"{player_names[1]} wins"}.get(outcome, "Draw")
+            outcome_text = self.large_font.render(label, True, (255, 215, 0))
+            screen.blit(outcome_text, (400 - outcome_text.get_width() // 2, 300))
+
+        time_text = self.small_font.render(f"Time: {game_logic.get_game_duration()}", True, (255, 255, 255))
+        screen.blit(time_text, (350, 10))
+
+        for particle in particles:
+            screen.blit(particle.image, particle.rect)
+
     def create_particles(self, outcome, screen):
         particles = []
         x, y = 400, 300
         color = (0, 255, 0) if outcome == "Win" else (255, 0, 0)
         particle_type = "sparkle" if outcome == "Win" else "circle"
-        for _ in range(20):
+        for _ in range(self.settings.burst_particles):
             particles.append(Particle(x, y, color, screen, particle_type))
         return particles
 
-    def show_game_over(self, screen, scores, player_name, game_duration):
+    def show_game_over(self, screen, scores, player_name, game_duration, labels=("You", "AI")):
         screen.fill((20, 20, 60))
-        winner = "You Won!" if scores[0] > scores[1] else "AI Won!"
+        winner = f"{labels[0]} Won!" if scores[0] > scores[1] else f"{labels[1]} Won!"
         title = self._get_achievement_title(scores[0])
         text = self.large_font.render(f"{winner} {player_name} - {title}", True, (255, 215, 0))
         duration_text = self.font.render(f"Game Duration: {game_duration}", True, (255, 255, 255))
@@ -301,15 +416,7 @@ class UI:
         pygame.time.delay(2000)
 
     def update_leaderboard(self, player_name, scores):
-        leaderboard_path = os.path.join("assets", "leaderboard.json")
-        if os.path.exists(leaderboard_path):
-            with open(leaderboard_path, "r") as f:
-                leaderboard = json.load(f)
-        else:
-            leaderboard = {}
-        leaderboard[player_name] = max(leaderboard.get(player_name, 0), scores[0])
-        with open(leaderboard_path, "w") as f:
-            json.dump(leaderboard, f)
+        self.leaderboard.record_score(player_name, scores[0])
 
     def update_achievements(self, player_name, scores):
         score = scores[0]
@@ -328,12 +435,14 @@ class UI:
         return "Beginner"
 
     def get_modes(self):
-        return ["Random", "Normal", "Impossible"]
+        return ["Random", "Normal", "Impossible", "Versus"]
 
-    def _draw_animated_button(self, screen, text, x, y, color=(255, 255, 255)):
-        button_rect = self.button_img.get_rect(center=(x, y))
-        scale = 1 + 0.1 * abs(pygame.time.get_ticks() % 1000 / 500 - 1)
-        scaled_button = pygame.transform.scale(self.button_img, (int(self.button_img.get_width() * scale), int(self.button_img.get_height() * scale)))
+    def _draw_animated_button(self, screen, text, x, y, color=(255, 255, 255), animate=True):
+        if animate:
+            scale = 1 + 0.1 * abs(pygame.time.get_ticks() % 1000 / 500 - 1)
+            scaled_button = pygame.transform.scale(self.button_img, (int(self.button_img.get_width() * scale), int(self.button_img.get_height() * scale)))
+        else:
+            scaled_button = self.button_img
         scaled_rect = scaled_button.get_rect(center=(x, y))
         screen.blit(scaled_button, scaled_rect)
         text_surface = self.font.render(text, True, color)
@@ -342,10 +451,15 @@ class UI:
 
     def _speak(self, text):
         try:
+            from gtts import gTTS
+            import playsound
             with NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                tts = gTTS(text=text, lang='en')
-                tts.save(temp_file.name)
+                pass
+            try:
+                gTTS(text=text, lang='en').save(temp_file.name)
                 playsound.playsound(temp_file.name)
-            os.unlink(temp_file.name)
+            finally:
+                # A failed download or playback used to leave the file behind
+                os.unlink(temp_file.name)
         except Exception as e:
-            print(f"Voice feedback failed: {e}")
\ No newline at end of file
+            log.warning("Voice feedback failed: %s", e)
\ No newline at end of file